@@ -0,0 +1,364 @@
+# encoding: utf-8
+
+"""
+httprunner.async_runner
+~~~~~~~~~~~~~~~~~~~~~~~
+
+This module runs testsets concurrently on one asyncio event loop.
+Tests in the same testset are still run one by one, thus the ordering and
+extracted variables are kept within each testset, while requests of different
+testsets are interleaved.
+
+Python 3.5+ is required, and aiohttp is required by AsyncHttpSession.
+"""
+
+import asyncio
+import datetime
+import os
+import ssl
+import sys
+import time
+import unittest
+from urllib.parse import urlparse
+
+from httprunner import exceptions, logger
+from httprunner.client import ApiResponse, HttpSession, connection_pool_defaults
+from httprunner.runner import Runner
+from httprunner.task import (HttpRunner, TestSuite, get_test_suite_summary,
+                             load_testsets)
+from requests import Request, Response
+from requests.cookies import RequestsCookieJar
+from requests.exceptions import ConnectionError, Timeout
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import aiohttp
+except ImportError:
+    # AsyncRunner could still run with other awaitable http session
+    aiohttp = None
+
+
+class AsyncHttpSession(HttpSession):
+    """ HttpSession with the same interface, but request is a coroutine sent with aiohttp.
+        request is still prepared with requests, so that request body, headers and
+        meta data are in accordance with HttpSession.
+    """
+    def __init__(self, base_url=None, *args, **kwargs):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required by AsyncHttpSession.")
+
+        self.aiohttp_session = None
+        # ssl contexts of CA bundle paths passed as verify
+        self.ssl_contexts = {}
+        super(AsyncHttpSession, self).__init__(base_url, *args, **kwargs)
+
+    def config_connection_pool(self, connection_pool):
+        """ connection pool settings are validated and kept for aiohttp connector:
+            pool_maxsize limits connections per host, pool_connections * pool_maxsize
+            limits connections of session, and keep_alive False closes connection
+            after each request. aiohttp never retries, and connector is not shared.
+        """
+        super(AsyncHttpSession, self).config_connection_pool(connection_pool)
+        settings = dict(connection_pool_defaults)
+        settings.update(connection_pool)
+        self.connector_kwargs = {
+            "limit": int(settings["pool_connections"]) * int(settings["pool_maxsize"]),
+            "limit_per_host": int(settings["pool_maxsize"]),
+            "force_close": not settings["keep_alive"]
+        }
+
+    def _get_ssl(self, verify):
+        """ convert requests verify argument to aiohttp ssl argument.
+        @param verify: True, False or path of CA bundle file/directory
+        """
+        if verify is False:
+            return False
+        elif verify is True or verify is None:
+            return None
+
+        if verify not in self.ssl_contexts:
+            if os.path.isdir(verify):
+                self.ssl_contexts[verify] = ssl.create_default_context(capath=verify)
+            else:
+                self.ssl_contexts[verify] = ssl.create_default_context(cafile=verify)
+
+        return self.ssl_contexts[verify]
+
+    async def request(self, method, url, name=None, **kwargs):
+        """ the same as HttpSession.request, but should be awaited.
+        """
+        # record original request info
+        self._record_request(method, url, kwargs)
+
+        # prepend url with hostname unless it's already an absolute URL
+        url = self._build_url(url)
+
+        kwargs.setdefault("timeout", 120)
+        response = await self._send_request_safe_mode(method, url, **kwargs)
+
+        # record response info
+        self._record_response(response, kwargs)
+        return response
+
+    async def _send_request_safe_mode(self, method, url, **kwargs):
+        """
+        Send a HTTP request, and catch any exception that might occur due to connection problems.
+        """
+        logger.log_debug(
+            "processed request:\n> {method} {url}\n> kwargs: {kwargs}",
+            method=method, url=url, kwargs=kwargs
+        )
+
+        request = Request(
+            method=method.upper(),
+            url=url,
+            headers=kwargs.get("headers"),
+            files=kwargs.get("files"),
+            data=kwargs.get("data") or {},
+            json=kwargs.get("json"),
+            params=kwargs.get("params") or {},
+            auth=kwargs.get("auth"),
+            cookies=kwargs.get("cookies")
+        )
+        # MissingSchema, InvalidSchema and InvalidURL are raised when preparing
+        prepared_request = self.prepare_request(request)
+
+        try:
+            return await self._send(prepared_request, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            resp = ApiResponse()
+            if isinstance(ex, asyncio.TimeoutError):
+                resp.error = Timeout(ex, request=prepared_request)
+            else:
+                resp.error = ConnectionError(ex, request=prepared_request)
+            resp.status_code = 0  # with this status_code, content returns None
+            resp.request = prepared_request
+            return resp
+
+    async def _send(self, prepared_request, **kwargs):
+        if self.aiohttp_session is None:
+            self.aiohttp_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.connector_kwargs),
+                cookie_jar=aiohttp.CookieJar(unsafe=True)
+            )
+
+        timeout = kwargs.get("timeout")
+        if isinstance(timeout, (tuple, list)):
+            connect_timeout, read_timeout = timeout
+            client_timeout = aiohttp.ClientTimeout(
+                sock_connect=connect_timeout,
+                sock_read=read_timeout
+            )
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        proxies = kwargs.get("proxies") or self.proxies or {}
+        proxy = proxies.get(urlparse(prepared_request.url).scheme)
+        verify = kwargs.get("verify", self.verify)
+
+        body = prepared_request.body
+        if hasattr(body, "read"):
+            # e.g. MultipartEncoder
+            body = body.read()
+
+        start_timestamp = time.time()
+        async with self.aiohttp_session.request(
+                prepared_request.method,
+                prepared_request.url,
+                headers=prepared_request.headers,
+                data=body,
+                allow_redirects=kwargs.get("allow_redirects", True),
+                proxy=proxy,
+                ssl=self._get_ssl(verify),
+                timeout=client_timeout) as aiohttp_response:
+            content = await aiohttp_response.read()
+
+        elapsed = time.time() - start_timestamp
+        return self._build_response(prepared_request, aiohttp_response, content, elapsed)
+
+    def _build_response(self, prepared_request, aiohttp_response, content, elapsed):
+        """ convert aiohttp response to requests.Response
+        """
+        response = Response()
+        response.status_code = aiohttp_response.status
+        response.reason = aiohttp_response.reason
+        response.url = str(aiohttp_response.url)
+        response.request = prepared_request
+        response.elapsed = datetime.timedelta(seconds=elapsed)
+
+        headers = CaseInsensitiveDict()
+        for key, value in aiohttp_response.headers.items():
+            if key in headers:
+                # multiple headers with the same name are joined, the same as requests
+                headers[key] = "{}, {}".format(headers[key], value)
+            else:
+                headers[key] = value
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+
+        cookies = RequestsCookieJar()
+        for cookie_name, morsel in aiohttp_response.cookies.items():
+            cookies.set(cookie_name, morsel.value)
+        response.cookies = cookies
+
+        response._content = content
+        response._content_consumed = True
+        return response
+
+    async def aclose(self):
+        """ close underlying aiohttp session
+        """
+        if self.aiohttp_session is not None:
+            await self.aiohttp_session.close()
+            self.aiohttp_session = None
+
+
+class AsyncRunner(Runner):
+
+    http_session_class = AsyncHttpSession
+
+    async def run_test(self, testcase_dict):
+        """ run single testcase, the same as Runner.run_test but should be awaited.
+        """
+        method, url, group_name, parsed_request = self._prepare_request(testcase_dict)
+
+        # request
+        resp = await self.http_client_session.request(
+            method,
+            url,
+            name=group_name,
+            **parsed_request
+        )
+        self._handle_response(testcase_dict, parsed_request, resp)
+
+    async def run_compiled_test(self, compiled_testcase):
+        """ run compiled testcase, the same as Runner.run_compiled_test but should be awaited.
+        """
+        testcase_dict = compiled_testcase.testcase_dict
+        method, url, group_name, parsed_request = self._prepare_compiled_request(compiled_testcase)
+
+        # request
+        resp = await self.http_client_session.request(
+            method,
+            url,
+            name=group_name,
+            **parsed_request
+        )
+        self._handle_response(
+            testcase_dict,
+            parsed_request,
+            resp,
+            teardown_hooks=compiled_testcase.teardown_hooks,
+            extractors=compiled_testcase.extractors,
+            validators=compiled_testcase.validators
+        )
+
+
+class AsyncTestSuite(TestSuite):
+
+    runner_class = AsyncRunner
+
+
+async def run_test_async(test, result):
+    """ run single test and add outcome to result, as what unittest.TestCase.run does.
+    """
+    result.startTest(test)
+    err = None
+    try:
+        if test.compiled_testcase is not None:
+            await test.test_runner.run_compiled_test(test.compiled_testcase)
+        else:
+            await test.test_runner.run_test(test.testcase_dict)
+    except unittest.SkipTest as ex:
+        outcome = "skip"
+        err = str(ex)
+    except exceptions.MyBaseFailure as ex:
+        outcome = "failure"
+        try:
+            test.fail(repr(ex))
+        except test.failureException:
+            err = sys.exc_info()
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        outcome = "error"
+        err = sys.exc_info()
+    else:
+        outcome = "success"
+    finally:
+        test.collect_meta_data()
+
+    if outcome == "success":
+        result.addSuccess(test)
+    elif outcome == "skip":
+        result.addSkip(test, err)
+    elif outcome == "failure":
+        result.addFailure(test, err)
+    else:
+        result.addError(test, err)
+
+    result.stopTest(test)
+
+
+class AsyncHttpRunner(HttpRunner):
+    """ run testsets concurrently on one asyncio event loop.
+        the interface is the same as HttpRunner.
+    """
+    def __init__(self, **kwargs):
+        """
+        @param (dict) kwargs: key-value arguments used to initialize HttpRunner
+            - concurrency: max number of testsets run concurrently, default is unlimited.
+        """
+        self.concurrency = kwargs.pop("concurrency", None)
+        super(AsyncHttpRunner, self).__init__(**kwargs)
+
+    def _run_test_suites(self, path_or_testsets, mapping):
+        testsets = load_testsets(path_or_testsets)
+        mapping = mapping or {}
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self._run_testsets(testsets, mapping))
+        finally:
+            loop.close()
+
+    async def _run_testsets(self, testsets, mapping):
+        semaphore = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+
+        async def run_testset(testset):
+            if semaphore is None:
+                return await self._run_testset(testset, mapping)
+
+            async with semaphore:
+                return await self._run_testset(testset, mapping)
+
+        return await asyncio.gather(*[
+            run_testset(testset)
+            for testset in testsets
+        ])
+
+    async def _run_testset(self, testset, mapping):
+        test_suite = AsyncTestSuite(testset, mapping, lazy=self.lazy)
+
+        result = self.runner._makeResult()
+        result.failfast = self.runner.failfast
+        result.startTestRun()
+
+        sessions = []
+        try:
+            for test in test_suite:
+                if result.shouldStop:
+                    break
+
+                if test.test_runner.http_client_session not in sessions:
+                    sessions.append(test.test_runner.http_client_session)
+
+                await run_test_async(test, result)
+        finally:
+            result.stopTestRun()
+            for session in sessions:
+                await session.aclose()
+
+        result.printErrors()
+        return get_test_suite_summary(result, test_suite)
@@ -0,0 +1,391 @@
+# encoding: utf-8
+
+""" benchmark of engine overhead, testsets are run against an in-process stub
+    transport, thus time is spent only in HttpRunner, requests and python.
+"""
+
+import functools
+import io
+import json
+import os
+import sys
+import timeit
+from collections import OrderedDict
+from datetime import timedelta
+
+from httprunner import (client, context, loader, logger, report, response,
+                        runner, task, testcase)
+from httprunner.compat import bytes
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# benchmark testsets and baseline in source checkout, independent of working directory
+benchmarks_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "benchmarks"
+)
+default_baseline_path = os.path.join(benchmarks_dir, "baseline.json")
+
+# benchmark phases, in report order
+PHASES = ["load", "parse", "context", "request", "extract", "validate", "report", "other"]
+
+# engine functions timed as phases, (phase, owner, attribute name)
+PHASE_FUNCTIONS = [
+    ("load", loader, "load_testcases"),
+    ("load", loader, "load_test_dependencies"),
+    ("parse", testcase.TestcaseParser, "eval_content_with_bindings"),
+    ("context", runner.Runner, "init_config"),
+    ("request", client.HttpSession, "request"),
+    ("extract", response.ResponseObject, "extract_response"),
+    ("validate", context.Context, "validate"),
+    ("report", report.HtmlTestResult, "_record_test"),
+    ("report", report, "stringify_record")
+]
+
+
+class StubAdapter(BaseAdapter):
+    """ transport adapter that responds in process without network.
+        response body is json echo of request, with a fixed data block.
+    """
+    def __init__(self, status_code=200, data=None):
+        super(StubAdapter, self).__init__()
+        self.status_code = status_code
+        self.data = data or {
+            "token": "a" * 16,
+            "items": [
+                {"id": index, "name": "item{}".format(index)}
+                for index in range(20)
+            ]
+        }
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "ignore")
+
+        try:
+            request_json = json.loads(body) if body else None
+        except ValueError:
+            request_json = None
+
+        content = json.dumps({
+            "success": True,
+            "method": request.method,
+            "url": request.url,
+            "headers": dict(request.headers),
+            "json": request_json,
+            "data": self.data
+        })
+
+        resp = Response()
+        resp.status_code = self.status_code
+        resp.reason = "OK"
+        resp.headers = CaseInsensitiveDict({
+            "Content-Type": "application/json",
+            "Content-Length": str(len(content))
+        })
+        resp.encoding = "utf-8"
+        resp._content = content.encode("utf-8")
+        resp.url = request.url
+        resp.request = request
+        resp.elapsed = timedelta(0)
+        resp.connection = self
+        return resp
+
+    def close(self):
+        pass
+
+
+class StubHttpSession(client.HttpSession):
+    """ HttpSession with all requests sent to StubAdapter.
+    """
+    def __init__(self, base_url=None, *args, **kwargs):
+        super(StubHttpSession, self).__init__(base_url, *args, **kwargs)
+        adapter = StubAdapter()
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+
+class PhaseTimer(object):
+    """ time engine functions by phase while installed.
+        time of nested timed functions is excluded from the outer one, e.g. parsing
+        in Runner.init_config is counted in parse phase instead of context phase.
+        recursive calls of the same function are timed and counted only once, in
+        the outermost call, e.g. load_testcases of folder and its files.
+    """
+    def __init__(self, phase_functions=None):
+        self.phase_functions = phase_functions or PHASE_FUNCTIONS
+        self.durations = OrderedDict((phase, 0.0) for phase in PHASES)
+        self.calls = OrderedDict((phase, 0) for phase in PHASES)
+        self._stack = []
+        self._originals = []
+
+    def wrap(self, phase, func):
+        # depth of recursive calls of func
+        depth = [0]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if depth[0]:
+                depth[0] += 1
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    depth[0] -= 1
+
+            depth[0] = 1
+            # accumulated time of nested timed functions
+            self._stack.append(0.0)
+            start = timeit.default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                depth[0] = 0
+                elapsed = timeit.default_timer() - start
+                nested = self._stack.pop()
+                self.durations[phase] += elapsed - nested
+                self.calls[phase] += 1
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        return wrapper
+
+    def install(self):
+        for phase, owner, name in self.phase_functions:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(self.wrap(phase, original.__func__))
+            else:
+                wrapped = self.wrap(phase, original)
+            setattr(owner, name, wrapped)
+
+    def uninstall(self):
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+
+
+def _run_round(path_or_testsets):
+    """ run testsets once, with loading and report included.
+    @return (int) tests run
+    """
+    # testcases should be loaded in each round
+    loader.testcases_cache_mapping.clear()
+
+    with open(os.devnull, "w") as devnull:
+        http_runner = task.HttpRunner(stream=devnull)
+        stdout = sys.stdout
+        # hide test names printed by HtmlTestResult
+        sys.stdout = devnull
+        try:
+            summary = http_runner.run(path_or_testsets).summary
+            # records are stringified when rendering html report
+            for suite_summary in summary["details"]:
+                for record in suite_summary["records"]:
+                    report.stringify_record(record)
+        finally:
+            sys.stdout = stdout
+
+    if not summary["success"]:
+        logger.log_warning("benchmark testsets failed, result may be inaccurate.")
+
+    return summary["stat"]["testsRun"]
+
+
+def _measure_peak_memory(path_or_testsets):
+    """ peak memory in KB of one round, traced with tracemalloc if available,
+        otherwise peak resident memory of process.
+    """
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            _run_round(path_or_testsets)
+            return tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+
+    if resource is not None:
+        _run_round(path_or_testsets)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return None
+
+
+def run_benchmark(path_or_testsets, rounds=5):
+    """ run testsets with stub transport for several rounds and measure engine overhead.
+    @param path_or_testsets: testset file path, folder path or testsets, the same as HttpRunner.run
+    @param (int) rounds: rounds to run, time of all rounds is measured
+    @return (dict) benchmark result
+        {
+            "tests": 40,                # tests run in each round
+            "rounds": 5,
+            "duration": 1.2,            # seconds of all rounds
+            "ops_per_sec": 166.7,       # tests per second
+            "peak_memory_kb": 2048,
+            "phases": {
+                "load": {"total_ms": 20.1, "per_test_ms": 0.1, "calls": 5},
+                ...
+            },
+            "platform": {}
+        }
+    """
+    http_session_class = runner.Runner.http_session_class
+    runner.Runner.http_session_class = StubHttpSession
+    try:
+        # warm up imports and caches, e.g. compiled templates and extractors
+        tests = _run_round(path_or_testsets)
+
+        phase_timer = PhaseTimer()
+        start = timeit.default_timer()
+        with phase_timer:
+            for _ in range(rounds):
+                _run_round(path_or_testsets)
+        duration = timeit.default_timer() - start
+
+        peak_memory_kb = _measure_peak_memory(path_or_testsets)
+    finally:
+        runner.Runner.http_session_class = http_session_class
+
+    tests_run = tests * rounds
+    phase_timer.durations["other"] = duration - sum(phase_timer.durations.values())
+    phase_timer.calls["other"] = tests_run
+
+    phases = OrderedDict()
+    for phase in PHASES:
+        total_ms = phase_timer.durations[phase] * 1000
+        phases[phase] = {
+            "total_ms": round(total_ms, 3),
+            "per_test_ms": round(total_ms / tests_run, 4) if tests_run else 0,
+            "calls": phase_timer.calls[phase]
+        }
+
+    return {
+        "tests": tests,
+        "rounds": rounds,
+        "duration": round(duration, 4),
+        "ops_per_sec": round(tests_run / duration, 2) if duration else 0,
+        "peak_memory_kb": peak_memory_kb,
+        "phases": phases,
+        "platform": report.get_platform()
+    }
+
+
+def load_baseline(baseline_path):
+    """ load saved benchmark result, return None if not exist.
+    """
+    if not os.path.isfile(baseline_path):
+        return None
+
+    with io.open(baseline_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(result, baseline_path):
+    """ save benchmark result as baseline for later comparison.
+    """
+    baseline_dir = os.path.dirname(baseline_path)
+    if baseline_dir and not os.path.isdir(baseline_dir):
+        os.makedirs(baseline_dir)
+
+    content = json.dumps(result, indent=4, separators=(',', ': '))
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+
+    with io.open(baseline_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+    logger.color_print("Saved benchmark baseline: {}".format(baseline_path), "GREEN")
+
+
+def compare_with_baseline(result, baseline, threshold=0.2):
+    """ compare benchmark result with baseline.
+    @param (float) threshold: relative change regarded as regression, 0.2 means 20%
+    @return (list) regressions, each in (metric, baseline value, current value)
+    """
+    regressions = []
+
+    def _check(metric, baseline_value, current_value, higher_is_better=False):
+        if not baseline_value or current_value is None:
+            return
+
+        if higher_is_better:
+            regressed = current_value < baseline_value / (1 + threshold)
+        else:
+            regressed = current_value > baseline_value * (1 + threshold)
+
+        if regressed:
+            regressions.append((metric, baseline_value, current_value))
+
+    _check("ops_per_sec", baseline.get("ops_per_sec"), result["ops_per_sec"], higher_is_better=True)
+    _check("peak_memory_kb", baseline.get("peak_memory_kb"), result["peak_memory_kb"])
+    for phase, phase_result in result["phases"].items():
+        baseline_phase = baseline.get("phases", {}).get(phase, {})
+        _check(
+            "{}.per_test_ms".format(phase),
+            baseline_phase.get("per_test_ms"),
+            phase_result["per_test_ms"]
+        )
+
+    return regressions
+
+
+def print_benchmark(result, baseline=None):
+    """ print benchmark result as table, with changes against baseline if specified.
+    """
+    def _change(baseline_value, current_value):
+        if not baseline_value or current_value is None:
+            return ""
+        return "{:+.1f}%".format((current_value - baseline_value) * 100.0 / baseline_value)
+
+    baseline = baseline or {}
+    baseline_phases = baseline.get("phases", {})
+
+    lines = [
+        "",
+        "tests: {} x {} rounds, duration: {}s".format(
+            result["tests"], result["rounds"], result["duration"]),
+        "{:<10} {:>12} {:>14} {:>10} {:>10}".format(
+            "phase", "total(ms)", "per test(ms)", "calls", "change")
+    ]
+    for phase, phase_result in result["phases"].items():
+        lines.append("{:<10} {:>12.3f} {:>14.4f} {:>10} {:>10}".format(
+            phase,
+            phase_result["total_ms"],
+            phase_result["per_test_ms"],
+            phase_result["calls"],
+            _change(
+                baseline_phases.get(phase, {}).get("per_test_ms"),
+                phase_result["per_test_ms"]
+            )
+        ))
+
+    lines.append("ops/sec: {} {}".format(
+        result["ops_per_sec"],
+        _change(baseline.get("ops_per_sec"), result["ops_per_sec"])
+    ))
+    lines.append("peak memory(KB): {} {}".format(
+        result["peak_memory_kb"],
+        _change(baseline.get("peak_memory_kb"), result["peak_memory_kb"])
+    ))
+    logger.color_print("\n".join(lines), "GREEN")
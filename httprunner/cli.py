@@ -1,9 +1,12 @@
 # encoding: utf-8
 
 import argparse
+import logging
 import multiprocessing
 import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 from httprunner import logger
@@ -45,6 +48,61 @@ def main_hrun():
     parser.add_argument(
         '--failfast', action='store_true', default=False,
         help="Stop the test run on the first error or failure.")
+    parser.add_argument(
+        '--lazy', action='store_true', default=False,
+        help="Generate tests one by one while running, useful for huge parameters or times.")
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="Specify number of testsets run concurrently, default is 1.")
+    parser.add_argument(
+        '--worker-type', choices=["thread", "process"], default="thread",
+        help="Specify worker pool backend, thread or process, default is thread.")
+    parser.add_argument(
+        '--asyncio', action='store_true', default=False,
+        help="Run testsets concurrently on asyncio event loop, aiohttp is required.")
+    parser.add_argument(
+        '--meta-data-level', choices=["none", "headers", "truncated", "full"], default="full",
+        help="Specify capture level of request and response data in report, default is full.")
+    parser.add_argument(
+        '--body-size-limit', type=int, default=1024,
+        help="Specify max bytes of body kept with truncated meta data level, default is 1024.")
+    parser.add_argument(
+        '--failed-body-only', action='store_true', default=False,
+        help="Keep request and response bodies only for failed tests.")
+    parser.add_argument(
+        '--records-dir',
+        help="Keep test records files in specified directory, records are always written "
+             "to files while running, in a temporary directory removed after report by default.")
+    parser.add_argument(
+        '--cache-dir',
+        help="Specify directory of persistent cache of parsed testcase files, useful for faster startup.")
+    parser.add_argument(
+        '--benchmark', action='store_true', default=False,
+        help="Benchmark engine overhead with in-process stub transport, "
+             "testset paths default to benchmarks/ of HttpRunner source.")
+    parser.add_argument(
+        '--benchmark-rounds', type=int, default=5,
+        help="Specify rounds of benchmark, default is 5.")
+    parser.add_argument(
+        '--benchmark-baseline',
+        help="Specify benchmark baseline file to compare with, "
+             "default is benchmarks/baseline.json of HttpRunner source.")
+    parser.add_argument(
+        '--benchmark-save', action='store_true', default=False,
+        help="Save benchmark result as baseline.")
+    parser.add_argument(
+        '--benchmark-threshold', type=float, default=0.2,
+        help="Specify relative change regarded as benchmark regression, default is 0.2.")
+    parser.add_argument(
+        '--rate', type=float,
+        help="Replay testsets at constant arrival rate per second, latency is measured "
+             "from scheduled time of each arrival.")
+    parser.add_argument(
+        '--duration', type=float, default=60,
+        help="Specify seconds to replay testsets with --rate, default is 60.")
+    parser.add_argument(
+        '--concurrency', type=int, default=100,
+        help="Specify max arrivals run at the same time with --rate, default is 100.")
     parser.add_argument(
         '--startproject',
         help="Specify new project name.")
@@ -78,17 +136,103 @@ def main_hrun():
         create_scaffold(project_path)
         exit(0)
 
-    runner = HttpRunner(failfast=args.failfast, dot_env_path=args.dot_env_path).run(args.testset_paths)
+    if args.benchmark:
+        return run_benchmark(args)
 
-    if not args.no_html_report:
-        runner.gen_html_report(
-            html_report_name=args.html_report_name,
-            html_report_template=args.html_report_template
-        )
+    if args.rate:
+        return run_at_rate(args)
+
+    runner_class = HttpRunner
+    if args.asyncio:
+        if is_py2:
+            logger.log_error("asyncio mode requires Python 3.5+, exit.")
+            exit(1)
+
+        try:
+            import aiohttp
+            from httprunner.async_runner import AsyncHttpRunner as runner_class
+        except ImportError:
+            msg = "aiohttp is not installed, install first and try again.\n"
+            msg += "install command: pip install aiohttp"
+            logger.log_warning(msg)
+            exit(1)
+
+    # records are streamed to files instead of being kept in memory, and report
+    # is rendered from files record by record.
+    records_dir = args.records_dir or tempfile.mkdtemp(prefix="httprunner-records-")
+    try:
+        runner = runner_class(
+            failfast=args.failfast,
+            dot_env_path=args.dot_env_path,
+            lazy=args.lazy,
+            workers=args.workers,
+            worker_type=args.worker_type,
+            meta_data_level=args.meta_data_level,
+            body_size_limit=args.body_size_limit,
+            failed_body_only=args.failed_body_only,
+            records_dir=records_dir,
+            cache_dir=args.cache_dir
+        ).run(args.testset_paths)
+
+        if not args.no_html_report:
+            runner.gen_html_report(
+                html_report_name=args.html_report_name,
+                html_report_template=args.html_report_template
+            )
+    finally:
+        if not args.records_dir:
+            shutil.rmtree(records_dir, ignore_errors=True)
 
     summary = runner.summary
     return 0 if summary["success"] else 1
 
+def run_benchmark(args):
+    """ run benchmark and compare with baseline, return 1 if regressions found.
+    """
+    from httprunner import benchmark
+
+    # logs are disabled to measure engine only
+    logging.root.setLevel(max(logging.root.level, logging.WARNING))
+
+    result = benchmark.run_benchmark(
+        args.testset_paths or benchmark.benchmarks_dir,
+        rounds=args.benchmark_rounds
+    )
+    baseline_path = args.benchmark_baseline or benchmark.default_baseline_path
+    baseline = benchmark.load_baseline(baseline_path)
+    benchmark.print_benchmark(result, baseline)
+
+    regressions = []
+    if baseline:
+        regressions = benchmark.compare_with_baseline(
+            result, baseline, args.benchmark_threshold)
+        for metric, baseline_value, current_value in regressions:
+            logger.log_error("benchmark regression: {} {} => {}".format(
+                metric, baseline_value, current_value))
+
+    if args.benchmark_save:
+        benchmark.save_baseline(result, baseline_path)
+
+    return 1 if regressions else 0
+
+def run_at_rate(args):
+    """ replay testsets at constant rate and print latency, return 1 if failed.
+    """
+    from httprunner.rate_runner import RateRunner, print_rate_summary
+
+    # logs of each request are too verbose at high rate
+    logging.root.setLevel(max(logging.root.level, logging.WARNING))
+
+    runner = RateRunner(
+        args.rate,
+        args.duration,
+        concurrency=args.concurrency,
+        dot_env_path=args.dot_env_path
+    ).run(args.testset_paths)
+    print_rate_summary(runner.summary)
+
+    return 0 if runner.summary["success"] else 1
+
 def main_locust():
     """ Performance test with locust: parse command line options and run commands.
     """
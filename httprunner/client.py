@@ -1,20 +1,175 @@
 # encoding: utf-8
 
 import re
+import socket
+import threading
 import time
+import timeit
 
 import requests
 import urllib3
 from httprunner import logger
 from httprunner.exceptions import ParamsError
 from requests import Request, Response
+from requests.adapters import HTTPAdapter
 from requests.exceptions import (InvalidSchema, InvalidURL, MissingSchema,
                                  RequestException)
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 absolute_http_url_regexp = re.compile(r"^https?://", re.I)
 
+# default settings of connection pool, the same as requests
+connection_pool_defaults = {
+    "pool_connections": 10,
+    "pool_maxsize": 10,
+    "max_retries": 0,
+    "pool_block": False,
+    "keep_alive": True,
+    "shared": False
+}
+
+# adapters shared by all sessions in process, keyed by pool settings
+shared_adapters_mapping = {}
+shared_adapters_lock = threading.Lock()
+
+# timings of connection established for current request, in current thread
+connection_timings = threading.local()
+
+
+def _elapsed_ms(start):
+    return round((timeit.default_timer() - start) * 1000, 3)
+
+
+def _add_connection_timing(phase, elapsed_ms):
+    timings = getattr(connection_timings, "timings", None)
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0) + elapsed_ms
+
+
+def _resolve_addresses(host, port):
+    """ resolve host to unique addresses, in the order returned by getaddrinfo.
+    """
+    addresses = []
+    for _, _, _, _, sockaddr in socket.getaddrinfo(
+            host, port, allowed_gai_family(), socket.SOCK_STREAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+
+    return addresses
+
+
+class TimedConnectionMixin(object):
+    """ record time of DNS resolving and TCP connecting separately. host is resolved
+        first, and then resolved addresses are connected in turn by urllib3, the same
+        as what urllib3 does with unresolved host.
+    """
+    def _new_conn(self):
+        dns_host = self._dns_host
+        start = timeit.default_timer()
+        try:
+            addresses = _resolve_addresses(dns_host, self.port)
+        except socket.error:
+            # resolving error is raised by urllib3 when connecting
+            addresses = []
+        dns_ms = _elapsed_ms(start)
+        _add_connection_timing("dns", dns_ms)
+
+        start = timeit.default_timer()
+        try:
+            for address in addresses[:-1]:
+                self._dns_host = address
+                try:
+                    return super(TimedConnectionMixin, self)._new_conn()
+                except (NewConnectionError, ConnectTimeoutError):
+                    continue
+
+            if addresses:
+                self._dns_host = addresses[-1]
+            return super(TimedConnectionMixin, self)._new_conn()
+        finally:
+            # host is resolved again if connection is re-established
+            self._dns_host = dns_host
+            connect_ms = _elapsed_ms(start)
+            self._new_conn_ms = dns_ms + connect_ms
+            _add_connection_timing("connect", connect_ms)
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnectionPool.ConnectionCls):
+    """ HTTPConnection that records time of DNS resolving and establishing connection.
+    """
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnectionPool.ConnectionCls):
+    """ HTTPSConnection that records time of DNS resolving, establishing connection
+        and TLS handshake.
+    """
+    def connect(self):
+        self._new_conn_ms = 0
+        start = timeit.default_timer()
+        try:
+            super(TimedHTTPSConnection, self).connect()
+        finally:
+            _add_connection_timing("tls", max(_elapsed_ms(start) - self._new_conn_ms, 0))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """ HTTPAdapter that records timings of each request phase on response:
+        - dns: DNS resolving, only if new connection is established
+        - connect: TCP connecting, only if new connection is established
+        - tls: TLS handshake, only if new https connection is established
+        - ttfb: time to first byte, from sending request to response headers received
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        connection_timings.timings = timings = {}
+        start = timeit.default_timer()
+        try:
+            resp = super(TimedHTTPAdapter, self).send(request, **kwargs)
+        finally:
+            connection_timings.timings = None
+
+        timings["ttfb"] = round(
+            max(_elapsed_ms(start) - sum(
+                timings.get(phase, 0) for phase in ["dns", "connect", "tls"]), 0), 3)
+        resp.__dict__["_timings"] = timings
+        return resp
+
+
+def get_http_adapter(pool_connections, pool_maxsize, max_retries, pool_block, shared=False):
+    """ create HTTPAdapter with connection pool settings.
+        if shared is True, sessions with the same settings get the same adapter,
+        thus connections are kept alive and reused across sessions.
+    """
+    if not shared:
+        return TimedHTTPAdapter(pool_connections, pool_maxsize, max_retries, pool_block)
+
+    key = (pool_connections, pool_maxsize, max_retries, pool_block)
+    with shared_adapters_lock:
+        adapter = shared_adapters_mapping.get(key)
+        if adapter is None:
+            adapter = TimedHTTPAdapter(pool_connections, pool_maxsize, max_retries, pool_block)
+            shared_adapters_mapping[key] = adapter
+
+    return adapter
+
 
 class ApiResponse(Response):
 
@@ -24,6 +179,91 @@ class ApiResponse(Response):
         Response.raise_for_status(self)
 
 
+class ResponseBody(object):
+    """ lazily decoded response body, shared by meta data and ResponseObject.
+        text and json are decoded at most once, on first access.
+        only content and encoding are kept, thus connection, request and history
+        of the original response are not kept alive by meta data.
+    """
+    def __init__(self, response):
+        self.response = Response()
+        self.response.status_code = response.status_code
+        self.response.encoding = response.encoding
+        self.response._content = response.content
+        self.response._content_consumed = True
+        self._text = None
+        self._json = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.response.text
+        return self._text
+
+    def json(self):
+        """ decode response body as json, failure is also cached.
+        @return decoded json, raise ValueError if response body is not json.
+        """
+        if self._json is None:
+            try:
+                self._json = (self.response.json(), None)
+            except ValueError as ex:
+                self._json = (None, ex)
+
+        value, error = self._json
+        if error is not None:
+            raise error
+        return value
+
+    def json_or_none(self):
+        try:
+            return self.json()
+        except ValueError:
+            return None
+
+    def __repr__(self):
+        return "<ResponseBody [{}]>".format(self.response.status_code)
+
+
+def get_response_body(response):
+    """ get ResponseBody cached on response, create it on first call.
+    @param (requests.Response instance) response
+    """
+    try:
+        return response.__dict__["_response_body"]
+    except KeyError:
+        body = ResponseBody(response)
+        response.__dict__["_response_body"] = body
+        return body
+
+
+class ResponseMetaData(dict):
+    """ response meta data, text and json are lazy views of response body,
+        they are decoded on first access and then stored as normal keys.
+    """
+    LAZY_KEYS = ("text", "json")
+
+    def __missing__(self, key):
+        body = dict.get(self, "body")
+        if body is None or key not in self.LAZY_KEYS:
+            raise KeyError(key)
+
+        value = body.text if key == "text" else body.json_or_none()
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        return key in self.LAZY_KEYS and dict.get(self, "body") is not None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class HttpSession(requests.Session):
     """
     Class for performing HTTP requests and holding (session-) cookies between requests (in order
@@ -37,11 +277,72 @@ class HttpSession(requests.Session):
     part of the URL will be prepended with the HttpSession.base_url which is normally inherited
     from a HttpRunner class' host property.
     """
-    def __init__(self, base_url=None, *args, **kwargs):
+    def __init__(self, base_url=None, connection_pool=None, *args, **kwargs):
         super(HttpSession, self).__init__(*args, **kwargs)
         self.base_url = base_url if base_url else ""
+        self.shared_adapters = []
+        self.config_connection_pool(connection_pool or {})
         self.init_meta_data()
 
+    def config_connection_pool(self, connection_pool):
+        """ mount adapters with connection pool settings for http and https.
+        @param (dict) connection_pool, all keys are optional
+            {
+                "pool_connections": 10,     # count of host pools to cache
+                "pool_maxsize": 10,         # max connections kept in pool per host
+                "max_retries": 0,           # retries of failed connections
+                "pool_block": False,        # block when no free connection in pool
+                "keep_alive": True,         # reuse connections between requests
+                "shared": False             # share connection pool with other sessions in process
+            }
+        """
+        unknown_keys = set(connection_pool) - set(connection_pool_defaults)
+        if unknown_keys:
+            raise ParamsError("Invalid connection pool settings: {}".format(list(unknown_keys)))
+
+        settings = dict(connection_pool_defaults)
+        settings.update(connection_pool)
+
+        adapter = get_http_adapter(
+            int(settings["pool_connections"]),
+            int(settings["pool_maxsize"]),
+            int(settings["max_retries"]),
+            bool(settings["pool_block"]),
+            shared=bool(settings["shared"])
+        )
+        if settings["shared"]:
+            self.shared_adapters.append(adapter)
+
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+        if not settings["keep_alive"]:
+            self.headers["Connection"] = "close"
+
+    def send(self, request, **kwargs):
+        """ send prepared request, and time reading of response body as download phase.
+        """
+        stream = kwargs.get("stream", False)
+        kwargs["stream"] = True
+        response = super(HttpSession, self).send(request, **kwargs)
+
+        if not stream:
+            start = timeit.default_timer()
+            response.content
+            timings = response.__dict__.setdefault("_timings", {})
+            timings["download"] = _elapsed_ms(start)
+
+        return response
+
+    def close(self):
+        """ close session, shared connection pools are left open for other sessions.
+        """
+        for prefix, adapter in list(self.adapters.items()):
+            if adapter in self.shared_adapters:
+                self.adapters.pop(prefix)
+
+        super(HttpSession, self).close()
+
     def _build_url(self, path):
         """ prepend url with hostname unless it's already an absolute URL """
         if absolute_http_url_regexp.match(path):
@@ -61,7 +362,7 @@ class HttpSession(requests.Session):
                 "headers": {},
                 "start_timestamp": None
             },
-            "response": {
+            "response": ResponseMetaData({
                 "status_code": "N/A",
                 "headers": {},
                 "content_size": "N/A",
@@ -70,7 +371,9 @@ class HttpSession(requests.Session):
                 "encoding": None,
                 "content": None,
                 "content_type": ""
-            }
+            }),
+            # timings of request phases in ms
+            "timings": {}
         }
 
     def request(self, method, url, name=None, **kwargs):
@@ -112,17 +415,8 @@ class HttpSession(requests.Session):
         :param cert: (optional)
             if String, path to ssl client cert file (.pem). If Tuple, ('cert', 'key') pair.
         """
-        def log_print(request_response):
-            msg = "\n================== {} details ==================\n".format(request_response)
-            for key, value in self.meta_data[request_response].items():
-                msg += "{:<16} : {}\n".format(key, repr(value))
-            logger.log_debug(msg)
-
         # record original request info
-        self.meta_data["request"]["method"] = method
-        self.meta_data["request"]["url"] = url
-        self.meta_data["request"].update(kwargs)
-        self.meta_data["request"]["start_timestamp"] = time.time()
+        self._record_request(method, url, kwargs)
 
         # prepend url with hostname unless it's already an absolute URL
         url = self._build_url(url)
@@ -130,10 +424,35 @@ class HttpSession(requests.Session):
         kwargs.setdefault("timeout", 120)
         response = self._send_request_safe_mode(method, url, **kwargs)
 
+        # record response info
+        self._record_response(response, kwargs)
+        return response
+
+    def _log_print(self, request_response):
+        if not logger.log_enabled("debug"):
+            return
+
+        msg = "\n================== {} details ==================\n".format(request_response)
+        for key, value in self.meta_data[request_response].items():
+            msg += "{:<16} : {}\n".format(key, repr(value))
+        logger.log_debug(msg)
+
+    def _record_request(self, method, url, kwargs):
+        """ record original request info before sending request
+        """
+        self.meta_data["request"]["method"] = method
+        self.meta_data["request"]["url"] = url
+        self.meta_data["request"].update(kwargs)
+        self.meta_data["request"]["start_timestamp"] = time.time()
+
+    def _record_response(self, response, kwargs):
+        """ record actual request info and response info after response received
+        """
         # record the consumed time
         self.meta_data["response"]["response_time_ms"] = \
             round((time.time() - self.meta_data["request"]["start_timestamp"]) * 1000, 2)
-        self.meta_data["response"]["elapsed_ms"] = response.elapsed.microseconds / 1000.0
+        self.meta_data["response"]["elapsed_ms"] = round(response.elapsed.total_seconds() * 1000, 3)
+        self.meta_data["timings"].update(response.__dict__.get("_timings", {}))
 
         # record actual request info
         self.meta_data["request"]["url"] = (response.history and response.history[0] or response).request.url
@@ -141,7 +460,7 @@ class HttpSession(requests.Session):
         self.meta_data["request"]["body"] = response.request.body
 
         # log request details in debug mode
-        log_print("request")
+        self._log_print("request")
 
         # record response info
         self.meta_data["response"]["ok"] = response.ok
@@ -152,13 +471,11 @@ class HttpSession(requests.Session):
         self.meta_data["response"]["cookies"] = response.cookies or {}
         self.meta_data["response"]["encoding"] = response.encoding
         self.meta_data["response"]["content"] = response.content
-        self.meta_data["response"]["text"] = response.text
         self.meta_data["response"]["content_type"] = response.headers.get("Content-Type", "")
 
-        try:
-            self.meta_data["response"]["json"] = response.json()
-        except ValueError:
-            self.meta_data["response"]["json"] = None
+        # text and json are decoded lazily, when extractors, validators or report need them,
+        # meta_data["response"]["text"] and ["json"] are views of the same body.
+        self.meta_data["response"]["body"] = get_response_body(response)
 
         # get the length of the content, but if the argument stream is set to True, we take
         # the size from the content-length header, in order to not trigger fetching of the body
@@ -168,7 +485,7 @@ class HttpSession(requests.Session):
             self.meta_data["response"]["content_size"] = len(response.content or "")
 
         # log response details in debug mode
-        log_print("response")
+        self._log_print("response")
 
         try:
             response.raise_for_status()
@@ -176,25 +493,22 @@ class HttpSession(requests.Session):
             logger.log_error(u"{exception}".format(exception=str(e)))
         else:
             logger.log_info(
-                """status_code: {}, response_time(ms): {} ms, response_length: {} bytes""".format(
-                    self.meta_data["response"]["status_code"],
-                    self.meta_data["response"]["response_time_ms"],
-                    self.meta_data["response"]["content_size"]
-                )
+                """status_code: {}, response_time(ms): {} ms, response_length: {} bytes""",
+                self.meta_data["response"]["status_code"],
+                self.meta_data["response"]["response_time_ms"],
+                self.meta_data["response"]["content_size"]
             )
 
-        return response
-
     def _send_request_safe_mode(self, method, url, **kwargs):
         """
         Send a HTTP request, and catch any exception that might occur due to connection problems.
         Safe mode has been removed from requests 1.x.
         """
         try:
-            msg = "processed request:\n"
-            msg += "> {method} {url}\n".format(method=method, url=url)
-            msg += "> kwargs: {kwargs}".format(kwargs=kwargs)
-            logger.log_debug(msg)
+            logger.log_debug(
+                "processed request:\n> {method} {url}\n> kwargs: {kwargs}",
+                method=method, url=url, kwargs=kwargs
+            )
             return requests.Session.request(self, method, url, **kwargs)
         except (MissingSchema, InvalidSchema, InvalidURL):
             raise
@@ -39,6 +39,8 @@ except AttributeError:
     JSONDecodeError = ValueError
 
 if is_py2:
+    import Queue as queue
+    from StringIO import StringIO
     from urllib3.packages.ordered_dict import OrderedDict
 
     builtin_str = str
@@ -51,7 +53,9 @@ if is_py2:
     FileNotFoundError = IOError
 
 elif is_py3:
+    import queue
     from collections import OrderedDict
+    from io import StringIO
 
     builtin_str = str
     str = str
@@ -1,7 +1,13 @@
 import csv
+import hashlib
 import io
 import json
+import multiprocessing
 import os
+import pickle
+import random
+import re
+import tempfile
 
 import yaml
 from httprunner import exceptions, logger, parser, utils
@@ -11,6 +17,13 @@ from httprunner import exceptions, logger, parser, utils
 ###############################################################################
 
 
+# use libyaml C loader if available
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# safe loader rejects python and custom tags, such files are loaded again with
+# the default loader of yaml.load, thus they are loaded as before.
+yaml_full_loader = getattr(yaml, "FullLoader", yaml.Loader)
+
+
 def _check_format(file_path, content):
     """ check testcase format if valid
     """
@@ -32,7 +45,13 @@ def load_yaml_file(yaml_file):
     """ load yaml file and check file content format
     """
     with io.open(yaml_file, 'r', encoding='utf-8') as stream:
-        yaml_content = yaml.load(stream)
+        try:
+            yaml_content = yaml.load(stream, Loader=yaml_loader)
+        except yaml.constructor.ConstructorError:
+            logger.log_debug("load yaml file with tags: {}", yaml_file)
+            stream.seek(0)
+            yaml_content = yaml.load(stream, Loader=yaml_full_loader)
+
         _check_format(yaml_file, yaml_content)
         return yaml_content
 
@@ -70,14 +89,185 @@ def load_csv_file(csv_file):
             {'username': 'test3', 'password': '333333'}
         ]
     """
-    csv_content_list = []
+    return list(iter_csv_file(csv_file))
 
+
+def iter_csv_file(csv_file):
+    """ load csv file rows one by one, each row is in dict format.
+    """
     with io.open(csv_file, encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
-            csv_content_list.append(row)
+            yield row
+
+
+class CSVParameterSource(object):
+    """ parameters streamed from csv file, rows are read on demand while iterating,
+        thus huge csv file is never loaded into memory at once.
+        csv file is read again on each iteration, so it can be iterated many times.
+    @param (str) csv_file: csv file path
+    @param (str) fetch_method: Sequential, Random or Sharded
+        - Sequential: rows in file order
+        - Random: rows shuffled with a buffer of shuffle_buffer_size rows,
+            it is a full shuffle if rows count does not exceed buffer size.
+            each iteration is seeded with the same seed, thus rows are in the
+            same random order every time the source is iterated.
+        - Sharded: only rows of current worker in file order, row N belongs to
+            worker N % shard_count.
+    @param (int) shard_index: index of current worker, default to
+        environment variable HTTPRUNNER_SHARD_INDEX, or 0.
+    @param (int) shard_count: count of workers, default to
+        environment variable HTTPRUNNER_SHARD_COUNT, or 1.
+    @param seed: random seed of Random fetch method, default to a random one.
+    """
+    shuffle_buffer_size = 10000
+
+    def __init__(self, csv_file, fetch_method="Sequential", shard_index=None,
+                 shard_count=None, seed=None):
+        self.csv_file = csv_file
+        self.fetch_method = fetch_method.lower()
+        if self.fetch_method not in ["sequential", "random", "sharded"]:
+            raise exceptions.ParamsError(
+                "Invalid fetch method: {}, should be Sequential, Random or Sharded.".format(fetch_method))
+
+        if shard_index is None:
+            shard_index = os.environ.get("HTTPRUNNER_SHARD_INDEX", 0)
+        if shard_count is None:
+            shard_count = os.environ.get("HTTPRUNNER_SHARD_COUNT", 1)
+
+        self.shard_index = int(shard_index)
+        self.shard_count = int(shard_count)
+        if self.shard_count < 1 or not 0 <= self.shard_index < self.shard_count:
+            raise exceptions.ParamsError(
+                "Invalid shard: {}/{}".format(self.shard_index, self.shard_count))
+
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+
+    def __iter__(self):
+        rows = iter_csv_file(self.csv_file)
+        if self.fetch_method == "random":
+            return self._iter_shuffled(rows)
+        elif self.fetch_method == "sharded":
+            return self._iter_sharded(rows)
+        else:
+            return rows
+
+    def _iter_shuffled(self, rows):
+        rng = random.Random(self.seed)
+        buffer = []
+        for row in rows:
+            if len(buffer) < self.shuffle_buffer_size:
+                buffer.append(row)
+                continue
+
+            # emit random row in buffer and replace it with the new one
+            index = rng.randrange(len(buffer))
+            yield buffer[index]
+            buffer[index] = row
+
+        rng.shuffle(buffer)
+        for row in buffer:
+            yield row
+
+    def _iter_sharded(self, rows):
+        for index, row in enumerate(rows):
+            if index % self.shard_count == self.shard_index:
+                yield row
+
+
+###############################################################################
+##   persistent cache of parsed files
+###############################################################################
+
+
+# parsed yaml/json files are cached in this directory if specified
+file_cache_dir = None
+
+
+def set_file_cache_dir(cache_dir):
+    """ set directory of persistent file cache, set None to disable file cache.
+        cached content is run as testcases, thus directory should be writable only
+        by trusted users, it is created accessible only by current user.
+    """
+    global file_cache_dir
+    file_cache_dir = cache_dir
+
+    if cache_dir and not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir, 0o700)
+
+
+def _get_file_hash(file_path):
+    with io.open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
 
-    return csv_content_list
+def _get_file_cache_path(file_path):
+    path_hash = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(file_cache_dir, "{}.json".format(path_hash))
+
+
+def _dump_file_cache(cache_path, cache_entry):
+    """ dump cache entry as json to temp file and then rename, in case of concurrent loading.
+        entry is not cached if json could not keep its content as it is, e.g. tuple,
+        date or non-string key loaded from yaml.
+    """
+    try:
+        cache_content = json.dumps(cache_entry)
+    except (TypeError, ValueError):
+        return
+
+    if json.loads(cache_content) != cache_entry:
+        return
+
+    fd, temp_path = tempfile.mkstemp(dir=file_cache_dir)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(cache_content)
+        getattr(os, "replace", os.rename)(temp_path, cache_path)
+    except (IOError, OSError):
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+
+def load_file_with_cache(file_path, load_func):
+    """ load file with load_func, parsed content is cached in file_cache_dir.
+        cache entry is keyed by file path, and validated with file size, mtime
+        and content hash, thus only changed files will be parsed again.
+    @param (str) file_path: yaml/json file path
+    @param (function) load_func: function to parse file, e.g. load_yaml_file
+    """
+    stat = os.stat(file_path)
+    cache_path = _get_file_cache_path(file_path)
+
+    cache_entry = None
+    try:
+        with io.open(cache_path, encoding='utf-8') as f:
+            cache_entry = json.load(f)
+    except Exception:
+        # cache not exist or broken
+        pass
+
+    if cache_entry and cache_entry["size"] == stat.st_size \
+            and cache_entry["mtime"] == stat.st_mtime:
+        return cache_entry["content"]
+
+    file_hash = _get_file_hash(file_path)
+    if cache_entry and cache_entry["hash"] == file_hash:
+        # file touched but not changed
+        content = cache_entry["content"]
+    else:
+        logger.log_debug("parse file and update cache: {}", file_path)
+        content = load_func(file_path)
+
+    _dump_file_cache(cache_path, {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "hash": file_hash,
+        "content": content
+    })
+    return content
 
 
 def load_file(file_path):
@@ -86,8 +276,12 @@ def load_file(file_path):
 
     file_suffix = os.path.splitext(file_path)[1].lower()
     if file_suffix == '.json':
+        if file_cache_dir:
+            return load_file_with_cache(file_path, load_json_file)
         return load_json_file(file_path)
     elif file_suffix in ['.yaml', '.yml']:
+        if file_cache_dir:
+            return load_file_with_cache(file_path, load_yaml_file)
         return load_yaml_file(file_path)
     elif file_suffix == ".csv":
         return load_csv_file(file_path)
@@ -98,6 +292,90 @@ def load_file(file_path):
         return []
 
 
+# min number of files to be parsed in parallel
+parallel_parse_threshold = 50
+# number of processes to parse files, default is cpu count
+parse_processes = None
+
+
+def _load_file_safely(file_path):
+    """ load file and return (content, error) instead of raising exception,
+        error is raised by caller, thus file is not parsed again on failure.
+    """
+    try:
+        return load_file(file_path), None
+    except Exception as ex:
+        return None, ex
+
+
+def _load_file_in_process(args):
+    """ worker of process pool, file cache directory is passed in explicitly
+        since module state may not be inherited in spawned process.
+        error that can not be pickled is sent back rebuilt with its text.
+    """
+    global file_cache_dir
+    file_path, file_cache_dir = args
+    content, error = _load_file_safely(file_path)
+    if error is not None:
+        error = _get_picklable_error(error)
+
+    return content, error
+
+
+def _get_picklable_error(error):
+    """ get error that could be sent back from worker process, error of the same
+        type is rebuilt with its text if attributes of error can not be pickled,
+        thus caller could still catch it by type.
+    """
+    error_builders = [
+        lambda: error,
+        lambda: type(error)(str(error)),
+        lambda: Exception("{}: {}".format(type(error).__name__, error))
+    ]
+    for build_error in error_builders:
+        try:
+            picklable_error = build_error()
+            pickle.loads(pickle.dumps(picklable_error))
+            return picklable_error
+        except Exception:
+            continue
+
+
+def load_files(file_paths):
+    """ parse files in parallel with process pool if there are lots of files.
+    @param (list) file_paths
+    @return (list) list of (content, error), in the same order as file_paths
+    """
+    if len(file_paths) < parallel_parse_threshold:
+        return [_load_file_safely(file_path) for file_path in file_paths]
+
+    processes = parse_processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(
+            _load_file_in_process,
+            [(file_path, file_cache_dir) for file_path in file_paths],
+            chunksize=max(1, len(file_paths) // (processes * 4))
+        )
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _unique_paths(paths):
+    """ remove duplicated paths, order of list is kept, while set is sorted.
+    """
+    if isinstance(paths, set):
+        return sorted(paths)
+
+    unique_paths = []
+    for path in paths:
+        if path not in unique_paths:
+            unique_paths.append(path)
+
+    return unique_paths
+
+
 def load_folder_files(folder_path, recursive=True):
     """ load folder path, return all files in list format.
     @param
@@ -106,7 +384,7 @@ def load_folder_files(folder_path, recursive=True):
     """
     if isinstance(folder_path, (list, set)):
         files = []
-        for path in set(folder_path):
+        for path in _unique_paths(folder_path):
             files.extend(load_folder_files(path, recursive))
 
         return files
@@ -165,31 +443,108 @@ overall_def_dict = {
     "api": {},
     "suite": {}
 }
+# definition name => file path, built by scanning files without parsing
+overall_def_index = {
+    "api": {},
+    "suite": {}
+}
+# file path => (mtime, size, scanned definition names)
+def_files_scan_cache_mapping = {}
 testcases_cache_mapping = {}
 
+# matches yaml `def: api_login($token)` and json `"def": "api_login"`, args are optional.
+# def key should be at line start or follow `{`/`,`, thus `def:` in comments is skipped.
+def_name_regexp_compile = re.compile(
+    r"""(?:^|[{,])[ \t-]*["']?def["']?[ \t]*:[ \t]*["']?([\w_]+)""",
+    re.M
+)
+
 
 def load_test_dependencies():
-    """ load all api and suite definitions.
+    """ index all api and suite definitions by name.
         default api folder is "$CWD/tests/api/".
         default suite folder is "$CWD/tests/suite/".
+        definition files are only scanned for def names here, and each file is
+        parsed when one of its definitions is referenced for the first time.
+        index and parsed definitions are kept across calls in the same process,
+        files are scanned again only when modified.
+    """
+    # api definitions are indexed first, suites may reference them
+    for ref_type in ["api", "suite"]:
+        def_index = {}
+        changed_files = set()
+
+        def_folder = os.path.join(os.getcwd(), "tests", ref_type)
+        for def_file in load_folder_files(def_folder):
+            names, changed = _scan_definition_file(def_file, ref_type)
+            if changed:
+                changed_files.add(def_file)
+
+            for name in names:
+                if name in def_index:
+                    logger.log_warning("{} definition duplicated: {}".format(ref_type, name))
+                def_index[name] = def_file
+
+        # drop parsed definitions whose file has been modified, moved or removed
+        for name, def_file in overall_def_index[ref_type].items():
+            if def_index.get(name) != def_file or def_file in changed_files:
+                overall_def_dict[ref_type].pop(name, None)
+
+        overall_def_index[ref_type] = def_index
+
+
+def _scan_definition_file(file_path, ref_type):
+    """ scan def names in api or suite file without parsing it.
+        file that def names could not be scanned from is parsed directly.
+    @return (tuple) scanned def names, and whether file is modified since last scanning
+    """
+    stat = os.stat(file_path)
+    cached = def_files_scan_cache_mapping.get(file_path)
+    if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+        return cached[2], False
+
+    with io.open(file_path, encoding='utf-8') as f:
+        names = def_name_regexp_compile.findall(f.read())
+
+    if not names:
+        names = _load_definition_file(file_path, ref_type)
+
+    def_files_scan_cache_mapping[file_path] = (stat.st_mtime, stat.st_size, names)
+    return names, cached is not None
+
+
+def _is_definition_owner(file_path, name, ref_type):
+    """ definition with duplicated names is only stored from the file it is indexed to,
+        thus the result does not depend on which file is parsed first.
     """
-    # TODO: cache api and suite loading
-    # load api definitions
-    api_def_folder = os.path.join(os.getcwd(), "tests", "api")
-    for test_file in load_folder_files(api_def_folder):
-        load_api_file(test_file)
-
-    # load suite definitions
-    suite_def_folder = os.path.join(os.getcwd(), "tests", "suite")
-    for suite_file in load_folder_files(suite_def_folder):
-        suite = load_test_file(suite_file)
-        if "def" not in suite["config"]:
-            raise exceptions.ParamsError("def missed in suite file: {}!".format(suite_file))
-
-        call_func = suite["config"]["def"]
-        function_meta = parser.parse_function(call_func)
-        suite["function_meta"] = function_meta
+    owner = overall_def_index[ref_type].get(name)
+    return owner is None or owner == file_path
+
+
+def _load_definition_file(file_path, ref_type):
+    """ parse api or suite file and store definitions in overall_def_dict.
+    @return (list) loaded def names
+    """
+    if ref_type == "api":
+        return load_api_file(file_path)
+    else:
+        return load_suite_file(file_path)
+
+
+def load_suite_file(file_path):
+    """ load suite definition from file and store in overall_def_dict["suite"]
+    @return (list) loaded suite def name
+    """
+    suite = load_test_file(file_path)
+    if "def" not in suite["config"]:
+        raise exceptions.ParamsError("def missed in suite file: {}!".format(file_path))
+
+    call_func = suite["config"]["def"]
+    function_meta = parser.parse_function(call_func)
+    suite["function_meta"] = function_meta
+    if _is_definition_owner(file_path, function_meta["func_name"], "suite"):
         overall_def_dict["suite"][function_meta["func_name"]] = suite
+    return [function_meta["func_name"]]
 
 
 def load_api_file(file_path):
@@ -211,11 +566,14 @@ def load_api_file(file_path):
                     }
                 }
             ]
+    @return (list) loaded api def names
     """
     api_items = load_file(file_path)
     if not isinstance(api_items, list):
         raise exceptions.FileFormatError("API format error: {}".format(file_path))
 
+    func_names = []
+
     for api_item in api_items:
         if not isinstance(api_item, dict) or len(api_item) != 1:
             raise exceptions.FileFormatError("API format error: {}".format(file_path))
@@ -232,11 +590,16 @@ def load_api_file(file_path):
             logger.log_warning("API definition duplicated: {}".format(func_name))
 
         api_dict["function_meta"] = function_meta
-        overall_def_dict["api"][func_name] = api_dict
+        func_names.append(func_name)
+        if _is_definition_owner(file_path, func_name, "api"):
+            overall_def_dict["api"][func_name] = api_dict
+
+    return func_names
 
 
-def load_test_file(file_path):
+def load_test_file(file_path, content=None):
     """ load testcase file or testsuite file
+    @param content: parsed file content, file will be loaded if not specified
     @param file_path: absolute valid file path
         file_path should be in format below:
             [
@@ -274,7 +637,10 @@ def load_test_file(file_path):
         },
         "testcases": []     # TODO: rename to tests
     }
-    for item in load_file(file_path):
+    if content is None:
+        content = load_file(file_path)
+
+    for item in content:
         if not isinstance(item, dict) or len(item) != 1:
             raise exceptions.FileFormatError("Testcase format error: {}".format(file_path))
 
@@ -285,6 +651,9 @@ def load_test_file(file_path):
         if key == "config":
             testset["config"].update(test_block)
 
+        elif key == "performance":
+            testset["performance"] = test_block
+
         elif key == "test":
             if "api" in test_block:
                 ref_call = test_block["api"]
@@ -300,7 +669,7 @@ def load_test_file(file_path):
 
         else:
             logger.log_warning(
-                "unexpected block key: {}. block key should only be 'config' or 'test'.".format(key)
+                "unexpected block key: {}. block key should only be 'config', 'test' or 'performance'.".format(key)
             )
 
     return testset
@@ -334,6 +703,27 @@ def _get_block_by_name(ref_call, ref_type):
     return block
 
 
+def _load_definition_from_folder(name, ref_type):
+    """ parse all api or suite files to find definition, the last file defining it wins,
+        and it is indexed as definition owner.
+    @return definition block, or None if not found
+    """
+    def_index = overall_def_index.setdefault(ref_type, {})
+    def_index.pop(name, None)
+    owner = None
+
+    def_folder = os.path.join(os.getcwd(), "tests", ref_type)
+    for def_file in load_folder_files(def_folder):
+        if name in _load_definition_file(def_file, ref_type):
+            owner = def_file
+
+    if owner is None:
+        return None
+
+    def_index[name] = owner
+    return overall_def_dict[ref_type].get(name)
+
+
 def _get_test_definition(name, ref_type):
     """ get expected api or suite.
     @params:
@@ -344,6 +734,16 @@ def _get_test_definition(name, ref_type):
     """
     block = overall_def_dict.get(ref_type, {}).get(name)
 
+    if not block and name in overall_def_index.get(ref_type, {}):
+        # parse indexed definition file on first reference
+        _load_definition_file(overall_def_index[ref_type][name], ref_type)
+        block = overall_def_dict[ref_type].get(name)
+
+    if not block:
+        # index is only a hint, e.g. def name scanned from other text,
+        # look for definition in all definition files then.
+        block = _load_definition_from_folder(name, ref_type)
+
     if not block:
         err_msg = "{} not found!".format(name)
         if ref_type == "api":
@@ -369,9 +769,25 @@ def load_testcases(path):
     """
     if isinstance(path, (list, set)):
         testcases_list = []
+        paths = [
+            file_path if os.path.isabs(file_path) else os.path.join(os.getcwd(), file_path)
+            for file_path in _unique_paths(path)
+        ]
+
+        # parse files which are not loaded yet, maybe in parallel
+        files_to_parse = [
+            file_path
+            for file_path in paths
+            if file_path not in testcases_cache_mapping and os.path.isfile(file_path)
+        ]
+        parsed_files_mapping = dict(zip(files_to_parse, load_files(files_to_parse)))
+
+        for file_path in paths:
+            if file_path in parsed_files_mapping:
+                testcases = _load_testcases_from_file(file_path, parsed_files_mapping[file_path])
+            else:
+                testcases = load_testcases(file_path)
 
-        for file_path in set(path):
-            testcases = load_testcases(file_path)
             if not testcases:
                 continue
             testcases_list.extend(testcases)
@@ -389,14 +805,7 @@ def load_testcases(path):
         testcases_list = load_testcases(files_list)
 
     elif os.path.isfile(path):
-        try:
-            testcase = load_test_file(path)
-            if testcase["testcases"]:
-                testcases_list = [testcase]
-            else:
-                testcases_list = []
-        except exceptions.FileFormatError:
-            testcases_list = []
+        testcases_list = _load_testcases_from_file(path)
 
     else:
         err_msg = "file not found: {}".format(path)
@@ -405,3 +814,25 @@ def load_testcases(path):
 
     testcases_cache_mapping[path] = testcases_list
     return testcases_list
+
+
+def _load_testcases_from_file(file_path, parsed=None):
+    """ load testcases from file, and cache loaded testcases.
+    @param (tuple) parsed: (content, error) returned by load_files, error is raised
+        directly, file will be loaded if not specified.
+    """
+    content, error = parsed or (None, None)
+    try:
+        if error is not None:
+            raise error
+
+        testcase = load_test_file(file_path, content)
+        if testcase["testcases"]:
+            testcases_list = [testcase]
+        else:
+            testcases_list = []
+    except exceptions.FileFormatError:
+        testcases_list = []
+
+    testcases_cache_mapping[file_path] = testcases_list
+    return testcases_list
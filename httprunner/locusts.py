@@ -58,7 +58,12 @@ def start_master(sys_argv):
     sys.argv = sys_argv
     main()
 
-def start_slave(sys_argv):
+def start_slave(sys_argv, shard_index=None, shard_count=None):
+    if shard_count:
+        # each slave fetches its own shard of Sharded csv parameters
+        os.environ["HTTPRUNNER_SHARD_INDEX"] = str(shard_index)
+        os.environ["HTTPRUNNER_SHARD_COUNT"] = str(shard_count)
+
     if "--slave" not in sys_argv:
         sys_argv.extend(["--slave"])
 
@@ -69,8 +74,11 @@ def run_locusts_with_processes(sys_argv, processes_count):
     processes = []
     manager = multiprocessing.Manager()
 
-    for _ in range(processes_count):
-        p_slave = multiprocessing.Process(target=start_slave, args=(sys_argv,))
+    for index in range(processes_count):
+        p_slave = multiprocessing.Process(
+            target=start_slave,
+            args=(sys_argv, index, processes_count)
+        )
         p_slave.daemon = True
         p_slave.start()
         processes.append(p_slave)
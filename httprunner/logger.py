@@ -2,6 +2,7 @@
 
 import logging
 import sys
+import threading
 
 from colorama import Back, Fore, Style, init
 from colorlog import ColoredFormatter
@@ -16,6 +17,9 @@ log_colors_config = {
     'CRITICAL': 'red',
 }
 
+# logs of thread are buffered in records list instead of emitted if it is set
+log_buffer = threading.local()
+
 def setup_logger(log_level, log_file=None):
     """setup root logger with ColoredFormatter."""
     level = getattr(logging, log_level.upper(), None)
@@ -52,16 +56,58 @@ def color_print(msg, color="WHITE"):
     fore_color = getattr(Fore, color.upper())
     print(fore_color + msg)
 
+def log_enabled(level):
+    """ check if log level is enabled, in order to skip building expensive log messages.
+    """
+    return logging.root.isEnabledFor(getattr(logging, level.upper()))
+
 def log_with_color(level):
-    """ log with color by different level
+    """ log with color by different level.
+        level is checked before formatting and coloring, and if args or kwargs
+        are specified, text is formatted with them only when level is enabled.
+    e.g.
+        log_debug("request kwargs: {}", kwargs)
     """
-    def wrapper(text):
-        color = log_colors_config[level.upper()]
+    level_no = getattr(logging, level.upper())
+    color = log_colors_config[level.upper()]
+
+    def wrapper(text, *args, **kwargs):
+        if not logging.root.isEnabledFor(level_no):
+            return
+
+        if args or kwargs:
+            text = text.format(*args, **kwargs)
+
+        records = getattr(log_buffer, "records", None)
+        if records is not None:
+            records.append((level_no, coloring(text, color)))
+            return
+
         getattr(logging, level.lower())(coloring(text, color))
 
     return wrapper
 
 
+def start_log_buffer():
+    """ buffer logs of current thread, e.g. worker running testset concurrently.
+    """
+    log_buffer.records = []
+
+def stop_log_buffer():
+    """ stop buffering logs of current thread.
+    @return (list) buffered log records, each in (level, text)
+    """
+    records = getattr(log_buffer, "records", None) or []
+    log_buffer.records = None
+    return records
+
+def emit_log_records(records):
+    """ emit log records buffered by worker, in current thread.
+    """
+    for level_no, text in records:
+        logging.log(level_no, text)
+
+
 log_debug = log_with_color("debug")
 log_info = log_with_color("info")
 log_warning = log_with_color("warning")
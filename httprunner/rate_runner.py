@@ -0,0 +1,270 @@
+# encoding: utf-8
+
+"""
+httprunner.rate_runner
+~~~~~~~~~~~~~~~~~~~~~~
+
+This module replays testsets at a constant arrival rate for a fixed duration.
+Arrivals are scheduled by wall clock regardless of whether former arrivals have
+finished (open-loop), and run by a bounded pool of worker threads. Latency is
+measured from the scheduled time of each arrival instead of the actual send time,
+thus time waited in backlog when workers are saturated is not omitted.
+"""
+
+import copy
+import threading
+import time
+import timeit
+from unittest.case import SkipTest
+
+from httprunner import exceptions, loader, logger
+from httprunner.compat import OrderedDict, numeric_types, queue
+from httprunner.report import (LatencyHistogram, get_platform, get_url_group,
+                               merge_latency, summarize_latency)
+from httprunner.task import TestSuite, load_testsets
+
+
+class RateRunner(object):
+
+    def __init__(self, rate, duration, concurrency=100, max_backlog=None,
+                 dot_env_path=None):
+        """ initialize constant rate runner
+        @param (float) rate: arrivals per second, each arrival replays one testset,
+            testsets are replayed in turn if there are several.
+        @param (float) duration: seconds to schedule arrivals
+        @param (int) concurrency: number of worker threads, max arrivals run at the same time.
+        @param (int) max_backlog: max arrivals waiting for free worker, arrivals beyond
+            are dropped and counted as failures, default is 10 times of concurrency.
+        @param (str) dot_env_path: .env file path
+        """
+        if rate <= 0 or duration <= 0:
+            raise exceptions.ParamsError(
+                "rate and duration should be positive: {}, {}".format(rate, duration))
+
+        loader.load_dot_env_file(dot_env_path)
+        self.rate = float(rate)
+        self.duration = float(duration)
+        self.concurrency = max(int(concurrency), 1)
+        self.max_backlog = max_backlog or self.concurrency * 10
+        self.lock = threading.Lock()
+
+    def _init_results(self, testsets):
+        self.testset_results = [
+            {
+                "name": testset.get("config", {}).get("name"),
+                "stat": {"scheduled": 0, "completed": 0, "failures": 0, "dropped": 0},
+                "latency": {"testcases": OrderedDict(), "groups": OrderedDict()},
+                "scenario": LatencyHistogram()
+            }
+            for testset in testsets
+        ]
+        # time between scheduled time and start time of arrivals
+        self.lag = LatencyHistogram()
+
+    def _record_latency(self, testset_result, testcase_dict, latency_ms):
+        testcase_name = testcase_dict.get("name")
+        with self.lock:
+            for kind, name in [("testcases", testcase_name), ("groups", get_url_group(testcase_dict))]:
+                histograms = testset_result["latency"][kind]
+                histograms.setdefault(name, LatencyHistogram()).record(latency_ms)
+
+    def _run_arrival(self, test_suite, testset_result, scheduled):
+        """ replay testset once, latency of each test is measured from the time it
+            was intended to be sent, which is scheduled time for the first test, and
+            finished time of former test for others.
+        """
+        intended = scheduled
+        with self.lock:
+            self.lag.record((timeit.default_timer() - scheduled) * 1000)
+
+        success = True
+        try:
+            for test in test_suite:
+                try:
+                    test.runTest()
+                except SkipTest:
+                    continue
+                finally:
+                    finished = timeit.default_timer()
+                    meta_data = getattr(test, "meta_data", {})
+                    response_time_ms = meta_data.get("response", {}).get("response_time_ms")
+                    if isinstance(response_time_ms, numeric_types):
+                        # request has been sent
+                        self._record_latency(
+                            testset_result,
+                            test.testcase_dict,
+                            (finished - intended) * 1000
+                        )
+                    intended = finished
+
+                # reuse http session of former arrivals in this worker
+                test_suite.http_client_session = test_suite.http_client_session \
+                    or test.test_runner.http_client_session
+
+        except (Exception, exceptions.MyBaseError) as ex:
+            success = False
+            logger.log_warning("arrival of {} failed: {}".format(testset_result["name"], ex))
+
+        with self.lock:
+            testset_result["scenario"].record((timeit.default_timer() - scheduled) * 1000)
+            testset_result["stat"]["completed"] += 1
+            if not success:
+                testset_result["stat"]["failures"] += 1
+
+    def _work(self, arrivals, testsets, mapping):
+        # each worker has its own suites and testset configs,
+        # thus runners, http sessions and configs are not shared
+        test_suite_list = [
+            TestSuite(
+                dict(testset, config=copy.deepcopy(testset.get("config", {}))),
+                mapping,
+                lazy=True
+            )
+            for testset in testsets
+        ]
+        while True:
+            arrival = arrivals.get()
+            if arrival is None:
+                break
+
+            testset_index, scheduled = arrival
+            self._run_arrival(
+                test_suite_list[testset_index],
+                self.testset_results[testset_index],
+                scheduled
+            )
+
+    def run(self, path_or_testsets, mapping=None):
+        """ replay testsets at constant rate and summarize latency.
+        @param path_or_testsets: testset file path, folder path or testsets, the same as HttpRunner.run
+        @param (dict) mapping: variables mapping, it will override variables in config block
+        """
+        testsets = load_testsets(path_or_testsets)
+        mapping = mapping or {}
+        # performance budgets are parsed before run, and evaluated with latency after run
+        self.test_suite_list = [
+            TestSuite(testset, mapping, lazy=True)
+            for testset in testsets
+        ]
+        self._init_results(testsets)
+
+        arrivals = queue.Queue(self.max_backlog)
+        workers = [
+            threading.Thread(target=self._work, args=(arrivals, testsets, mapping))
+            for _ in range(self.concurrency)
+        ]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+
+        start_at = time.time()
+        start = timeit.default_timer()
+        for index in range(int(self.rate * self.duration)):
+            scheduled = start + index / self.rate
+            delay = scheduled - timeit.default_timer()
+            if delay > 0:
+                time.sleep(delay)
+
+            testset_index = index % len(testsets)
+            testset_result = self.testset_results[testset_index]
+            testset_result["stat"]["scheduled"] += 1
+            try:
+                arrivals.put_nowait((testset_index, scheduled))
+            except queue.Full:
+                with self.lock:
+                    testset_result["stat"]["dropped"] += 1
+
+        for _ in workers:
+            arrivals.put(None)
+        for worker in workers:
+            worker.join()
+
+        # run may end before scheduled duration, since the last arrival is scheduled
+        # one interval before the end
+        duration = max(timeit.default_timer() - start, self.duration)
+        self.summary = self._get_summary(start_at, duration)
+        return self
+
+    def _get_summary(self, start_at, duration):
+        summary = {
+            "success": True,
+            "stat": {"scheduled": 0, "completed": 0, "failures": 0, "dropped": 0},
+            "time": {
+                "start_at": start_at,
+                "duration": duration
+            },
+            "rate": {
+                "target": self.rate,
+                "actual": None,
+                "concurrency": self.concurrency,
+                "lag": self.lag.summary()
+            },
+            "platform": get_platform(),
+            "details": []
+        }
+
+        for test_suite, testset_result in zip(self.test_suite_list, self.testset_results):
+            stat = testset_result["stat"]
+            for key in stat:
+                summary["stat"][key] += stat[key]
+
+            test_suite_summary = {
+                "name": testset_result["name"],
+                "success": not stat["failures"] and not stat["dropped"],
+                "stat": stat,
+                "latency": summarize_latency(testset_result["latency"], duration),
+                "scenario": testset_result["scenario"].summary(duration)
+            }
+            performance = test_suite.check_performance(test_suite_summary["latency"])
+            if performance:
+                test_suite_summary["performance"] = performance
+                test_suite_summary["success"] &= performance["success"]
+
+            summary["success"] &= test_suite_summary["success"]
+            summary["details"].append(test_suite_summary)
+
+        summary["rate"]["actual"] = round(summary["stat"]["completed"] / duration, 3)
+        summary["latency"] = merge_latency(
+            [test_suite_summary["latency"] for test_suite_summary in summary["details"]],
+            duration
+        )
+        return summary
+
+
+def print_rate_summary(summary):
+    """ print latency of constant rate run as table.
+    """
+    stat = summary["stat"]
+    rate = summary["rate"]
+    lines = [
+        "",
+        "rate: {} /s (actual {} /s), concurrency: {}, duration: {:.3f}s".format(
+            rate["target"], rate["actual"], rate["concurrency"], summary["time"]["duration"]),
+        "scheduled: {scheduled}, completed: {completed}, failures: {failures}, dropped: {dropped}".format(**stat),
+        "start lag(ms): p50 {p50}, p99 {p99}, max {max}".format(**rate["lag"]),
+        "{:<40} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "name", "count", "p50(ms)", "p90(ms)", "p99(ms)", "max(ms)")
+    ]
+    for kind in ["testcases", "groups"]:
+        for name, latency_summary in summary["latency"][kind].items():
+            lines.append("{:<40} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+                name,
+                latency_summary["count"],
+                latency_summary["p50"],
+                latency_summary["p90"],
+                latency_summary["p99"],
+                latency_summary["max"]
+            ))
+
+    for test_suite_summary in summary["details"]:
+        for budget in test_suite_summary.get("performance", {}).get("budgets", []):
+            lines.append("budget {}: {} {} {} {}, actual {}".format(
+                "pass" if budget["success"] else "fail",
+                budget["name"],
+                budget["metric"],
+                ">=" if budget["metric"] == "min_throughput" else "<=",
+                budget["budget"],
+                budget["actual"]
+            ))
+
+    logger.color_print("\n".join(lines), "GREEN" if summary["success"] else "RED")
@@ -1,8 +1,10 @@
 # encoding: utf-8
 
 import io
+import math
 import os
 import platform
+import tempfile
 import time
 import unittest
 from base64 import b64encode
@@ -12,6 +14,7 @@ from datetime import datetime
 from httprunner import logger
 from httprunner.__about__ import __version__
 from httprunner.compat import basestring, bytes, json, numeric_types
+from colorama import Fore, Style
 from jinja2 import Template, escape
 from requests.structures import CaseInsensitiveDict
 
@@ -47,15 +50,21 @@ def get_summary(result):
         - summary["stat"]["expectedFailures"] \
         - summary["stat"]["unexpectedSuccesses"]
 
-    if getattr(result, "records", None):
+    if getattr(result, "records", None) or getattr(result, "records_path", None):
         summary["time"] = {
             'start_at': result.start_at,
             'duration': result.duration
         }
         summary["records"] = result.records
+        summary["timings"] = getattr(result, "timings", {})
+        if hasattr(result, "latency"):
+            summary["latency"] = summarize_latency(result.latency, result.duration)
     else:
         summary["records"] = []
 
+    if getattr(result, "records_path", None):
+        summary["records_path"] = result.records_path
+
     return summary
 
 def render_html_report(summary, html_report_name=None, html_report_template=None):
@@ -74,7 +83,7 @@ def render_html_report(summary, html_report_name=None, html_report_template=None
         logger.log_info("render with html report template: {}".format(html_report_template))
 
     logger.log_info("Start to render Html report ...")
-    logger.log_debug("render data: {}".format(summary))
+    logger.log_debug("render stat: {}".format(summary["stat"]))
 
     report_dir_path = os.path.join(os.getcwd(), "reports")
     start_at_timestamp = int(summary["time"]["start_at"])
@@ -90,23 +99,32 @@ def render_html_report(summary, html_report_name=None, html_report_template=None
     if not os.path.isdir(report_dir_path):
         os.makedirs(report_dir_path)
 
+    # records are stringified and rendered one by one while streaming template,
+    # records dumped to file are read line by line instead of loading at once.
+    render_summary = dict(summary)
+    render_summary["details"] = []
     for index, suite_summary in enumerate(summary["details"]):
         if not suite_summary.get("name"):
             suite_summary["name"] = "test suite {}".format(index)
-        for record in suite_summary.get("records"):
-            meta_data = record['meta_data']
-            stringify_data(meta_data, 'request')
-            stringify_data(meta_data, 'response')
+
+        render_suite_summary = dict(suite_summary)
+        render_suite_summary["records"] = RecordsStream(
+            suite_summary.get("records"),
+            suite_summary.get("records_path")
+        )
+        render_summary["details"].append(render_suite_summary)
 
     with io.open(html_report_template, "r", encoding='utf-8') as fp_r:
         template_content = fp_r.read()
-        report_path = os.path.join(report_dir_path, html_report_name)
-        with io.open(report_path, 'w', encoding='utf-8') as fp_w:
-            rendered_content = Template(
-                template_content,
-                extensions=["jinja2.ext.loopcontrols"]
-            ).render(summary)
-            fp_w.write(rendered_content)
+
+    report_path = os.path.join(report_dir_path, html_report_name)
+    with io.open(report_path, 'w', encoding='utf-8') as fp_w:
+        template_stream = Template(
+            template_content,
+            extensions=["jinja2.ext.loopcontrols"]
+        ).stream(render_summary)
+        template_stream.enable_buffering(100)
+        template_stream.dump(fp_w)
 
     logger.log_info("Generated Html report: {}".format(report_path))
 
@@ -151,60 +169,443 @@ def stringify_data(meta_data, request_or_response):
 
         meta_data[request_or_response][key] = value
 
+def iter_records(records_path):
+    """ iterate records dumped by HtmlTestResult, one json record per line.
+    """
+    with io.open(records_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def load_records(records_path):
+    """ load all records dumped by HtmlTestResult.
+    """
+    return list(iter_records(records_path))
+
+class RecordsStream(object):
+    """ iterable records of one test suite for rendering report.
+        in-memory records are stringified when iterated, while dumped records
+        have been stringified and are read from records file line by line.
+        records are only streamed from file when HtmlTestResult is initialized
+        with records_dir, which hrun command always does.
+    """
+    def __init__(self, records=None, records_path=None):
+        self.records = records or []
+        self.records_path = records_path
+
+    def __iter__(self):
+        if self.records_path:
+            for record in iter_records(self.records_path):
+                yield record
+            return
+
+        for record in self.records:
+            stringify_record(record)
+            yield record
+
+def stringify_record(record):
+    meta_data = record["meta_data"]
+    if "request" in meta_data:
+        resolve_response_body(meta_data)
+        stringify_data(meta_data, "request")
+        stringify_data(meta_data, "response")
+
+def resolve_response_body(meta_data):
+    """ replace lazy response body in meta_data with decoded text and json,
+        it is called only when record is stringified for rendering or dumping.
+        response body that has been decoded by extractors or validators is reused.
+    """
+    body = meta_data.get("response", {}).pop("body", None)
+    if body is None:
+        return
+
+    meta_data["response"]["text"] = body.text
+    meta_data["response"]["json"] = body.json_or_none()
+
+# phases of test in execution order, request phases are timed by client
+TIMING_PHASES = [
+    "template", "setup_hooks",
+    "dns", "connect", "tls", "ttfb", "download",
+    "teardown_hooks", "extract", "validate"
+]
+
+def aggregate_timings(aggregated_timings, timings):
+    """ aggregate timings of one test into timings of its testcase.
+    @param (dict) aggregated_timings: aggregated timings of testcase, updated in place
+        {
+            "ttfb": {"count": 2, "total_ms": 30.2, "mean_ms": 15.1, "max_ms": 20.1},
+            ...
+        }
+    @param (dict) timings: timings of one test in ms, e.g. {"ttfb": 20.1, "download": 1.2}
+    """
+    for phase in TIMING_PHASES:
+        if phase not in timings:
+            continue
+
+        elapsed_ms = timings[phase]
+        phase_timings = aggregated_timings.setdefault(phase, {
+            "count": 0,
+            "total_ms": 0,
+            "mean_ms": 0,
+            "max_ms": 0
+        })
+        phase_timings["count"] += 1
+        phase_timings["total_ms"] = round(phase_timings["total_ms"] + elapsed_ms, 3)
+        phase_timings["mean_ms"] = round(phase_timings["total_ms"] / phase_timings["count"], 3)
+        phase_timings["max_ms"] = max(phase_timings["max_ms"], elapsed_ms)
+
+class LatencyHistogram(object):
+    """ HDR-style latency histogram with logarithmic buckets.
+        each bucket covers values within relative precision, thus percentiles are accurate
+        within precision, while memory is bounded by buckets count no matter how many
+        values are recorded. histograms of suites or workers could be merged.
+    """
+    # relative precision of bucket, 0.01 means 1%
+    precision = 0.01
+    # lowest trackable value in ms, lower values are recorded in the lowest bucket
+    lowest_value = 0.001
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _get_bucket(self, value):
+        value = max(value, self.lowest_value)
+        return int(math.ceil(
+            math.log(value / self.lowest_value) / math.log(1 + self.precision)
+        ))
+
+    def _get_bucket_value(self, bucket):
+        return self.lowest_value * (1 + self.precision) ** bucket
+
+    def record(self, value):
+        """ record latency value in ms.
+        """
+        bucket = self._get_bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """ merge other histogram into self.
+        """
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+
+        self.count += other.count
+        self.total += other.total
+        for value in [other.min, other.max]:
+            if value is None:
+                continue
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """ get value at percentile, e.g. percentile(99) for p99.
+        """
+        if not self.count:
+            return None
+
+        rank = max(int(math.ceil(percent / 100.0 * self.count)), 1)
+        accumulated = 0
+        for bucket in sorted(self.counts):
+            accumulated += self.counts[bucket]
+            if accumulated >= rank:
+                value = self._get_bucket_value(bucket)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            "counts": {str(bucket): count for bucket, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, histogram_dict):
+        histogram = cls()
+        histogram.counts = {
+            int(bucket): count
+            for bucket, count in histogram_dict["counts"].items()
+        }
+        histogram.count = histogram_dict["count"]
+        histogram.total = histogram_dict["total"]
+        histogram.min = histogram_dict["min"]
+        histogram.max = histogram_dict["max"]
+        return histogram
+
+    def summary(self, duration=None):
+        """ get percentiles and throughput.
+        @param (float) duration: seconds, used to calculate throughput
+        """
+        def _round(value):
+            return None if value is None else round(value, 3)
+
+        return {
+            "count": self.count,
+            "min": _round(self.min),
+            "mean": _round(self.total / self.count if self.count else None),
+            "p50": _round(self.percentile(50)),
+            "p90": _round(self.percentile(90)),
+            "p99": _round(self.percentile(99)),
+            "max": _round(self.max),
+            "throughput": round(self.count / duration, 3) if duration else None
+        }
+
+def get_url_group(testcase_dict):
+    """ get url group of testcase, which is group of request if specified,
+        otherwise method and url template, e.g. "GET /api/users/$uid".
+    """
+    request = testcase_dict.get("request", {})
+    return request.get("group") or "{} {}".format(
+        request.get("method", "N/A"), request.get("url", "N/A"))
+
+def summarize_latency(latency, duration=None):
+    """ summarize latency histograms.
+    @param (dict) latency: histograms of testcases and url groups
+        {
+            "testcases": {"get token": LatencyHistogram()},
+            "groups": {"POST /api/get-token": LatencyHistogram()}
+        }
+    @param (float) duration: seconds, used to calculate throughput
+    @return (dict) summary of each histogram, histogram is also kept for merging
+        {
+            "testcases": {
+                "get token": {"count": 10, "p50": 12.1, ..., "histogram": {}}
+            },
+            "groups": {}
+        }
+    """
+    latency_summary = {}
+    for kind in ["testcases", "groups"]:
+        latency_summary[kind] = OrderedDict()
+        for name, histogram in latency.get(kind, {}).items():
+            name_summary = histogram.summary(duration)
+            name_summary["histogram"] = histogram.to_dict()
+            latency_summary[kind][name] = name_summary
+
+    return latency_summary
+
+def merge_latency(latency_summaries, duration=None):
+    """ merge latency summaries of suites or workers, without keeping all values.
+    @param (list) latency_summaries: summaries generated by summarize_latency
+    @param (float) duration: seconds of whole run, used to calculate throughput
+    """
+    latency = {}
+    for latency_summary in latency_summaries:
+        for kind in ["testcases", "groups"]:
+            histograms = latency.setdefault(kind, OrderedDict())
+            for name, name_summary in latency_summary.get(kind, {}).items():
+                histogram = LatencyHistogram.from_dict(name_summary["histogram"])
+                if name in histograms:
+                    histograms[name].merge(histogram)
+                else:
+                    histograms[name] = histogram
+
+    return summarize_latency(latency, duration)
+
+META_DATA_LEVELS = ["none", "headers", "truncated", "full"]
+REQUEST_BODY_KEYS = ["body", "data", "json", "files"]
+RESPONSE_BODY_KEYS = ["body", "content", "text", "json"]
+
+def truncate_body(value, body_size_limit):
+    if isinstance(value, (bytes, basestring)) and len(value) > body_size_limit:
+        return value[:body_size_limit]
+
+    return value
+
+def trim_meta_data(meta_data, level, body_size_limit=1024):
+    """ trim meta data according to capture level, in order to reduce memory of records.
+    @param (dict) meta_data: meta data of one test, lazy response body is not decoded yet
+    @param (str) level: capture level
+        - none: only keep request url/method and response status/time/size
+        - headers: drop request and response bodies
+        - truncated: keep bodies with at most body_size_limit bytes, decoded json is dropped
+        - full: keep all
+    @param (int) body_size_limit: max size of body in truncated level
+    @return trimmed meta data
+    """
+    if level == "full" or "request" not in meta_data:
+        return meta_data
+
+    request = meta_data["request"]
+    response = meta_data["response"]
+
+    if level == "none":
+        return {
+            "request": {
+                "url": request.get("url"),
+                "method": request.get("method"),
+                "headers": {}
+            },
+            "response": {
+                "status_code": response.get("status_code"),
+                "headers": {},
+                "content_size": response.get("content_size"),
+                "response_time_ms": response.get("response_time_ms"),
+                "elapsed_ms": response.get("elapsed_ms"),
+                "content_type": response.get("content_type", "")
+            },
+            "validators": meta_data.get("validators", []),
+            "timings": meta_data.get("timings", {})
+        }
+
+    if level == "headers":
+        for key in REQUEST_BODY_KEYS:
+            request.pop(key, None)
+        for key in RESPONSE_BODY_KEYS:
+            response.pop(key, None)
+        return meta_data
+
+    # truncated
+    for key in ["data", "json", "files"]:
+        request.pop(key, None)
+    request["body"] = truncate_body(request.get("body"), body_size_limit)
+
+    body = response.pop("body", None)
+    response.pop("json", None)
+    content = response.get("content")
+    if content is not None:
+        response["content"] = truncate_body(content, body_size_limit)
+    if body is not None:
+        response["text"] = truncate_body(body.text, body_size_limit)
+    elif "text" in response:
+        response["text"] = truncate_body(response["text"], body_size_limit)
+
+    return meta_data
+
 class HtmlTestResult(unittest.TextTestResult):
     """A html result class that can generate formatted html results.
 
     Used by TextTestRunner.
     """
-    def __init__(self, stream, descriptions, verbosity):
+    def __init__(self, stream, descriptions, verbosity, meta_data_level="full",
+            body_size_limit=1024, failed_body_only=False, records_dir=None):
+        """
+        @param (str) meta_data_level: capture level of meta data, none/headers/truncated/full
+        @param (int) body_size_limit: max size of body in truncated level
+        @param (bool) failed_body_only: keep request and response bodies only for failed tests
+        @param (str) records_dir: if specified, records are written to file in this directory
+            instead of being kept in memory.
+        """
         super(HtmlTestResult, self).__init__(stream, descriptions, verbosity)
         self.records = []
+        self.meta_data_level = meta_data_level
+        self.body_size_limit = body_size_limit
+        self.failed_body_only = failed_body_only
+        self.records_dir = records_dir
+        self.records_path = None
+        self.records_file = None
+        # phase timings aggregated by testcase name
+        self.timings = OrderedDict()
+        # latency histograms by testcase name and url group
+        self.latency = {
+            "testcases": OrderedDict(),
+            "groups": OrderedDict()
+        }
 
     def _record_test(self, test, status, attachment=''):
-        self.records.append({
+        level = self.meta_data_level
+        if self.failed_body_only and status not in ["error", "failure"] \
+                and level in ["truncated", "full"]:
+            level = "headers"
+
+        testcase_dict = getattr(test, "testcase_dict", {})
+        testcase_name = testcase_dict.get("name") or test.shortDescription()
+        response_time_ms = test.meta_data.get("response", {}).get("response_time_ms")
+        if isinstance(response_time_ms, numeric_types):
+            for kind, name in [("testcases", testcase_name), ("groups", get_url_group(testcase_dict))]:
+                histograms = self.latency[kind]
+                histograms.setdefault(name, LatencyHistogram()).record(response_time_ms)
+
+        timings = test.meta_data.get("timings")
+        if timings:
+            aggregate_timings(self.timings.setdefault(testcase_name, OrderedDict()), timings)
+            test.meta_data["timings"] = OrderedDict(
+                (phase, timings[phase]) for phase in TIMING_PHASES if phase in timings
+            )
+
+        # response body is left lazy, until record is stringified
+        meta_data = trim_meta_data(test.meta_data, level, self.body_size_limit)
+        record = {
             'name': test.shortDescription(),
             'status': status,
             'attachment': attachment,
-            "meta_data": test.meta_data
-        })
+            "meta_data": meta_data
+        }
+
+        if self.records_file is None:
+            self.records.append(record)
+            return
+
+        stringify_record(record)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        self.records_file.write(line)
+        self.records_file.write(u"\n")
 
     def startTestRun(self):
         self.start_at = time.time()
+        if self.records_dir:
+            if not os.path.isdir(self.records_dir):
+                os.makedirs(self.records_dir)
+            fd, self.records_path = tempfile.mkstemp(
+                prefix="records-", suffix=".jsonl", dir=self.records_dir)
+            os.close(fd)
+            self.records_file = io.open(self.records_path, "w", encoding="utf-8")
+
+    def stopTestRun(self):
+        super(HtmlTestResult, self).stopTestRun()
+        if self.records_file is not None:
+            self.records_file.close()
+            self.records_file = None
 
     def startTest(self, test):
         """ add start test time """
         super(HtmlTestResult, self).startTest(test)
-        logger.color_print(test.shortDescription(), "yellow")
+        # test name is written to result stream, thus output of testsets run
+        # concurrently with their own streams will not interleave
+        self.stream.writeln(Fore.YELLOW + test.shortDescription() + Style.RESET_ALL)
 
     def addSuccess(self, test):
         super(HtmlTestResult, self).addSuccess(test)
         self._record_test(test, 'success')
-        print("")
+        self.stream.writeln()
 
     def addError(self, test, err):
         super(HtmlTestResult, self).addError(test, err)
         self._record_test(test, 'error', self._exc_info_to_string(err, test))
-        print("")
+        self.stream.writeln()
 
     def addFailure(self, test, err):
         super(HtmlTestResult, self).addFailure(test, err)
         self._record_test(test, 'failure', self._exc_info_to_string(err, test))
-        print("")
+        self.stream.writeln()
 
     def addSkip(self, test, reason):
         super(HtmlTestResult, self).addSkip(test, reason)
         self._record_test(test, 'skipped', reason)
-        print("")
+        self.stream.writeln()
 
     def addExpectedFailure(self, test, err):
         super(HtmlTestResult, self).addExpectedFailure(test, err)
         self._record_test(test, 'ExpectedFailure', self._exc_info_to_string(err, test))
-        print("")
+        self.stream.writeln()
 
     def addUnexpectedSuccess(self, test):
         super(HtmlTestResult, self).addUnexpectedSuccess(test)
         self._record_test(test, 'UnexpectedSuccess')
-        print("")
+        self.stream.writeln()
 
     @property
     def duration(self):
@@ -2,27 +2,129 @@
 
 import json
 import re
+import threading
 
 from httprunner import exceptions, logger, testcase, utils
+from httprunner.client import get_response_body
 from httprunner.compat import OrderedDict, basestring, is_py2
 from requests.models import PreparedRequest
 from requests.structures import CaseInsensitiveDict
 
 text_extractor_regexp_compile = re.compile(r".*\(.*\).*")
 
+# LRU cache of compiled extractors, shared by all runners
+compiled_extractors_cache_mapping = OrderedDict()
+compiled_extractors_cache_lock = threading.Lock()
+MAX_COMPILED_EXTRACTORS = 1000
+
+
+class FieldExtractor(object):
+    """ extractor compiled from field, field is classified and parsed only once,
+        and the compiled extractor could be applied to any number of responses.
+    @param (str) field
+        regex string that matched text_extractor_regexp_compile, e.g. "LB(.*)RB",
+        or string joined by delimiter, e.g. "content.person.name.first_name"
+    """
+    def __init__(self, field):
+        if not isinstance(field, basestring):
+            err_msg = u"Invalid extractor! => {}\n".format(field)
+            logger.log_error(err_msg)
+            raise exceptions.ParamsError(err_msg)
+
+        self.field = field
+        self.is_regex = bool(text_extractor_regexp_compile.match(field))
+        self.regex = None
+        self.top_query = field
+        self.sub_query = None
+        self.steps = ()
+
+        if self.is_regex:
+            try:
+                self.regex = re.compile(field)
+            except re.error as ex:
+                err_msg = u"Invalid regex extractor! => {}, {}\n".format(field, ex)
+                logger.log_error(err_msg)
+                raise exceptions.ParamsError(err_msg)
+            return
+
+        # string.split(sep=None, maxsplit=-1) -> list of strings
+        # e.g. "content.person.name" => ["content", "person.name"]
+        try:
+            self.top_query, self.sub_query = field.split('.', 1)
+            self.steps = utils.parse_json_query(self.sub_query)
+        except ValueError:
+            pass
+
+    def __repr__(self):
+        return "<FieldExtractor {}>".format(self.field)
+
+
+def compile_extractor(field):
+    """ get compiled extractor of field, compiled extractors are kept in a bounded
+        LRU cache shared by all runners, thus each field is compiled only once.
+    @param (str/FieldExtractor) field
+    """
+    if isinstance(field, FieldExtractor):
+        return field
+
+    if not isinstance(field, basestring):
+        # invalid extractor, ParamsError will be raised
+        return FieldExtractor(field)
+
+    with compiled_extractors_cache_lock:
+        extractor = compiled_extractors_cache_mapping.pop(field, None)
+        if extractor is None:
+            extractor = FieldExtractor(field)
+            if len(compiled_extractors_cache_mapping) >= MAX_COMPILED_EXTRACTORS:
+                # discard the least recently used one
+                compiled_extractors_cache_mapping.popitem(last=False)
+
+        compiled_extractors_cache_mapping[field] = extractor
+
+    return extractor
+
+
+def compile_extractors(extractors):
+    """ compile fields of extractors into FieldExtractor objects.
+    @param (list) extractors
+        [
+            {"resp_status_code": "status_code"},
+            {"resp_content_person_first_name": "content.person.name.first_name"}
+        ]
+    @return (list) extractors with compiled fields, in the same format.
+    """
+    compiled_extractors = []
+    for extractor in extractors or []:
+        if not isinstance(extractor, dict):
+            raise exceptions.ParamsError("Invalid extractor! => {}".format(extractor))
+
+        compiled_extractors.append({
+            key: compile_extractor(field)
+            for key, field in extractor.items()
+        })
+
+    return compiled_extractors
+
 
 class ResponseObject(object):
 
-    def __init__(self, resp_obj):
+    def __init__(self, resp_obj, regex_search_limit=None):
         """ initialize with a requests.Response object
         @param (requests.Response instance) resp_obj
+        @param (int) regex_search_limit: if specified, regex extractors only search
+            in the first regex_search_limit bytes of response body.
         """
         self.resp_obj = resp_obj
+        self.regex_search_limit = regex_search_limit
+        # queried values of response body, keyed by steps prefix
+        self._body_query_cache = (None, {})
 
     def __getattr__(self, key):
         try:
             if key == "json":
-                value = self.resp_obj.json()
+                value = get_response_body(self.resp_obj).json()
+            elif key == "text":
+                value = get_response_body(self.resp_obj).text
             else:
                 value =  getattr(self.resp_obj, key)
 
@@ -36,24 +138,76 @@ class ResponseObject(object):
     def _extract_field_with_regex(self, field):
         """ extract field from response content with regex.
             requests.Response body could be json or html text.
-        @param (str) field should only be regex string that matched r".*\(.*\).*"
+        @param (str/FieldExtractor) field should only be regex string that matched r".*\(.*\).*"
         e.g.
             self.text: "LB123abcRB789"
             field: "LB[\d]*(.*)RB[\d]*"
             return: abc
         """
-        matched = re.search(field, self.text)
+        extractor = compile_extractor(field)
+        text = self._get_regex_search_text()
+        matched = extractor.regex.search(text)
         if not matched:
-            err_msg = u"Failed to extract data with regex! => {}\n".format(field)
-            err_msg += u"response body: {}\n".format(self.text)
+            err_msg = u"Failed to extract data with regex! => {}\n".format(extractor.field)
+            err_msg += u"response body: {}\n".format(text)
             logger.log_error(err_msg)
             raise exceptions.ExtractFailure(err_msg)
 
         return matched.group(1)
 
+    def _get_regex_search_text(self):
+        """ get response text for regex searching.
+            if regex_search_limit is specified, only prefix of response body is decoded,
+            which is much cheaper for large html body.
+        """
+        if not self.regex_search_limit:
+            return self.text
+
+        content = self.content or b""
+        if len(content) <= self.regex_search_limit:
+            return self.text
+
+        encoding = self.encoding or "utf-8"
+        try:
+            return content[:self.regex_search_limit].decode(encoding, "ignore")
+        except LookupError:
+            # unknown encoding
+            return content[:self.regex_search_limit].decode("utf-8", "ignore")
+
+    def _query_body(self, body, extractor):
+        """ query response body with parsed steps of extractor.
+            values of walked steps prefix are cached, thus extracting many fields
+            from the same body walks their shared prefix only once.
+        """
+        cached_body, cache = self._body_query_cache
+        if cached_body is not body:
+            cache = {}
+            self._body_query_cache = (body, cache)
+
+        steps = extractor.steps
+        start = 0
+        value = body
+        for index in range(len(steps), 0, -1):
+            if steps[:index] in cache:
+                start = index
+                value = cache[steps[:index]]
+                break
+
+        try:
+            for index in range(start, len(steps)):
+                value = utils.walk_json(value, steps[index:index + 1])
+                cache[steps[:index + 1]] = value
+        except (KeyError, ValueError, IndexError, TypeError):
+            err_msg = u"Failed to extract! => {}\n".format(extractor.sub_query)
+            err_msg += u"response body: {}\n".format(body)
+            logger.log_error(err_msg)
+            raise exceptions.ExtractFailure(err_msg)
+
+        return value
+
     def _extract_field_with_delimiter(self, field):
         """ response content could be json or html text.
-        @param (str) field should be string joined by delimiter.
+        @param (str/FieldExtractor) field should be string joined by delimiter.
         e.g.
             "status_code"
             "headers"
@@ -62,13 +216,10 @@ class ResponseObject(object):
             "headers.content-type"
             "content.person.name.first_name"
         """
-        # string.split(sep=None, maxsplit=-1) -> list of strings
-        # e.g. "content.person.name" => ["content", "person.name"]
-        try:
-            top_query, sub_query = field.split('.', 1)
-        except ValueError:
-            top_query = field
-            sub_query = None
+        extractor = compile_extractor(field)
+        field = extractor.field
+        top_query = extractor.top_query
+        sub_query = extractor.sub_query
 
         # status_code
         if top_query in ["status_code", "encoding", "ok", "reason", "url"]:
@@ -141,10 +292,10 @@ class ResponseObject(object):
 
             if isinstance(body, (dict, list)):
                 # content = {"xxx": 123}, content.xxx
-                return utils.query_json(body, sub_query)
+                return self._query_body(body, extractor)
             elif sub_query.isdigit():
                 # content = "abcdefg", content.3 => d
-                return utils.query_json(body, sub_query)
+                return self._query_body(body, extractor)
             else:
                 # content = "<html>abcdefg</html>", content.xxx
                 err_msg = u"Failed to extract attribute from response body! => {}\n".format(field)
@@ -184,24 +335,20 @@ class ResponseObject(object):
 
     def extract_field(self, field):
         """ extract value from requests.Response.
+        @param (str/FieldExtractor) field: field string or compiled extractor
         """
-        if not isinstance(field, basestring):
-            err_msg = u"Invalid extractor! => {}\n".format(field)
-            logger.log_error(err_msg)
-            raise exceptions.ParamsError(err_msg)
-
-        msg = "extract: {}".format(field)
+        extractor = compile_extractor(field)
+        field = extractor.field
 
-        if text_extractor_regexp_compile.match(field):
-            value = self._extract_field_with_regex(field)
+        if extractor.is_regex:
+            value = self._extract_field_with_regex(extractor)
         else:
-            value = self._extract_field_with_delimiter(field)
+            value = self._extract_field_with_delimiter(extractor)
 
         if is_py2 and isinstance(value, unicode):
             value = value.encode("utf-8")
 
-        msg += "\t=> {}".format(value)
-        logger.log_debug(msg)
+        logger.log_debug("extract: {}\t=> {}", field, value)
 
         return value
 
@@ -1,24 +1,77 @@
 # encoding: utf-8
 
+import copy
+import timeit
 from unittest.case import SkipTest
 
-from httprunner import exceptions, logger, response, utils
+from httprunner import exceptions, logger, response, testcase, utils
 from httprunner.client import HttpSession
+from httprunner.compat import OrderedDict
 from httprunner.context import Context
 
+# setup hook run before all other setup hooks of each testcase
+PREPARE_KWARGS_HOOK = "${setup_hook_prepare_kwargs($request)}"
+
+
+class CompiledTestcase(object):
+    """ testcase resolved once with testset config of runner, thus running it repeatedly
+        only renders dynamic values and sends request, e.g. in each locust task iteration.
+        config keys are lowercased, request is merged with testset request config,
+        and variables, request and hooks are compiled into templates.
+    @param (dict) testcase_dict: testcase with extractors and validators compiled
+    @param (dict) testset_request_config: evaluated request config of testset
+    """
+    def __init__(self, testcase_dict, testset_request_config):
+        self.testcase_dict = testcase_dict
+        config_dict = utils.lower_config_dict_key(testcase_dict)
+
+        variables = config_dict.get('variables') \
+            or config_dict.get('variable_binds', OrderedDict())
+        if isinstance(variables, list):
+            variables = utils.convert_to_order_dict(variables)
+        self.variables = [
+            (variable_name, testcase.compile_content(value))
+            for variable_name, value in variables.items()
+        ]
+
+        request_config = utils.deep_update_dict(
+            copy.deepcopy(testset_request_config),
+            config_dict.get("request", {})
+        )
+        self.request_template = testcase.compile_content(request_config)
+        self.setup_hooks = [
+            testcase.compile_content(action)
+            for action in [PREPARE_KWARGS_HOOK] + testcase_dict.get("setup_hooks", [])
+        ]
+        self.teardown_hooks = [
+            testcase.compile_content(action)
+            for action in testcase_dict.get("teardown_hooks", [])
+        ]
+        self.extractors = testcase_dict.get("extract", []) or testcase_dict.get("extractors", [])
+        self.validators = testcase_dict.get("validate", []) or testcase_dict.get("validators", [])
+
 
 class Runner(object):
 
+    # session class used when http_client_session is not specified
+    http_session_class = HttpSession
+
     def __init__(self, config_dict=None, http_client_session=None):
         self.http_client_session = http_client_session
         self.context = Context()
+        # timings of phases in ms of current test, besides request phases timed by client
+        self.timings = {}
 
         config_dict = config_dict or {}
+        # regex extractors only search in prefix of response body if specified
+        self.regex_search_limit = config_dict.get("regex_search_limit")
+        # connection pool settings of http session
+        self.connection_pool = config_dict.get("connection_pool")
 
-        # testset setup hooks
-        testset_setup_hooks = config_dict.pop("setup_hooks", [])
+        # testset setup hooks, config dict may be shared and is never modified
+        testset_setup_hooks = config_dict.get("setup_hooks", [])
         # testset teardown hooks
-        self.testset_teardown_hooks = config_dict.pop("teardown_hooks", [])
+        self.testset_teardown_hooks = config_dict.get("teardown_hooks", [])
 
         self.init_config(config_dict, "testset")
 
@@ -72,7 +125,8 @@ class Runner(object):
         parsed_request = self.context.get_parsed_request(request_config, level)
 
         base_url = parsed_request.pop("base_url", None)
-        self.http_client_session = self.http_client_session or HttpSession(base_url)
+        self.http_client_session = self.http_client_session \
+            or self.http_session_class(base_url, connection_pool=self.connection_pool)
 
         return parsed_request
 
@@ -100,9 +154,12 @@ class Runner(object):
         if skip_reason:
             raise SkipTest(skip_reason)
 
+    def _record_timing(self, phase, start):
+        self.timings[phase] = round((timeit.default_timer() - start) * 1000, 3)
+
     def do_hook_actions(self, actions):
         for action in actions:
-            logger.log_debug("call hook: {}".format(action))
+            logger.log_debug("call hook: {}", action)
             # TODO: check hook function if valid
             self.context.eval_content(action)
 
@@ -131,17 +188,108 @@ class Runner(object):
             }
         @return True or raise exception during test
         """
+        method, url, group_name, parsed_request = self._prepare_request(testcase_dict)
+
+        # request
+        resp = self.http_client_session.request(
+            method,
+            url,
+            name=group_name,
+            **parsed_request
+        )
+        self._handle_response(testcase_dict, parsed_request, resp)
+
+    def compile_testcase(self, testcase_dict):
+        """ resolve testcase with testset config of current runner once.
+        @param (dict) testcase_dict: the same as run_test
+        @return (CompiledTestcase) compiled testcase, which can be run with run_compiled_test
+        """
+        return CompiledTestcase(testcase_dict, self.context.testset_request_config)
+
+    def run_compiled_test(self, compiled_testcase):
+        """ run compiled testcase, only variables, request and hooks are rendered.
+            the result is the same as running its testcase with run_test.
+        @param (CompiledTestcase) compiled_testcase
+        @return True or raise exception during test
+        """
+        testcase_dict = compiled_testcase.testcase_dict
+        method, url, group_name, parsed_request = self._prepare_compiled_request(compiled_testcase)
+
+        # request
+        resp = self.http_client_session.request(
+            method,
+            url,
+            name=group_name,
+            **parsed_request
+        )
+        self._handle_response(
+            testcase_dict,
+            parsed_request,
+            resp,
+            teardown_hooks=compiled_testcase.teardown_hooks,
+            extractors=compiled_testcase.extractors,
+            validators=compiled_testcase.validators
+        )
+
+    def _prepare_compiled_request(self, compiled_testcase):
+        """ check skip, render request and run setup hooks of compiled testcase.
+        @return (tuple) method, url, group name and parsed request kwargs
+        """
+        testcase_dict = compiled_testcase.testcase_dict
+        self.timings = {}
+
         # check skip
         self._handle_skip_feature(testcase_dict)
 
         # prepare
-        parsed_request = self.init_config(testcase_dict, level="testcase")
-        self.context.bind_testcase_variable("request", parsed_request)
+        start = timeit.default_timer()
+        try:
+            self.context.init_context("testcase")
+            for variable_name, template in compiled_testcase.variables:
+                self.context.bind_testcase_variable(
+                    variable_name,
+                    self.context.eval_content(template)
+                )
+
+            parsed_request = self.context.eval_content(compiled_testcase.request_template)
+            parsed_request.pop("base_url", None)
+            self.context.bind_testcase_variable("request", parsed_request)
+        finally:
+            self._record_timing("template", start)
+
+        method, url, group_name = self._setup_request(compiled_testcase.setup_hooks, parsed_request)
+        return method, url, group_name, parsed_request
 
-        # setup hooks
-        setup_hooks = testcase_dict.get("setup_hooks", [])
-        setup_hooks.insert(0, "${setup_hook_prepare_kwargs($request)}")
-        self.do_hook_actions(setup_hooks)
+    def _prepare_request(self, testcase_dict):
+        """ check skip, parse request and run setup hooks before sending request.
+        @return (tuple) method, url, group name and parsed request kwargs
+        """
+        self.timings = {}
+
+        # check skip
+        self._handle_skip_feature(testcase_dict)
+
+        # prepare
+        start = timeit.default_timer()
+        try:
+            parsed_request = self.init_config(testcase_dict, level="testcase")
+            self.context.bind_testcase_variable("request", parsed_request)
+        finally:
+            self._record_timing("template", start)
+
+        setup_hooks = [PREPARE_KWARGS_HOOK] + testcase_dict.get("setup_hooks", [])
+        method, url, group_name = self._setup_request(setup_hooks, parsed_request)
+        return method, url, group_name, parsed_request
+
+    def _setup_request(self, setup_hooks, parsed_request):
+        """ run setup hooks, and pop url, method and group name from parsed request.
+        @return (tuple) method, url and group name
+        """
+        start = timeit.default_timer()
+        try:
+            self.do_hook_actions(setup_hooks)
+        finally:
+            self._record_timing("setup_hooks", start)
 
         try:
             url = parsed_request.pop('url')
@@ -158,32 +306,44 @@ class Runner(object):
             logger.log_error(err_msg)
             raise exceptions.ParamsError(err_msg)
 
-        logger.log_info("{method} {url}".format(method=method, url=url))
-        logger.log_debug("request kwargs(raw): {kwargs}".format(kwargs=parsed_request))
+        logger.log_info("{method} {url}", method=method, url=url)
+        logger.log_debug("request kwargs(raw): {kwargs}", kwargs=parsed_request)
 
-        # request
-        resp = self.http_client_session.request(
-            method,
-            url,
-            name=group_name,
-            **parsed_request
-        )
-        resp_obj = response.ResponseObject(resp)
+        return method, url, group_name
+
+    def _handle_response(self, testcase_dict, parsed_request, resp,
+                         teardown_hooks=None, extractors=None, validators=None):
+        """ run teardown hooks, extract and validate after response received.
+            teardown hooks, extractors and validators are got from testcase if not specified.
+        """
+        resp_obj = response.ResponseObject(resp, self.regex_search_limit)
 
         # teardown hooks
-        teardown_hooks = testcase_dict.get("teardown_hooks", [])
+        if teardown_hooks is None:
+            teardown_hooks = testcase_dict.get("teardown_hooks", [])
         if teardown_hooks:
             logger.log_info("start to run teardown hooks")
             self.context.bind_testcase_variable("response", resp_obj)
-            self.do_hook_actions(teardown_hooks)
+            start = timeit.default_timer()
+            try:
+                self.do_hook_actions(teardown_hooks)
+            finally:
+                self._record_timing("teardown_hooks", start)
 
         # extract
-        extractors = testcase_dict.get("extract", []) or testcase_dict.get("extractors", [])
-        extracted_variables_mapping = resp_obj.extract_response(extractors)
-        self.context.bind_extracted_variables(extracted_variables_mapping)
+        if extractors is None:
+            extractors = testcase_dict.get("extract", []) or testcase_dict.get("extractors", [])
+        start = timeit.default_timer()
+        try:
+            extracted_variables_mapping = resp_obj.extract_response(extractors)
+            self.context.bind_extracted_variables(extracted_variables_mapping)
+        finally:
+            self._record_timing("extract", start)
 
         # validate
-        validators = testcase_dict.get("validate", []) or testcase_dict.get("validators", [])
+        if validators is None:
+            validators = testcase_dict.get("validate", []) or testcase_dict.get("validators", [])
+        start = timeit.default_timer()
         try:
             self.context.validate(validators, resp_obj)
         except (exceptions.ParamsError, \
@@ -203,6 +363,8 @@ class Runner(object):
             logger.log_error(err_resp_msg)
 
             raise
+        finally:
+            self._record_timing("validate", start)
 
     def extract_output(self, output_variables_list):
         """ extract output variables
@@ -1,35 +1,69 @@
 # encoding: utf-8
 
 import copy
+import functools
+import multiprocessing
+import re
 import sys
 import unittest
+from multiprocessing.pool import ThreadPool
 
-from httprunner import exceptions, loader, logger, runner, testcase, utils
-from httprunner.compat import is_py3
-from httprunner.report import (HtmlTestResult, get_platform, get_summary,
-                               render_html_report)
+from httprunner import (context, exceptions, loader, logger, response, runner,
+                        testcase, utils)
+from httprunner.compat import StringIO
+from httprunner.report import (META_DATA_LEVELS, HtmlTestResult,
+                               LatencyHistogram, get_platform, get_summary,
+                               merge_latency, render_html_report,
+                               stringify_record)
+
+percentile_metric_regexp_compile = re.compile(r"^p(\d+(\.\d+)?)$")
 
 
 class TestCase(unittest.TestCase):
     """ create a testcase.
     """
-    def __init__(self, test_runner, testcase_dict):
+    def __init__(self, test_runner, testcase_dict, testcase_name=None):
         super(TestCase, self).__init__()
         self.test_runner = test_runner
         self.testcase_dict = copy.copy(testcase_dict)
+        # testcase name is displayed as short description of test
+        self._testMethodDoc = testcase_name
+        self.compiled_testcase = None
+
+    def compile(self):
+        """ resolve testcase with testset config of its runner once, thus running
+            the test repeatedly only renders dynamic values and sends request.
+        """
+        if self.compiled_testcase is not None:
+            return
+
+        try:
+            self.compiled_testcase = self.test_runner.compile_testcase(self.testcase_dict)
+        except exceptions.MyBaseError:
+            # invalid testcase will fail when it is run
+            pass
 
     def runTest(self):
         """ run testcase and check result.
         """
         try:
-            self.test_runner.run_test(self.testcase_dict)
+            if self.compiled_testcase is not None:
+                self.test_runner.run_compiled_test(self.compiled_testcase)
+            else:
+                self.test_runner.run_test(self.testcase_dict)
         except exceptions.MyBaseFailure as ex:
             self.fail(repr(ex))
         finally:
-            if hasattr(self.test_runner.http_client_session, "meta_data"):
-                self.meta_data = self.test_runner.http_client_session.meta_data
-                self.meta_data["validators"] = self.test_runner.context.evaluated_validators
-                self.test_runner.http_client_session.init_meta_data()
+            self.collect_meta_data()
+
+    def collect_meta_data(self):
+        """ take over meta data of current test from http client session.
+        """
+        if hasattr(self.test_runner.http_client_session, "meta_data"):
+            self.meta_data = self.test_runner.http_client_session.meta_data
+            self.meta_data["validators"] = self.test_runner.context.evaluated_validators
+            self.meta_data.setdefault("timings", {}).update(self.test_runner.timings)
+            self.test_runner.http_client_session.init_meta_data()
 
 
 class TestSuite(unittest.TestSuite):
@@ -44,7 +78,13 @@ class TestSuite(unittest.TestSuite):
                     "parameters": {},
                     "variables": [],
                     "request": {},
-                    "output": []
+                    "output": [],
+                    "regex_search_limit": 65536,    # optional
+                    "connection_pool": {            # optional
+                        "pool_maxsize": 100,
+                        "keep_alive": True,
+                        "shared": True
+                    }
                 },
                 "testcases": [
                     {
@@ -56,44 +96,209 @@ class TestSuite(unittest.TestSuite):
                         "validate": {}      # optional
                     },
                     testcase12
-                ]
+                ],
+                "performance": {            # optional, latency budgets in ms
+                    "testcases": {
+                        "testcase description": {"max": 500, "p95": 200, "min_throughput": 10}
+                    },
+                    "groups": {
+                        "POST /api/get-token": {"p99": 300}
+                    }
+                }
             }
         (dict) variables_mapping:
             passed in variables mapping, it will override variables in config block
+        (bool) lazy:
+            if True, tests will be generated one by one while the suite is iterated,
+            instead of being expanded with all parameters at initialization.
     """
-    def __init__(self, testset, variables_mapping=None, http_client_session=None):
+    # runner class initialized with testset config
+    runner_class = runner.Runner
+
+    def __init__(self, testset, variables_mapping=None, http_client_session=None, lazy=False):
         super(TestSuite, self).__init__()
         self.test_runner_list = []
+        self.http_client_session = http_client_session
+        self.lazy = lazy
 
         self.config = testset.get("config", {})
+        self.performance_budgets = self._parse_performance(testset.get("performance"))
         self.output_variables_list = self.config.get("output", [])
         self.testset_file_path = self.config.get("path")
-        config_dict_parameters = self.config.get("parameters", [])
+        self.testcases = [
+            self._compile_testcase(testcase_dict)
+            for testcase_dict in testset.get("testcases", [])
+        ]
 
         config_dict_variables = self.config.get("variables", [])
         variables_mapping = variables_mapping or {}
-        config_dict_variables = utils.override_variables_binds(config_dict_variables, variables_mapping)
+        self.config_dict_variables = utils.override_variables_binds(config_dict_variables, variables_mapping)
 
-        config_parametered_variables_list = self._get_parametered_variables(
-            config_dict_variables,
-            config_dict_parameters
-        )
         self.testcase_parser = testcase.TestcaseParser()
-        testcases = testset.get("testcases", [])
 
-        for config_variables in config_parametered_variables_list:
-            # config level
-            self.config["variables"] = config_variables
-            test_runner = runner.Runner(self.config, http_client_session)
+        if self.lazy:
+            # tests are generated while iterating, do not hold references to them after run
+            self._cleanup = False
+        else:
+            for test in self._iter_tests():
+                self.addTest(test)
+
+    @staticmethod
+    def _compile_testcase(testcase_dict):
+        """ compile extractors and validators of testcase once at load time,
+            compiled testcase is shared by all parameters and times.
+        """
+        testcase_dict = copy.copy(testcase_dict)
+        extractors = testcase_dict.get("extract", []) or testcase_dict.get("extractors", [])
+        try:
+            testcase_dict["extract"] = response.compile_extractors(extractors)
+        except exceptions.ParamsError:
+            # invalid extractor will fail the testcase when it is run
+            pass
+
+        validators = testcase_dict.get("validate", []) or testcase_dict.get("validators", [])
+        try:
+            testcase_dict["validate"] = context.compile_validators(validators)
+        except exceptions.ParamsError:
+            # invalid validator will fail the testcase when it is run
+            pass
+
+        return testcase_dict
+
+    @staticmethod
+    def _parse_performance(performance):
+        """ parse performance block into budgets list.
+        @param (dict) performance: budgets of testcases and url groups
+            {
+                "testcases": {"get token": {"max": 500, "p95": 200, "min_throughput": 10}},
+                "groups": {"POST /api/get-token": {"p99": 300}}
+            }
+        @return (list) budgets, each in (kind, name, metric, budget)
+        """
+        budgets = []
+        if not performance:
+            return budgets
+
+        if not isinstance(performance, dict):
+            raise exceptions.ParamsError("Invalid performance block: {}".format(performance))
+
+        for kind, name_budgets in performance.items():
+            if kind not in ["testcases", "groups"] or not isinstance(name_budgets, dict):
+                raise exceptions.ParamsError(
+                    "performance budgets should be set for testcases or groups: {}".format(kind))
+
+            for name, metric_budgets in name_budgets.items():
+                for metric, budget in (metric_budgets or {}).items():
+                    if metric not in ["max", "mean", "min_throughput"] \
+                            and not percentile_metric_regexp_compile.match(metric):
+                        raise exceptions.ParamsError(
+                            "Invalid performance metric: {}".format(metric))
+
+                    try:
+                        budget = float(budget)
+                    except (TypeError, ValueError):
+                        raise exceptions.ParamsError(
+                            "Invalid performance budget of {} {} {}: {}, budget should be "
+                            "number in ms or per second.".format(kind, name, metric, budget))
+
+                    budgets.append((kind, name, metric, budget))
 
-            for testcase_dict in testcases:
+        return budgets
+
+    def check_performance(self, latency_summary):
+        """ evaluate performance budgets with latency summary of suite run.
+        @param (dict) latency_summary: latency summary of suite, generated by summarize_latency
+        @return (dict) performance result, None if no budget is set
+            {
+                "success": False,
+                "budgets": [
+                    {
+                        "kind": "testcases",
+                        "name": "get token",
+                        "metric": "p95",
+                        "budget": 200,
+                        "actual": 230.5,
+                        "success": False
+                    }
+                ]
+            }
+        """
+        if not self.performance_budgets:
+            return None
+
+        latency_summary = latency_summary or {}
+        performance = {
+            "success": True,
+            "budgets": []
+        }
+        for kind, name, metric, budget in self.performance_budgets:
+            name_summary = latency_summary.get(kind, {}).get(name)
+            if not name_summary or not name_summary["count"]:
+                # budget of testcase or group without any response fails
+                actual = None
+            elif metric in ["max", "mean"]:
+                actual = name_summary[metric]
+            elif metric == "min_throughput":
+                actual = name_summary["throughput"]
+            else:
+                percent = float(percentile_metric_regexp_compile.match(metric).group(1))
+                histogram = LatencyHistogram.from_dict(name_summary["histogram"])
+                actual = round(histogram.percentile(percent), 3)
+
+            if actual is None:
+                success = False
+            elif metric == "min_throughput":
+                success = actual >= budget
+            else:
+                success = actual <= budget
+
+            if not success:
+                logger.log_error(
+                    "performance budget failed: {} {} {} => budget: {}, actual: {}".format(
+                        kind, name, metric, budget, actual))
+
+            performance["success"] &= success
+            performance["budgets"].append({
+                "kind": kind,
+                "name": name,
+                "metric": metric,
+                "budget": budget,
+                "actual": actual,
+                "success": success
+            })
+
+        return performance
+
+    def __iter__(self):
+        if self.lazy:
+            return self._iter_tests()
+
+        return super(TestSuite, self).__iter__()
+
+    def _iter_tests(self):
+        """ generate tests with testset config, testcases and their parameters one by one.
+        """
+        # runners of former pass are discarded, lazy suite may be iterated repeatedly
+        self.test_runner_list = []
+        config_parametered_variables = self._iter_parametered_variables(
+            self.config_dict_variables,
+            self.config.get("parameters", [])
+        )
+
+        for config_variables in config_parametered_variables:
+            # config level, each runner gets its own config, suite config is never modified
+            config = copy.deepcopy(self.config)
+            config["variables"] = config_variables
+            test_runner = self.runner_class(config, self.http_client_session)
+
+            for testcase_dict in self.testcases:
                 testcase_dict = copy.copy(testcase_dict)
                 # testcase level
-                testcase_parametered_variables_list = self._get_parametered_variables(
+                testcase_parametered_variables = self._iter_parametered_variables(
                     testcase_dict.get("variables", []),
                     testcase_dict.get("parameters", [])
                 )
-                for testcase_variables in testcase_parametered_variables_list:
+                for testcase_variables in testcase_parametered_variables:
                     testcase_dict["variables"] = testcase_variables
 
                     # eval testcase name with bind variables
@@ -107,38 +312,33 @@ class TestSuite(unittest.TestSuite):
                     except (AssertionError, exceptions.ParamsError):
                         logger.log_warning("failed to eval testcase name: {}".format(testcase_dict["name"]))
                         testcase_name = testcase_dict["name"]
-                    self.test_runner_list.append((test_runner, variables))
 
-                    self._add_test_to_suite(testcase_name, test_runner, testcase_dict)
+                    if self.output_variables_list:
+                        self.test_runner_list.append((test_runner, variables))
+
+                    test = TestCase(test_runner, testcase_dict, testcase_name)
+                    for _ in range(int(testcase_dict.get("times", 1))):
+                        yield test
 
-    def _get_parametered_variables(self, variables, parameters):
-        """ parameterize varaibles with parameters
+    def _iter_parametered_variables(self, variables, parameters):
+        """ parameterize varaibles with parameters, parameters are pulled one by one.
         """
         cartesian_product_parameters = testcase.parse_parameters(
             parameters,
-            self.testset_file_path
-        ) or [{}]
+            self.testset_file_path,
+            lazy=True
+        )
 
-        parametered_variables_list = []
+        is_empty = True
         for parameter_mapping in cartesian_product_parameters:
-            parameter_mapping = parameter_mapping or {}
-            variables = utils.override_variables_binds(
+            is_empty = False
+            yield utils.override_variables_binds(
                 variables,
-                parameter_mapping
+                parameter_mapping or {}
             )
 
-            parametered_variables_list.append(variables)
-
-        return parametered_variables_list
-
-    def _add_test_to_suite(self, testcase_name, test_runner, testcase_dict):
-        if is_py3:
-            TestCase.runTest.__doc__ = testcase_name
-        else:
-            TestCase.runTest.__func__.__doc__ = testcase_name
-
-        test = TestCase(test_runner, testcase_dict)
-        [self.addTest(test) for _ in range(int(testcase_dict.get("times", 1)))]
+        if is_empty:
+            yield utils.override_variables_binds(variables, {})
 
     @property
     def output(self):
@@ -159,7 +359,26 @@ class TestSuite(unittest.TestSuite):
         return outputs
 
 
-def init_test_suites(path_or_testsets, mapping=None, http_client_session=None):
+def load_testsets(path_or_testsets):
+    """ load testsets with testset path, or return testsets directly if already loaded.
+    @return (list) list of testset dict
+    """
+    if not testcase.is_testsets(path_or_testsets):
+        loader.load_test_dependencies()
+        testsets = loader.load_testcases(path_or_testsets)
+    else:
+        testsets = path_or_testsets
+
+    if not testsets:
+        raise exceptions.TestcaseNotFound
+
+    if isinstance(testsets, dict):
+        testsets = [testsets]
+
+    return testsets
+
+
+def init_test_suites(path_or_testsets, mapping=None, http_client_session=None, lazy=False):
     """ initialize TestSuite list with testset path or testset dict
     @params
         testsets (dict/list): testset or list of testset
@@ -176,30 +395,77 @@ def init_test_suites(path_or_testsets, mapping=None, http_client_session=None):
             ]
         mapping (dict):
             passed in variables mapping, it will override variables in config block
+        lazy (bool):
+            if True, tests in each suite will be generated while running
     """
-    if not testcase.is_testsets(path_or_testsets):
-        loader.load_test_dependencies()
-        testsets = loader.load_testcases(path_or_testsets)
-    else:
-        testsets = path_or_testsets
+    testsets = load_testsets(path_or_testsets)
 
     # TODO: move comparator uniform here
     mapping = mapping or {}
 
-    if not testsets:
-        raise exceptions.TestcaseNotFound
-
-    if isinstance(testsets, dict):
-        testsets = [testsets]
-
     test_suite_list = []
     for testset in testsets:
-        test_suite = TestSuite(testset, mapping, http_client_session)
+        test_suite = TestSuite(testset, mapping, http_client_session, lazy)
         test_suite_list.append(test_suite)
 
     return test_suite_list
 
 
+def run_test_suite(test_runner, test_suite):
+    """ run test suite with TextTestRunner and return test suite summary.
+    """
+    result = test_runner.run(test_suite)
+    return get_test_suite_summary(result, test_suite)
+
+
+def get_test_suite_summary(result, test_suite):
+    """ get test suite summary from test result, with testset config and output.
+    """
+    test_suite_summary = get_summary(result)
+
+    test_suite_summary["name"] = test_suite.config.get("name")
+    test_suite_summary["base_url"] = test_suite.config.get("request", {}).get("base_url", "")
+    test_suite_summary["output"] = test_suite.output
+    utils.print_output(test_suite_summary["output"])
+
+    performance = test_suite.check_performance(test_suite_summary.get("latency"))
+    if performance:
+        test_suite_summary["performance"] = performance
+        test_suite_summary["success"] &= performance["success"]
+
+    return test_suite_summary
+
+
+def _run_test_suite_buffered(test_suite, runner_kwargs):
+    """ run test suite in worker, with result stream and logs buffered, thus output
+        of testsets run concurrently is written by main thread without interleaving.
+    @return (tuple) test suite summary, result stream output and log records
+    """
+    stream = StringIO()
+    runner_kwargs = dict(runner_kwargs, stream=stream)
+    logger.start_log_buffer()
+    try:
+        test_suite_summary = run_test_suite(unittest.TextTestRunner(**runner_kwargs), test_suite)
+    finally:
+        log_records = logger.stop_log_buffer()
+
+    return test_suite_summary, stream.getvalue(), log_records
+
+
+def _run_testset_in_process(args):
+    """ worker of process pool, each testset is run with its own Runner and HttpSession.
+        records are stringified so that summary could be sent back to main process.
+    """
+    testset, mapping, lazy, runner_kwargs = args
+    test_suite = TestSuite(testset, mapping, lazy=lazy)
+    test_suite_summary, output, log_records = _run_test_suite_buffered(test_suite, runner_kwargs)
+
+    for record in test_suite_summary["records"]:
+        stringify_record(record)
+
+    return test_suite_summary, output, log_records
+
+
 class HttpRunner(object):
 
     def __init__(self, **kwargs):
@@ -208,13 +474,104 @@ class HttpRunner(object):
             - resultclass: HtmlTestResult or TextTestResult
             - failfast: False/True, stop the test run on the first error or failure.
             - dot_env_path: .env file path
+            - lazy: False/True, generate tests while running instead of expanding all at first.
+            - workers: number of testsets run concurrently, default is 1.
+            - worker_type: "thread" or "process", backend of worker pool, default is "thread".
+            - meta_data_level: capture level of request and response meta data in records,
+                none/headers/truncated/full, default is "full".
+            - body_size_limit: max bytes of body kept in truncated level, default is 1024.
+            - failed_body_only: False/True, keep request and response bodies only for failed tests.
+            - records_dir: write records to files in this directory instead of keeping in memory,
+                records are kept in memory if not specified, while hrun command always writes
+                records to files and renders report from them.
+            - cache_dir: directory of persistent cache of parsed testcase files.
         """
         dot_env_path = kwargs.pop("dot_env_path", None)
         loader.load_dot_env_file(dot_env_path)
-
-        kwargs.setdefault("resultclass", HtmlTestResult)
+        cache_dir = kwargs.pop("cache_dir", None)
+        if cache_dir:
+            loader.set_file_cache_dir(cache_dir)
+        self.lazy = kwargs.pop("lazy", False)
+        self.workers = int(kwargs.pop("workers", 1) or 1)
+        self.worker_type = kwargs.pop("worker_type", "thread")
+        if self.worker_type not in ["thread", "process"]:
+            raise exceptions.ParamsError(
+                "worker type should be thread or process: {}".format(self.worker_type))
+
+        meta_data_level = kwargs.pop("meta_data_level", "full")
+        if meta_data_level not in META_DATA_LEVELS:
+            raise exceptions.ParamsError(
+                "meta data level should be in {}: {}".format(META_DATA_LEVELS, meta_data_level))
+
+        kwargs.setdefault(
+            "resultclass",
+            functools.partial(
+                HtmlTestResult,
+                meta_data_level=meta_data_level,
+                body_size_limit=int(kwargs.pop("body_size_limit", 1024)),
+                failed_body_only=kwargs.pop("failed_body_only", False),
+                records_dir=kwargs.pop("records_dir", None)
+            )
+        )
+        self.runner_kwargs = kwargs
         self.runner = unittest.TextTestRunner(**kwargs)
 
+    def _run_test_suite_in_thread(self, test_suite):
+        """ worker of thread pool, each testset is run with its own TextTestRunner.
+        """
+        return _run_test_suite_buffered(test_suite, self.runner_kwargs)
+
+    def _collect_worker_results(self, worker_results):
+        """ write buffered output of workers in testsets order as results come back.
+        @param worker_results: iterator of (test suite summary, output, log records)
+        @return (list) test suite summaries
+        """
+        test_suite_summary_list = []
+        for test_suite_summary, output, log_records in worker_results:
+            self.runner.stream.write(output)
+            self.runner.stream.flush()
+            logger.emit_log_records(log_records)
+            test_suite_summary_list.append(test_suite_summary)
+
+        return test_suite_summary_list
+
+    def _run_test_suites(self, path_or_testsets, mapping):
+        """ run testsets sequentially or with worker pool, return summaries in testsets order.
+        """
+        if self.workers > 1 and self.worker_type == "process":
+            testsets = load_testsets(path_or_testsets)
+            # stream of main process could not be sent to worker process
+            runner_kwargs = dict(self.runner_kwargs)
+            runner_kwargs.pop("stream", None)
+            pool = multiprocessing.Pool(self.workers)
+            try:
+                return self._collect_worker_results(pool.imap(
+                    _run_testset_in_process,
+                    [
+                        (testset, mapping, self.lazy, runner_kwargs)
+                        for testset in testsets
+                    ]
+                ))
+            finally:
+                pool.close()
+                pool.join()
+
+        test_suite_list = init_test_suites(path_or_testsets, mapping, lazy=self.lazy)
+
+        if self.workers > 1:
+            pool = ThreadPool(self.workers)
+            try:
+                return self._collect_worker_results(
+                    pool.imap(self._run_test_suite_in_thread, test_suite_list))
+            finally:
+                pool.close()
+                pool.join()
+
+        return [
+            run_test_suite(self.runner, test_suite)
+            for test_suite in test_suite_list
+        ]
+
     def run(self, path_or_testsets, mapping=None):
         """ start to run test with varaibles mapping
         @param path_or_testsets: YAML/JSON testset file path or testset list
@@ -233,7 +590,7 @@ class HttpRunner(object):
             if mapping specified, it will override variables in config block
         """
         try:
-            test_suite_list = init_test_suites(path_or_testsets, mapping)
+            test_suite_summary_list = self._run_test_suites(path_or_testsets, mapping)
         except exceptions.TestcaseNotFound:
             logger.log_error("Testcases not found in {}".format(path_or_testsets))
             sys.exit(1)
@@ -258,21 +615,36 @@ class HttpRunner(object):
                 else:
                     origin_stat[key] += new_stat[key]
 
-        for test_suite in test_suite_list:
-            result = self.runner.run(test_suite)
-            test_suite_summary = get_summary(result)
-
+        for test_suite_summary in test_suite_summary_list:
             self.summary["success"] &= test_suite_summary["success"]
-            test_suite_summary["name"] = test_suite.config.get("name")
-            test_suite_summary["base_url"] = test_suite.config.get("request", {}).get("base_url", "")
-            test_suite_summary["output"] = test_suite.output
-            utils.print_output(test_suite_summary["output"])
 
             accumulate_stat(self.summary["stat"], test_suite_summary["stat"])
             accumulate_stat(self.summary["time"], test_suite_summary["time"])
 
             self.summary["details"].append(test_suite_summary)
 
+        # suites may run concurrently with workers or asyncio, thus throughput is
+        # calculated with wall clock time, from the earliest start to the latest end.
+        wall_clock_duration = None
+        if test_suite_summary_list:
+            suite_time_list = [
+                test_suite_summary["time"]
+                for test_suite_summary in test_suite_summary_list
+            ]
+            wall_clock_duration = max([
+                suite_time["start_at"] + suite_time["duration"]
+                for suite_time in suite_time_list
+            ]) - self.summary["time"]["start_at"]
+
+        self.summary["latency"] = merge_latency(
+            [
+                test_suite_summary["latency"]
+                for test_suite_summary in test_suite_summary_list
+                if "latency" in test_suite_summary
+            ],
+            wall_clock_duration
+        )
+
         return self
 
     def gen_html_report(self, html_report_name=None, html_report_template=None):
@@ -290,9 +662,14 @@ class HttpRunner(object):
 
 
 class LocustTask(object):
-
+    """ run testsets in locust task, tests are initialized and compiled once for each
+        locust user, each task iteration only renders dynamic values and sends requests.
+    """
     def __init__(self, path_or_testsets, locust_client, mapping=None):
         self.test_suite_list = init_test_suites(path_or_testsets, mapping, locust_client)
+        for test_suite in self.test_suite_list:
+            for test in test_suite:
+                test.compile()
 
     def run(self):
         for test_suite in self.test_suite_list:
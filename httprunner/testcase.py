@@ -1,18 +1,29 @@
 # encoding: utf-8
 
 import io
-import itertools
 import json
 import os
 import random
 import re
+import sys
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
 
 from httprunner import exceptions, loader, logger, parser, utils
 from httprunner.compat import (OrderedDict, basestring, builtin_str,
-                               numeric_types, str)
+                               integer_types, numeric_types, str)
 
 
 function_regexp = r"\$\{([\w_]+\([\$\w\.\-_ =,]*\))\}"
+function_regexp_compile = re.compile(function_regexp)
+variable_regexp_compile = re.compile(parser.variable_regexp)
+
+# compiled string templates, keyed by raw string content
+compiled_templates_cache_mapping = {}
+MAX_COMPILED_TEMPLATES = 10000
 
 
 def extract_functions(content):
@@ -83,7 +94,7 @@ def gen_cartesian_product(*args):
                 {"x": 121, "y": 122}
             ]
     @return
-        cartesian product in list
+        (CartesianProduct) lazy cartesian product, which could be used as list
         [
             {'a': 1, 'x': 111, 'y': 112},
             {'a': 1, 'x': 121, 'y': 122},
@@ -91,22 +102,226 @@ def gen_cartesian_product(*args):
             {'a': 2, 'x': 121, 'y': 122}
         ]
     """
-    if not args:
-        return []
-    elif len(args) == 1:
-        return args[0]
+    return CartesianProduct(*args)
+
+class CartesianProduct(object):
+    """ lazy cartesian product of parameter lists, merged dict of each item is
+        computed from its ordinal when accessed, thus product is never materialized.
+        supports len(), indexing, slicing, shard() and sample().
+    @param (list) args: parameter lists, other iterables are loaded into list.
+    """
+    def __init__(self, *args):
+        self.args = [
+            arg if isinstance(arg, (list, tuple)) else list(arg)
+            for arg in args
+        ]
+        # view of product ordinals: start + step * index, index in [0, count)
+        self.start = 0
+        self.step = 1
+        self.count = _product_size(self.args)
+
+    @property
+    def size(self):
+        """ items count, the same as len() but not limited to sys.maxsize.
+        """
+        return self.count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if self.start == 0 and self.step == 1 and self.count \
+                and self.count == _product_size(self.args):
+            return iter_cartesian_product(*self.args)
+
+        return self._iter_view()
+
+    def _iter_view(self):
+        index = 0
+        while index < self.count:
+            yield self._get_item(index)
+            index += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            return self._get_view(start, stop, step)
+
+        if not isinstance(index, integer_types):
+            raise TypeError("indices must be integers or slices, not {}".format(type(index)))
+
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("cartesian product index out of range")
+
+        return self._get_item(index)
+
+    def _get_item(self, index):
+        """ get merged dict of index in view, the last list varies fastest.
+        """
+        ordinal = self.start + self.step * index
+        items = []
+        for arg in reversed(self.args):
+            ordinal, arg_index = divmod(ordinal, len(arg))
+            items.append(arg[arg_index])
 
-    product_list = []
-    for product_item_tuple in itertools.product(*args):
         product_item_dict = {}
-        for item in product_item_tuple:
+        for item in reversed(items):
             product_item_dict.update(item)
 
-        product_list.append(product_item_dict)
+        return product_item_dict
+
+    def _get_view(self, start, stop, step):
+        if step > 0:
+            count = max(0, (stop - start + step - 1) // step)
+        else:
+            count = max(0, (start - stop - step - 1) // -step)
+
+        view = CartesianProduct()
+        view.args = self.args
+        view.start = self.start + self.step * start
+        view.step = self.step * step
+        view.count = count
+        return view
+
+    def shard(self, shard_index, shard_count):
+        """ deterministic shard of product, item N belongs to shard N % shard_count.
+        @return (CartesianProduct) lazy strided view of range(shard_index, len, shard_count)
+        """
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise exceptions.ParamsError(
+                "Invalid shard: {}/{}".format(shard_index, shard_count))
+
+        return self[shard_index::shard_count]
+
+    def sample(self, sample_size, seed=None):
+        """ random sample of product items without replacement,
+            only sampled items are computed.
+        @param (int) sample_size: sample size, all items are returned if it exceeds size
+        @param seed: random seed, the same seed always gets the same sample
+        @return (list) sampled items
+        """
+        sample_size = min(sample_size, self.count)
+        rng = random.Random(seed)
+        if self.count <= sys.maxsize:
+            indexes = rng.sample(range(self.count), sample_size)
+        else:
+            # random.sample takes len() of population, which is limited to sys.maxsize,
+            # sample size is far less than count here, thus collisions are rare.
+            indexes = []
+            sampled = set()
+            while len(indexes) < sample_size:
+                index = rng.randrange(self.count)
+                if index not in sampled:
+                    sampled.add(index)
+                    indexes.append(index)
+
+        return [self[index] for index in indexes]
+
+    def __eq__(self, other):
+        """ products are compared by parameter lists and view, without computing items;
+            list or tuple is compared item by item, and stops at the first difference.
+        """
+        if isinstance(other, CartesianProduct):
+            if self.count != other.count:
+                return False
+            if self.count == 0:
+                return True
+
+            return self.start == other.start \
+                and (self.step == other.step or self.count == 1) \
+                and len(self.args) == len(other.args) \
+                and all(
+                    _sequence_equal(arg, other_arg)
+                    for arg, other_arg in zip(self.args, other.args)
+                )
+
+        if isinstance(other, (list, tuple)):
+            return self.count == len(other) and _sequence_equal(self, other)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+
+        return not result
+
+    __hash__ = None
 
-    return product_list
+    def __repr__(self):
+        return "<CartesianProduct size={}>".format(self.count)
 
-def parse_parameters(parameters, testset_path=None):
+def _product_size(args):
+    if not args:
+        return 0
+
+    size = 1
+    for arg in args:
+        size *= len(arg)
+
+    return size
+
+def _sequence_equal(left, right):
+    if len(left) != len(right):
+        return False
+
+    return all(
+        left_item == right_item
+        for left_item, right_item in zip(left, right)
+    )
+
+# registered as Sequence, thus random.sample(product, k) works on it
+Sequence.register(CartesianProduct)
+
+def iter_cartesian_product(*args):
+    """ generate cartesian product for lists one by one, each item is merged dict.
+        the same as gen_cartesian_product, but product list is not materialized.
+        args could also be iterables, the first arg is streamed. re-iterable
+        parameters, e.g. LazyParameters, are streamed in any position: they are
+        iterated again for each item of former args instead of being loaded into
+        list. other iterables after the first are loaded once.
+    """
+    if not args:
+        return
+
+    args = [args[0]] + [
+        arg if isinstance(arg, (list, tuple, LazyParameters)) else list(arg)
+        for arg in args[1:]
+    ]
+
+    for product_item_dict in _iter_merged_product(args, 0):
+        yield product_item_dict
+
+def _iter_merged_product(args, index):
+    if index == len(args) - 1:
+        for item in args[index]:
+            yield dict(item)
+        return
+
+    for item in args[index]:
+        for rest_item_dict in _iter_merged_product(args, index + 1):
+            product_item_dict = dict(item)
+            product_item_dict.update(rest_item_dict)
+            yield product_item_dict
+
+class LazyParameters(object):
+    """ re-iterable parameters pulled from streaming source on demand,
+        each item is subset of source item by parameter names.
+        source is read again on each iteration, Random fetched csv rows are in
+        the same order each time, since source shuffles them with the same seed.
+    """
+    def __init__(self, source, parameter_name_list):
+        self.source = source
+        self.parameter_name_list = parameter_name_list
+
+    def __iter__(self):
+        for parameter_item in self.source:
+            yield {key: parameter_item[key] for key in self.parameter_name_list}
+
+def parse_parameters(parameters, testset_path=None, lazy=False):
     """ parse parameters and generate cartesian product
     @params
         (list) parameters: parameter name and value in list
@@ -121,9 +336,12 @@ def parse_parameters(parameters, testset_path=None):
                     {"app_version": "${gen_app_version()}"}
                 ]
         (str) testset_path: testset file path, used for locating csv file and debugtalk.py
+        (bool) lazy: if True, return iterator which generates cartesian product one by one
     @return cartesian product in list
     """
     testcase_parser = TestcaseParser(file_path=testset_path)
+    # csv files are streamed instead of being loaded into list
+    testcase_parser.stream_parameters = True
 
     parsed_parameters_list = []
     for parameter in parameters:
@@ -152,6 +370,15 @@ def parse_parameters(parameters, testset_path=None):
             parsed_parameter_content = testcase_parser.eval_content_with_bindings(parameter_content)
             # e.g. [{'app_version': '2.8.5'}, {'app_version': '2.8.6'}]
             # e.g. [{"username": "user1", "password": "111111"}, {"username": "user2", "password": "222222"}]
+            if isinstance(parsed_parameter_content, loader.CSVParameterSource):
+                # rows of csv file are streamed on demand
+                parameter_content_list = LazyParameters(parsed_parameter_content, parameter_name_list)
+                if not lazy:
+                    parameter_content_list = list(parameter_content_list)
+
+                parsed_parameters_list.append(parameter_content_list)
+                continue
+
             if not isinstance(parsed_parameter_content, list):
                 raise exceptions.ParamsError("parameters syntax error!")
 
@@ -163,14 +390,237 @@ def parse_parameters(parameters, testset_path=None):
 
         parsed_parameters_list.append(parameter_content_list)
 
+    if lazy:
+        return iter_cartesian_product(*parsed_parameters_list)
+
     return gen_cartesian_product(*parsed_parameters_list)
 
+class VariableSlot(object):
+    """ variable reference in string template, e.g. $var
+    """
+    def __init__(self, variable_name):
+        self.variable_name = variable_name
+
+    def render(self, testcase_parser):
+        return testcase_parser.get_bind_variable(self.variable_name)
+
+    def render_text(self, testcase_parser):
+        variable_value = self.render(testcase_parser)
+        if not isinstance(variable_value, str):
+            variable_value = builtin_str(variable_value)
+
+        return variable_value
+
+
+class FunctionSlot(object):
+    """ function call in string template, e.g. ${func($a, 1, b=2)}
+        args and kwargs are compiled templates.
+    """
+    def __init__(self, func_name, args, kwargs):
+        self.func_name = func_name
+        self.args = args
+        self.kwargs = kwargs
+
+    def render(self, testcase_parser):
+        args = [arg.render(testcase_parser) for arg in self.args]
+        kwargs = {
+            key: value.render(testcase_parser)
+            for key, value in self.kwargs.items()
+        }
+
+        if self.func_name in ["parameterize", "P"]:
+            return testcase_parser.parameterize(*args, **kwargs)
+
+        func = testcase_parser.get_bind_function(self.func_name)
+        return func(*args, **kwargs)
+
+    def render_text(self, testcase_parser):
+        return str(self.render(testcase_parser))
+
+
+class ConstantTemplate(object):
+    """ template without any variable or function reference.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def render(self, testcase_parser):
+        return copy_content(self.value)
+
+
+class StringTemplate(object):
+    """ pre-parsed string, consists of literal segments and variable/function slots.
+    """
+    def __init__(self, parts):
+        self.parts = parts
+
+    def render(self, testcase_parser):
+        if len(self.parts) == 1:
+            # content is a variable or function, keep evaluated value type
+            return self.parts[0].render(testcase_parser)
+
+        return "".join([
+            part if isinstance(part, basestring) else part.render_text(testcase_parser)
+            for part in self.parts
+        ])
+
+
+class ListTemplate(object):
+
+    def __init__(self, items):
+        self.items = items
+
+    def render(self, testcase_parser):
+        return [item.render(testcase_parser) for item in self.items]
+
+
+class DictTemplate(object):
+
+    def __init__(self, items):
+        self.items = items
+
+    def render(self, testcase_parser):
+        return {
+            key.render(testcase_parser): value.render(testcase_parser)
+            for key, value in self.items
+        }
+
+
+template_types = (ConstantTemplate, StringTemplate, ListTemplate, DictTemplate)
+
+
+def copy_content(content):
+    """ copy list/dict content recursively, tuple will be converted to list.
+        other types are immutable or should be shared, return as is.
+    """
+    if isinstance(content, (list, tuple)):
+        return [copy_content(item) for item in content]
+
+    if isinstance(content, dict):
+        return {
+            key: copy_content(value)
+            for key, value in content.items()
+        }
+
+    return content
+
+
+def _parse_string_parts(content):
+    """ split string content into literal segments and variable slots.
+    e.g. "/api/$uid?token=$token" => ["/api/", VariableSlot("uid"), "?token=", VariableSlot("token")]
+    """
+    parts = []
+    position = 0
+    for matched in variable_regexp_compile.finditer(content):
+        if matched.start() > position:
+            parts.append(content[position:matched.start()])
+        parts.append(VariableSlot(matched.group(1)))
+        position = matched.end()
+
+    if position < len(content):
+        parts.append(content[position:])
+
+    return parts
+
+
+def _compile_function_slot(func_content):
+    """ compile function content, e.g. "func($a, 1, b=2)"
+    """
+    function_meta = parser.parse_function(func_content)
+    return FunctionSlot(
+        function_meta["func_name"],
+        [compile_content(arg) for arg in function_meta.get("args", [])],
+        {
+            key: compile_content(value)
+            for key, value in function_meta.get("kwargs", {}).items()
+        }
+    )
+
+
+def compile_string(content):
+    """ compile string content to StringTemplate, the result is cached.
+    @param (str) content
+    @return
+        (str) stripped content if it has no variable or function reference
+        (StringTemplate) otherwise
+
+    e.g. "abc" => "abc"
+         "/api/$uid/${add(1, 2)}" => StringTemplate(["/api/", VariableSlot, "/", FunctionSlot])
+    """
+    if "$" not in content:
+        return content.strip()
+
+    compiled = compiled_templates_cache_mapping.get(content)
+    if compiled is not None:
+        return compiled
+
+    stripped_content = content.strip()
+
+    parts = []
+    position = 0
+    for matched in function_regexp_compile.finditer(stripped_content):
+        if matched.start() > position:
+            parts.extend(_parse_string_parts(stripped_content[position:matched.start()]))
+        parts.append(_compile_function_slot(matched.group(1)))
+        position = matched.end()
+
+    if position < len(stripped_content):
+        parts.extend(_parse_string_parts(stripped_content[position:]))
+
+    if any(isinstance(part, (VariableSlot, FunctionSlot)) for part in parts):
+        compiled = StringTemplate(parts)
+    else:
+        # $ without variable name, e.g. "price: $ 5"
+        compiled = stripped_content
+
+    if len(compiled_templates_cache_mapping) >= MAX_COMPILED_TEMPLATES:
+        compiled_templates_cache_mapping.clear()
+
+    compiled_templates_cache_mapping[content] = compiled
+    return compiled
+
+
+def compile_content(content):
+    """ compile content in any data structure into template, which can be rendered
+        repeatedly with TestcaseParser.eval_content_with_bindings.
+        content without any variable or function reference is compiled to ConstantTemplate.
+    """
+    if isinstance(content, template_types):
+        return content
+
+    if isinstance(content, basestring):
+        compiled = compile_string(content)
+        if isinstance(compiled, StringTemplate):
+            return compiled
+        return ConstantTemplate(compiled)
+
+    if isinstance(content, (list, tuple)):
+        items = [compile_content(item) for item in content]
+        if all(isinstance(item, ConstantTemplate) for item in items):
+            return ConstantTemplate([item.value for item in items])
+        return ListTemplate(items)
+
+    if isinstance(content, dict):
+        items = [
+            (compile_content(key), compile_content(value))
+            for key, value in content.items()
+        ]
+        if all(isinstance(key, ConstantTemplate) and isinstance(value, ConstantTemplate)
+               for key, value in items):
+            return ConstantTemplate({key.value: value.value for key, value in items})
+        return DictTemplate(items)
+
+    return ConstantTemplate(content)
+
+
 class TestcaseParser(object):
 
     def __init__(self, variables={}, functions={}, file_path=None):
         self.update_binded_variables(variables)
         self.bind_functions(functions)
         self.file_path = file_path
+        # parameterize returns streaming CSVParameterSource instead of list if True
+        self.stream_parameters = False
 
     def update_binded_variables(self, variables):
         """ bind variables to current testcase parser
@@ -226,81 +676,30 @@ class TestcaseParser(object):
     def get_bind_variable(self, variable_name):
         return self._get_bind_item("variable", variable_name)
 
-    def parameterize(self, csv_file_name, fetch_method="Sequential"):
+    def parameterize(self, csv_file_name, fetch_method="Sequential", shard_index=None, shard_count=None):
+        """ parameters from csv file.
+        @param (str) fetch_method: Sequential, Random or Sharded
+        @param (int) shard_index, shard_count: worker shard for Sharded fetch method
+        @return (list) csv rows, or re-iterable loader.CSVParameterSource reading
+            rows on demand if stream_parameters is True, e.g. in parse_parameters.
+        """
         parameter_file_path = os.path.join(
             os.path.dirname(self.file_path),
             "{}".format(csv_file_name)
         )
-        csv_content_list = loader.load_file(parameter_file_path)
-
-        if fetch_method.lower() == "random":
-            random.shuffle(csv_content_list)
-
-        return csv_content_list
-
-    def _eval_content_functions(self, content):
-        functions_list = extract_functions(content)
-        for func_content in functions_list:
-            function_meta = parser.parse_function(func_content)
-            func_name = function_meta['func_name']
-
-            args = function_meta.get('args', [])
-            kwargs = function_meta.get('kwargs', {})
-            args = self.eval_content_with_bindings(args)
-            kwargs = self.eval_content_with_bindings(kwargs)
-
-            if func_name in ["parameterize", "P"]:
-                eval_value = self.parameterize(*args, **kwargs)
-            else:
-                func = self.get_bind_function(func_name)
-                eval_value = func(*args, **kwargs)
-
-            func_content = "${" + func_content + "}"
-            if func_content == content:
-                # content is a variable
-                content = eval_value
-            else:
-                # content contains one or many variables
-                content = content.replace(
-                    func_content,
-                    str(eval_value), 1
-                )
-
-        return content
-
-    def _eval_content_variables(self, content):
-        """ replace all variables of string content with mapping value.
-        @param (str) content
-        @return (str) parsed content
-
-        e.g.
-            variable_mapping = {
-                "var_1": "abc",
-                "var_2": "def"
-            }
-            $var_1 => "abc"
-            $var_1#XYZ => "abc#XYZ"
-            /$var_1/$var_2/var3 => "/abc/def/var3"
-            ${func($var_1, $var_2, xyz)} => "${func(abc, def, xyz)}"
-        """
-        variables_list = parser.extract_variables(content)
-        for variable_name in variables_list:
-            variable_value = self.get_bind_variable(variable_name)
-
-            if "${}".format(variable_name) == content:
-                # content is a variable
-                content = variable_value
-            else:
-                # content contains one or several variables
-                if not isinstance(variable_value, str):
-                    variable_value = builtin_str(variable_value)
-
-                content = content.replace(
-                    "${}".format(variable_name),
-                    variable_value, 1
-                )
+        if not os.path.isfile(parameter_file_path):
+            raise exceptions.FileNotFound("{} does not exist.".format(parameter_file_path))
+
+        parameter_source = loader.CSVParameterSource(
+            parameter_file_path,
+            fetch_method,
+            shard_index,
+            shard_count
+        )
+        if self.stream_parameters:
+            return parameter_source
 
-        return content
+        return list(parameter_source)
 
     def eval_content_with_bindings(self, content):
         """ parse content recursively, each variable and function in content will be evaluated.
@@ -329,10 +728,15 @@ class TestcaseParser(object):
                 },
                 "body": {"name": "user", "password": "123456"}
             }
+            content could also be template compiled with compile_content,
+            which will be rendered directly without parsing.
         """
         if content is None:
             return None
 
+        if isinstance(content, template_types):
+            return content.render(self)
+
         if isinstance(content, (list, tuple)):
             return [
                 self.eval_content_with_bindings(item)
@@ -349,15 +753,10 @@ class TestcaseParser(object):
             return evaluated_data
 
         if isinstance(content, basestring):
-
             # content is in string format here
-            content = content.strip()
-
-            # replace functions with evaluated value
-            # Notice: _eval_content_functions must be called before _eval_content_variables
-            content = self._eval_content_functions(content)
-
-            # replace variables with binding value
-            content = self._eval_content_variables(content)
+            # string is compiled only once, variables and functions are evaluated on rendering
+            content = compile_string(content)
+            if isinstance(content, StringTemplate):
+                content = content.render(self)
 
         return content
@@ -63,27 +63,50 @@ def query_json(json_content, query, delimiter='.'):
         "person.cities.0"         =>  "Guangzhou"
     @return queried result
     """
-    raise_flag = False
-    response_body = u"response body: {}\n".format(json_content)
     try:
-        for key in query.split(delimiter):
-            if isinstance(json_content, (list, basestring)):
-                json_content = json_content[int(key)]
-            elif isinstance(json_content, dict):
-                json_content = json_content[key]
-            else:
-                logger.log_error(
-                    "invalid type value: {}({})".format(json_content, type(json_content)))
-                raise_flag = True
-    except (KeyError, ValueError, IndexError):
-        raise_flag = True
-
-    if raise_flag:
+        return walk_json(json_content, parse_json_query(query, delimiter))
+    except (KeyError, ValueError, IndexError, TypeError):
+        # error message with the whole content is only built on failure
         err_msg = u"Failed to extract! => {}\n".format(query)
-        err_msg += response_body
+        err_msg += u"response body: {}\n".format(json_content)
         logger.log_error(err_msg)
         raise exceptions.ExtractFailure(err_msg)
 
+def parse_json_query(query, delimiter='.'):
+    """ parse query into tuple of steps, which could be reused to walk json content.
+    @param (str) query: "person.cities.0"
+    @return (tuple) steps, each step is a tuple of key and index,
+        index is None if key can not be converted to integer.
+        (("person", None), ("cities", None), ("0", 0))
+    """
+    steps = []
+    for key in query.split(delimiter):
+        try:
+            index = int(key)
+        except ValueError:
+            index = None
+        steps.append((key, index))
+
+    return tuple(steps)
+
+def walk_json(json_content, steps):
+    """ walk json content with steps parsed by parse_json_query.
+    @return queried result
+        KeyError/IndexError is raised if key or index not found,
+        ValueError is raised if key is not integer for list/string,
+        TypeError is raised if value is not dict/list/string.
+    """
+    for key, index in steps:
+        if isinstance(json_content, (list, basestring)):
+            if index is None:
+                raise ValueError(key)
+            json_content = json_content[index]
+        elif isinstance(json_content, dict):
+            json_content = json_content[key]
+        else:
+            raise TypeError(
+                "invalid type value: {}({})".format(json_content, type(json_content)))
+
     return json_content
 
 
@@ -285,37 +308,35 @@ def _override_block(def_block, current_block):
     )
 
 
+comparator_aliases = {
+    "equals": ["eq", "equals", "==", "is"],
+    "less_than": ["lt", "less_than"],
+    "less_than_or_equals": ["le", "less_than_or_equals"],
+    "greater_than": ["gt", "greater_than"],
+    "greater_than_or_equals": ["ge", "greater_than_or_equals"],
+    "not_equals": ["ne", "not_equals"],
+    "string_equals": ["str_eq", "string_equals"],
+    "length_equals": ["len_eq", "length_equals", "count_eq"],
+    "length_greater_than": [
+        "len_gt", "count_gt", "length_greater_than", "count_greater_than"],
+    "length_greater_than_or_equals": [
+        "len_ge", "count_ge", "length_greater_than_or_equals", "count_greater_than_or_equals"],
+    "length_less_than": [
+        "len_lt", "count_lt", "length_less_than", "count_less_than"],
+    "length_less_than_or_equals": [
+        "len_le", "count_le", "length_less_than_or_equals", "count_less_than_or_equals"]
+}
+# dispatch table from comparator alias to uniform name
+uniform_comparator_mapping = {
+    alias: uniform_name
+    for uniform_name, aliases in comparator_aliases.items()
+    for alias in aliases
+}
+
 def get_uniform_comparator(comparator):
     """ convert comparator alias to uniform name
     """
-    if comparator in ["eq", "equals", "==", "is"]:
-        return "equals"
-    elif comparator in ["lt", "less_than"]:
-        return "less_than"
-    elif comparator in ["le", "less_than_or_equals"]:
-        return "less_than_or_equals"
-    elif comparator in ["gt", "greater_than"]:
-        return "greater_than"
-    elif comparator in ["ge", "greater_than_or_equals"]:
-        return "greater_than_or_equals"
-    elif comparator in ["ne", "not_equals"]:
-        return "not_equals"
-    elif comparator in ["str_eq", "string_equals"]:
-        return "string_equals"
-    elif comparator in ["len_eq", "length_equals", "count_eq"]:
-        return "length_equals"
-    elif comparator in ["len_gt", "count_gt", "length_greater_than", "count_greater_than"]:
-        return "length_greater_than"
-    elif comparator in ["len_ge", "count_ge", "length_greater_than_or_equals", \
-        "count_greater_than_or_equals"]:
-        return "length_greater_than_or_equals"
-    elif comparator in ["len_lt", "count_lt", "length_less_than", "count_less_than"]:
-        return "length_less_than"
-    elif comparator in ["len_le", "count_le", "length_less_than_or_equals", \
-        "count_less_than_or_equals"]:
-        return "length_less_than_or_equals"
-    else:
-        return comparator
+    return uniform_comparator_mapping.get(comparator, comparator)
 
 def deep_update_dict(origin_dict, override_dict):
     """ update origin dict with override dict recursively
@@ -390,6 +411,68 @@ def filter_module(module, filter_type):
     module_functions_dict = dict(filter(filter_type, vars(module).items()))
     return module_functions_dict
 
+# debugtalk.py items cache, {file_path: (mtime, {"function": {}, "variable": {}})}
+debugtalk_items_cache_mapping = {}
+# debugtalk.py search chain cache, {dir_path: [debugtalk_file_path, ...]}
+debugtalk_search_chain_mapping = {}
+
+
+def get_debugtalk_search_chain(start_path):
+    """ get all debugtalk.py file paths recursive upward, nearest first.
+        the search chain is memoized per start directory.
+    @param
+        start_path: search start path
+    """
+    dir_path = os.path.dirname(os.path.abspath(start_path))
+    if dir_path in debugtalk_search_chain_mapping:
+        return debugtalk_search_chain_mapping[dir_path]
+
+    search_chain = []
+    current_dir = dir_path
+    while True:
+        target_file = os.path.join(current_dir, "debugtalk.py")
+        if os.path.isfile(target_file):
+            search_chain.append(target_file)
+
+        parent_dir = os.path.dirname(current_dir)
+        if parent_dir == current_dir:
+            # system root path
+            break
+
+        current_dir = parent_dir
+
+    debugtalk_search_chain_mapping[dir_path] = search_chain
+    return search_chain
+
+def load_debugtalk_items(file_path):
+    """ load functions and variables from debugtalk.py.
+        each file is imported only once, unless it is modified.
+    @return
+        {
+            "function": {...},
+            "variable": {...}
+        }
+    """
+    mtime = os.path.getmtime(file_path)
+    cached = debugtalk_items_cache_mapping.get(file_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    imported_module = get_imported_module_from_file(file_path)
+    debugtalk_items = {
+        "function": filter_module(imported_module, "function"),
+        "variable": filter_module(imported_module, "variable")
+    }
+    debugtalk_items_cache_mapping[file_path] = (mtime, debugtalk_items)
+    return debugtalk_items
+
+def clear_debugtalk_cache():
+    """ invalidate cached debugtalk.py items and search chains,
+        e.g. debugtalk.py is created or removed during running.
+    """
+    debugtalk_items_cache_mapping.clear()
+    debugtalk_search_chain_mapping.clear()
+
 def search_conf_item(start_path, item_type, item_name):
     """ search expected function or variable recursive upward
     @param
@@ -397,26 +480,16 @@ def search_conf_item(start_path, item_type, item_name):
         item_type: "function" or "variable"
         item_name: function name or variable name
     """
-    dir_path = os.path.dirname(os.path.abspath(start_path))
-    target_file = os.path.join(dir_path, "debugtalk.py")
-
-    if os.path.isfile(target_file):
-        imported_module = get_imported_module_from_file(target_file)
-        items_dict = filter_module(imported_module, item_type)
+    for target_file in get_debugtalk_search_chain(start_path):
+        items_dict = load_debugtalk_items(target_file)[item_type]
         if item_name in items_dict:
             return items_dict[item_name]
-        else:
-            return search_conf_item(dir_path, item_type, item_name)
-
-    if dir_path == start_path:
-        # system root path
-        err_msg = "{} not found in recursive upward path!".format(item_name)
-        if item_type == "function":
-            raise exceptions.FunctionNotFound(err_msg)
-        else:
-            raise exceptions.VariableNotFound(err_msg)
 
-    return search_conf_item(dir_path, item_type, item_name)
+    err_msg = "{} not found in recursive upward path!".format(item_name)
+    if item_type == "function":
+        raise exceptions.FunctionNotFound(err_msg)
+    else:
+        raise exceptions.VariableNotFound(err_msg)
 
 def lower_dict_keys(origin_dict):
     """ convert keys in dict to lower case
@@ -510,7 +583,7 @@ def override_variables_binds(variables, new_mapping):
 
 def print_output(outputs):
 
-    if not outputs:
+    if not outputs or not logger.log_enabled("debug"):
         return
 
     content = "\n================== Variables & Output ==================\n"
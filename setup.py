@@ -84,7 +84,9 @@ setup(
     },
     keywords='HTTP api test requests locust',
     install_requires=install_requires,
-    extras_require={},
+    extras_require={
+        "asyncio": ["aiohttp"]
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         'Programming Language :: Python :: 2.7',
@@ -0,0 +1,148 @@
+import asyncio
+import datetime
+import unittest
+
+from httprunner.client import HttpSession
+from requests import Request, Response
+from tests.base import ApiServerUnittest
+
+try:
+    from httprunner import async_runner
+except (ImportError, SyntaxError):
+    # aiohttp is not installed or Python 2
+    async_runner = None
+
+
+@unittest.skipIf(async_runner is None, "Python 3.5+ is required")
+class TestAsyncRunnerFakeSession(unittest.TestCase):
+    """ run async tests with awaitable fake session, aiohttp is not required.
+    """
+    def setUp(self):
+        class FakeAsyncHttpSession(HttpSession):
+
+            async def request(self, method, url, name=None, **kwargs):
+                self._record_request(method, url, kwargs)
+                await asyncio.sleep(0)
+                response = Response()
+                response.status_code = 200
+                response.reason = "OK"
+                response.url = self._build_url(url)
+                response.request = Request(method, response.url).prepare()
+                response.elapsed = datetime.timedelta(seconds=0)
+                response.headers["Content-Type"] = "application/json"
+                response._content = b'{"token": "abc"}'
+                self._record_response(response, kwargs)
+                return response
+
+            async def aclose(self):
+                pass
+
+        class FakeAsyncRunner(async_runner.AsyncRunner):
+            http_session_class = FakeAsyncHttpSession
+
+        class FakeAsyncTestSuite(async_runner.AsyncTestSuite):
+            runner_class = FakeAsyncRunner
+
+        self.test_suite_class = FakeAsyncTestSuite
+        self.testset = {
+            "config": {"name": "fake", "request": {"base_url": "http://127.0.0.1:5000"}},
+            "testcases": [
+                {
+                    "name": "get token",
+                    "request": {"url": "/api/get-token", "method": "POST"},
+                    "extract": [{"token": "content.token"}],
+                    "validate": [{"eq": ["status_code", 200]}, {"len_eq": ["$token", 3]}]
+                },
+                {
+                    "name": "use token",
+                    "request": {"url": "/api/users/$token", "method": "GET"},
+                    "validate": [{"eq": ["content.token", "$token"]}]
+                }
+            ]
+        }
+
+    def run_suite(self, compile_tests):
+        test_suite = self.test_suite_class(self.testset)
+        result = unittest.TestResult()
+
+        async def run():
+            for test in test_suite:
+                if compile_tests:
+                    test.compile()
+                    self.assertIsNotNone(test.compiled_testcase)
+                await async_runner.run_test_async(test, result)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.failures, [])
+        self.assertEqual(result.testsRun, 2)
+        return test_suite
+
+    def test_run_test(self):
+        test_suite = self.run_suite(compile_tests=False)
+        test = list(test_suite)[-1]
+        self.assertEqual(
+            test.meta_data["request"]["url"],
+            "http://127.0.0.1:5000/api/users/abc"
+        )
+
+    def test_run_compiled_test(self):
+        self.run_suite(compile_tests=True)
+
+
+@unittest.skipIf(
+    async_runner is None or async_runner.aiohttp is None,
+    "aiohttp is not installed"
+)
+class TestAsyncRunner(ApiServerUnittest):
+
+    def setUp(self):
+        self.testset_path = "tests/data/demo_testset_cli.yml"
+        self.reset_all()
+
+    def reset_all(self):
+        url = "%s/api/reset-all" % self.host
+        headers = self.get_authenticated_headers()
+        return self.api_client.get(url, headers=headers)
+
+    def test_async_http_session_request(self):
+        session = async_runner.AsyncHttpSession(self.host)
+
+        async def request():
+            try:
+                return await session.request("GET", "/")
+            finally:
+                await session.aclose()
+
+        loop = asyncio.new_event_loop()
+        try:
+            resp = loop.run_until_complete(request())
+        finally:
+            loop.close()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.text, "Hello World!")
+        self.assertEqual(session.meta_data["response"]["status_code"], 200)
+        self.assertEqual(session.meta_data["request"]["url"], "{}/".format(self.host))
+
+    def test_async_run_testsets(self):
+        testset_paths = [self.testset_path, "tests/httpbin/load_image.yml"]
+        runner = async_runner.AsyncHttpRunner().run(testset_paths)
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(summary["stat"]["testsRun"], 10 + 4)
+        self.assertEqual(summary["stat"]["skipped"], 4)
+        self.assertEqual(len(summary["details"]), 2)
+        self.assertIn("records", summary["details"][0])
+
+    def test_async_run_testset_lazy(self):
+        runner = async_runner.AsyncHttpRunner(lazy=True, concurrency=1).run(self.testset_path)
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(summary["stat"]["testsRun"], 10)
+        self.assertEqual(summary["stat"]["skipped"], 4)
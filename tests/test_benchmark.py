@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from httprunner import benchmark, loader, runner
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_stub_http_session(self):
+        session = benchmark.StubHttpSession("http://benchmark.stub")
+        resp = session.post("/api/users/1000", json={"name": "user1"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["json"], {"name": "user1"})
+        self.assertEqual(resp.json()["url"], "http://benchmark.stub/api/users/1000")
+        self.assertEqual(len(resp.json()["data"]["token"]), 16)
+
+    def test_phase_timer(self):
+        load_testcases = loader.load_testcases
+        phase_timer = benchmark.PhaseTimer()
+        with phase_timer:
+            self.assertIsNot(loader.load_testcases, load_testcases)
+            loader.load_testcases("benchmarks/demo_regex_headers.yml")
+
+        self.assertIs(loader.load_testcases, load_testcases)
+        self.assertEqual(phase_timer.calls["load"], 1)
+        self.assertGreater(phase_timer.durations["load"], 0)
+
+    def test_phase_timer_recursive_function(self):
+        phase_timer = benchmark.PhaseTimer()
+        with phase_timer:
+            # folder is loaded by calling load_testcases for each file
+            loader.load_testcases(benchmark.benchmarks_dir)
+
+        # recursive calls are timed once
+        self.assertEqual(phase_timer.calls["load"], 1)
+        self.assertGreater(phase_timer.durations["load"], 0)
+
+    def test_default_baseline(self):
+        baseline = benchmark.load_baseline(benchmark.default_baseline_path)
+        self.assertEqual(list(baseline["phases"].keys()), benchmark.PHASES)
+
+    def test_run_benchmark(self):
+        result = benchmark.run_benchmark("benchmarks", rounds=1)
+        self.assertEqual(result["tests"], 20 * 2 + 10)
+        self.assertGreater(result["ops_per_sec"], 0)
+        self.assertEqual(list(result["phases"].keys()), benchmark.PHASES)
+        self.assertEqual(result["phases"]["request"]["calls"], 50)
+        self.assertEqual(result["phases"]["validate"]["calls"], 50)
+        self.assertIs(runner.Runner.http_session_class, runner.HttpSession)
+
+    def test_compare_with_baseline(self):
+        baseline = {
+            "ops_per_sec": 1000,
+            "peak_memory_kb": 1024,
+            "phases": {
+                "parse": {"per_test_ms": 0.1},
+                "request": {"per_test_ms": 0.5}
+            }
+        }
+        result = {
+            "ops_per_sec": 700,
+            "peak_memory_kb": 1100,
+            "phases": {
+                "parse": {"per_test_ms": 0.2},
+                "request": {"per_test_ms": 0.55}
+            }
+        }
+        regressions = benchmark.compare_with_baseline(result, baseline, 0.2)
+        self.assertEqual(
+            regressions,
+            [
+                ("ops_per_sec", 1000, 700),
+                ("parse.per_test_ms", 0.1, 0.2)
+            ]
+        )
+
+    def test_save_and_load_baseline(self):
+        baseline_dir = tempfile.mkdtemp()
+        try:
+            baseline_path = os.path.join(baseline_dir, "benchmarks", "baseline.json")
+            self.assertIsNone(benchmark.load_baseline(baseline_path))
+
+            result = {"ops_per_sec": 1000, "phases": {}}
+            benchmark.save_baseline(result, baseline_path)
+            self.assertEqual(benchmark.load_baseline(baseline_path), result)
+        finally:
+            shutil.rmtree(baseline_dir)
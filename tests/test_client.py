@@ -1,6 +1,10 @@
+from datetime import timedelta
+
+from httprunner import client
 from httprunner.built_in import setup_hook_prepare_kwargs
-from httprunner.client import HttpSession
+from httprunner.client import HttpSession, get_response_body
 from httprunner.compat import bytes
+from httprunner.exceptions import ParamsError
 from tests.base import ApiServerUnittest
 
 
@@ -39,6 +43,110 @@ class TestHttpClient(ApiServerUnittest):
         self.assertEqual(201, resp.status_code)
         self.assertEqual(True, resp.json()['success'])
 
+    def test_response_body_decoded_lazily_once(self):
+        resp = self.api_client.get("/api/users", headers=self.headers)
+        body = self.api_client.meta_data["response"]["body"]
+        self.assertIs(body, get_response_body(resp))
+        self.assertIsNone(body._json)
+        self.assertIsNot(body.response, resp)
+
+        self.assertTrue(body.json()["success"])
+        self.assertIs(body.json(), body.json())
+
+    def test_response_meta_data_lazy_views(self):
+        self.api_client.get("/api/users", headers=self.headers)
+        response = self.api_client.meta_data["response"]
+        body = response["body"]
+        self.assertIsNone(body._json)
+        self.assertIn("json", response)
+        self.assertIn("text", response)
+
+        self.assertIs(response["json"], body.json())
+        self.assertTrue(response.get("json")["success"])
+        self.assertEqual(response["text"], body.text)
+        self.assertIsNone(response.get("unknown"))
+
+    def test_response_body_not_json(self):
+        resp = self.api_client.get("/")
+        body = get_response_body(resp)
+        self.assertEqual(body.text, "Hello World!")
+        self.assertIsNone(body.json_or_none())
+        with self.assertRaises(ValueError):
+            body.json()
+
+    def test_request_timings(self):
+        session = HttpSession(self.host)
+        session.get("/api/users", headers=self.headers)
+        timings = session.meta_data["timings"]
+        self.assertIn("dns", timings)
+        self.assertIn("connect", timings)
+        self.assertIn("ttfb", timings)
+        self.assertIn("download", timings)
+
+    def test_request_timings_resolve_host(self):
+        # localhost may be resolved to several addresses, e.g. ::1 and 127.0.0.1,
+        # addresses are connected in turn until connected
+        session = HttpSession(self.host.replace("127.0.0.1", "localhost"))
+        resp = session.get("/")
+        self.assertEqual(resp.text, "Hello World!")
+        timings = session.meta_data["timings"]
+        self.assertIn("dns", timings)
+        self.assertIn("connect", timings)
+
+    def test_timed_connection_keeps_host(self):
+        port = int(self.host.rsplit(":", 1)[1])
+        connection = client.TimedHTTPConnection("localhost", port)
+        client.connection_timings.timings = timings = {}
+        try:
+            sock = connection._new_conn()
+            sock.close()
+        finally:
+            client.connection_timings.timings = None
+
+        self.assertEqual(sorted(timings.keys()), ["connect", "dns"])
+        # host is resolved again when connection is re-established
+        self.assertEqual(connection._dns_host, "localhost")
+
+    def test_elapsed_ms_longer_than_one_second(self):
+        resp = self.api_client.get("/api/users", headers=self.headers)
+        resp.elapsed = timedelta(seconds=1, microseconds=500000)
+        self.api_client._record_request("GET", "/api/users", {})
+        self.api_client._record_response(resp, {})
+        self.assertEqual(self.api_client.meta_data["response"]["elapsed_ms"], 1500.0)
+
+    def test_connection_pool_settings(self):
+        session = HttpSession(self.host, connection_pool={
+            "pool_maxsize": 50,
+            "max_retries": 2,
+            "keep_alive": False
+        })
+        adapter = session.get_adapter(self.host)
+        self.assertEqual(adapter._pool_maxsize, 50)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIs(session.get_adapter("https://httpbin.org"), adapter)
+        self.assertEqual(session.headers["Connection"], "close")
+
+        resp = session.get("/api/users", headers=self.headers)
+        self.assertEqual(200, resp.status_code)
+
+        with self.assertRaises(ParamsError):
+            HttpSession(self.host, connection_pool={"maxsize": 50})
+
+    def test_connection_pool_shared(self):
+        connection_pool = {"pool_maxsize": 20, "shared": True}
+        session1 = HttpSession(self.host, connection_pool=connection_pool)
+        session2 = HttpSession(self.host, connection_pool=connection_pool)
+        adapter = session1.get_adapter(self.host)
+        self.assertIs(session2.get_adapter(self.host), adapter)
+        self.assertIsNot(self.api_client.get_adapter(self.host), adapter)
+
+        session1.get("/api/users", headers=self.headers)
+        session1.close()
+        # shared connection pool is not closed with session
+        self.assertEqual(len(adapter.poolmanager.pools), 1)
+        resp = session2.get("/api/users", headers=self.headers)
+        self.assertEqual(200, resp.status_code)
+
     def test_prepare_kwargs_content_type_application_json_without_charset(self):
         request = {
             "url": "/path",
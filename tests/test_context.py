@@ -2,7 +2,8 @@ import os
 import time
 
 import requests
-from httprunner import exceptions, loader, response, runner, testcase
+from httprunner import (built_in, context, exceptions, loader, response, runner,
+                        testcase, utils)
 from httprunner.context import Context
 from httprunner.utils import gen_md5
 from tests.base import ApiServerUnittest
@@ -75,6 +76,68 @@ class VariableBindsUnittest(ApiServerUnittest):
             self.assertIn("token", testcase_variables)
             self.assertEqual(testcase_variables["token"], "debugtalk")
 
+    def test_context_testcase_scope_isolated(self):
+        variables = [
+            {"TOKEN": "debugtalk"},
+            {"data": {"name": "user"}}
+        ]
+        self.context.bind_variables(variables, level="testset")
+
+        self.context.init_context("testcase")
+        self.context.bind_variables([{"TOKEN": "abc"}, {"data": {"name": "changed"}}])
+        self.assertEqual(self.context.eval_content("$TOKEN"), "abc")
+        self.assertEqual(self.context.eval_content("$data"), {"name": "changed"})
+
+        # testcase can not change testset variables
+        testset_variables = self.context.testset_shared_variables_mapping
+        self.assertEqual(testset_variables["TOKEN"], "debugtalk")
+        self.assertEqual(testset_variables["data"], {"name": "user"})
+
+        self.context.init_context("testcase")
+        self.assertEqual(self.context.eval_content("$TOKEN"), "debugtalk")
+        self.assertEqual(self.context.eval_content("$data"), {"name": "user"})
+
+    def test_scope_keys(self):
+        root = context.Scope()
+        root.update({"a": 1, "b": 2})
+        child = root.new_child()
+        child.update({"b": 3, "c": 4})
+        grandchild = child.new_child()
+        grandchild["d"] = 5
+        grandchild["a"] = 6
+
+        self.assertEqual(grandchild.keys(), ["a", "b", "c", "d"])
+        self.assertEqual(len(grandchild), 4)
+        self.assertEqual(
+            grandchild.items(),
+            [("a", 6), ("b", 3), ("c", 4), ("d", 5)]
+        )
+        self.assertEqual(root.keys(), ["a", "b"])
+
+    def test_context_function_modify_inherited_variable(self):
+        def add_item(data):
+            data["items"].append(3)
+            data["name"] = "changed"
+            return len(data["items"])
+
+        self.context.bind_functions({"add_item": add_item}, level="testset")
+        self.context.bind_variables(
+            [{"data": {"name": "user", "items": [1, 2]}}], level="testset")
+
+        self.context.init_context("testcase")
+        self.assertEqual(self.context.eval_content("${add_item($data)}"), 3)
+        self.assertEqual(
+            self.context.eval_content("$data"),
+            {"name": "changed", "items": [1, 2, 3]}
+        )
+
+        # inherited dict is copied into testcase scope before being modified
+        testset_variables = self.context.testset_shared_variables_mapping
+        self.assertEqual(testset_variables["data"], {"name": "user", "items": [1, 2]})
+
+        self.context.init_context("testcase")
+        self.assertEqual(self.context.eval_content("${add_item($data)}"), 3)
+
     def test_context_bind_lambda_functions(self):
         function_binds = {
             "add_one": lambda x: x + 1,
@@ -237,6 +300,91 @@ class VariableBindsUnittest(ApiServerUnittest):
 
         self.context.validate(validators, resp_obj)
 
+    def test_compile_validators(self):
+        validators = context.compile_validators([
+            {"eq": ["status_code", 200]},
+            {"check": "headers.Content-Type", "comparator": "str_eq", "expect": "text/html"},
+            {"len_gt": ["content.data", 0]},
+            {"eq": ["LB(.*)RB", "abc"]},
+            {"eq": ["$resp_status_code", "$expect_status_code"]},
+            {"eq": ["cookies.token", "abc"]}
+        ])
+        self.assertEqual(
+            [validator.check_kind for validator in validators],
+            ["status_code", "extractor", "extractor", "extractor", "template", "extractor"]
+        )
+        self.assertEqual(validators[1].uniform_comparator, "string_equals")
+        self.assertIs(validators[0].comparator_func, built_in.equals)
+        self.assertIs(context.compile_validators(validators)[0], validators[0])
+
+        with self.assertRaises(exceptions.ParamsError):
+            context.compile_validators([{"eq": ["status_code"]}])
+        # check item should be string, dict or list
+        with self.assertRaises(exceptions.ParamsError):
+            context.compile_validators([{"eq": [200, 200]}])
+
+    def test_validate_compiled_without_comparator_lookup(self):
+        url = "http://127.0.0.1:5000/"
+        resp_obj = response.ResponseObject(requests.get(url))
+        validators = context.compile_validators([
+            {"eq": ["status_code", 200]},
+            {"check": "$resp_body", "comparator": "==", "expect": None}
+        ])
+        self.context.bind_variables([{"resp_body": None}])
+
+        lookups = []
+        get_uniform_comparator = utils.get_uniform_comparator
+
+        def counting_get_uniform_comparator(comparator):
+            lookups.append(comparator)
+            return get_uniform_comparator(comparator)
+
+        utils.get_uniform_comparator = counting_get_uniform_comparator
+        try:
+            self.context.validate(validators, resp_obj)
+        finally:
+            utils.get_uniform_comparator = get_uniform_comparator
+
+        # comparators are resolved at compile time
+        self.assertEqual(lookups, [])
+
+    def test_validate_with_bound_comparator_override(self):
+        url = "http://127.0.0.1:5000/"
+        resp = requests.get(url)
+        resp_obj = response.ResponseObject(resp)
+        validators = context.compile_validators([{"eq": ["status_code", 201]}])
+
+        with self.assertRaises(exceptions.ValidationFailure):
+            self.context.validate(validators, resp_obj)
+
+        def equals(check_value, expect_value):
+            assert check_value // 100 == expect_value // 100
+
+        self.context.bind_functions({"equals": equals})
+        self.context.validate(validators, resp_obj)
+        self.assertEqual(self.context.evaluated_validators[0]["check_result"], "pass")
+
+    def test_validate_compiled_validators(self):
+        url = "http://127.0.0.1:5000/"
+        resp = requests.get(url)
+        resp_obj = response.ResponseObject(resp)
+        validators = context.compile_validators([
+            {"eq": ["status_code", "$expect_status_code"]},
+            {"check": "${is_status_code_200(200)}", "comparator": "eq", "expect": True}
+        ])
+        from tests.debugtalk import is_status_code_200
+        self.context.bind_functions({"is_status_code_200": is_status_code_200})
+
+        self.context.bind_variables([{"expect_status_code": 200}])
+        self.context.validate(validators, resp_obj)
+        self.assertEqual(self.context.evaluated_validators[0]["check_value"], 200)
+        self.assertEqual(self.context.evaluated_validators[0]["check_result"], "pass")
+
+        self.context.bind_variables([{"expect_status_code": 201}])
+        with self.assertRaises(exceptions.ValidationFailure):
+            self.context.validate(validators, resp_obj)
+        self.assertEqual(self.context.evaluated_validators[0]["check_result"], "fail")
+
     def test_validate_exception(self):
         url = "http://127.0.0.1:5000/"
         resp = requests.get(url)
@@ -1,7 +1,13 @@
+import copy
+import io
+import logging
 import os
 import shutil
+import threading
 
-from httprunner import HttpRunner
+from httprunner import HttpRunner, exceptions, loader, utils
+from httprunner.compat import StringIO
+from httprunner.report import load_records
 from tests.base import HTTPBIN_SERVER, ApiServerUnittest
 
 
@@ -67,6 +73,10 @@ class TestHttpRunner(ApiServerUnittest):
         runner = HttpRunner().run(self.testset_path)
         self.assertEqual(runner.summary["stat"]["testsRun"], 10)
 
+    def test_text_run_times_lazy(self):
+        runner = HttpRunner(lazy=True).run(self.testset_path)
+        self.assertEqual(runner.summary["stat"]["testsRun"], 10)
+
     def test_text_skip(self):
         runner = HttpRunner().run(self.testset_path)
         self.assertEqual(runner.summary["stat"]["skipped"], 4)
@@ -83,6 +93,49 @@ class TestHttpRunner(ApiServerUnittest):
         report_save_dir = os.path.join(os.getcwd(), 'reports', output_folder_name)
         shutil.rmtree(report_save_dir)
 
+    def test_run_testsets_timings(self):
+        runner = HttpRunner().run([self.testset])
+        suite_summary = runner.summary["details"][0]
+        timings = suite_summary["records"][0]["meta_data"]["timings"]
+        self.assertEqual(
+            list(timings.keys()),
+            ["template", "setup_hooks", "connect", "ttfb", "download", "extract", "validate"]
+        )
+
+        testcase_timings = suite_summary["timings"]["/api/get-token"]
+        self.assertEqual(testcase_timings["ttfb"]["count"], 1)
+        self.assertEqual(testcase_timings["ttfb"]["mean_ms"], timings["ttfb"])
+        self.assertIn("validate", suite_summary["timings"]["/api/users/1000"])
+
+        report = runner.gen_html_report(html_report_name="timings")
+        with io.open(report, encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("ttfb(ms)", content)
+        self.assertIn("Timings of Testcases", content)
+        shutil.rmtree(os.path.join(os.getcwd(), "reports", "timings"))
+
+    def test_run_testsets_latency(self):
+        runner = HttpRunner().run([self.testset, self.testset])
+        summary = runner.summary
+        suite_latency = summary["details"][0]["latency"]
+        self.assertEqual(suite_latency["testcases"]["/api/get-token"]["count"], 1)
+        self.assertIn(
+            "POST http://127.0.0.1:5000/api/get-token",
+            suite_latency["groups"]
+        )
+
+        # histograms of suites are merged
+        latency_summary = summary["latency"]["testcases"]["/api/get-token"]
+        self.assertEqual(latency_summary["count"], 2)
+        self.assertLessEqual(latency_summary["p50"], latency_summary["max"])
+        self.assertGreater(latency_summary["throughput"], 0)
+
+        report = runner.gen_html_report(html_report_name="latency")
+        with io.open(report, encoding="utf-8") as f:
+            content = f.read()
+        self.assertIn("P99(ms)", content)
+        shutil.rmtree(os.path.join(os.getcwd(), "reports", "latency"))
+
     def test_run_testsets(self):
         testsets = [self.testset]
         runner = HttpRunner().run(testsets)
@@ -92,6 +145,108 @@ class TestHttpRunner(ApiServerUnittest):
         self.assertIn("details", summary)
         self.assertIn("records", summary["details"][0])
 
+    def _get_worker_testsets(self):
+        """ testsets run concurrently, each with its own device_sn and user id.
+        """
+        testsets = []
+        for index in range(2):
+            testset = copy.deepcopy(
+                loader.load_testcases("tests/data/demo_testset_worker.yml")[0])
+            testset["config"]["variables"] = utils.override_variables_binds(
+                testset["config"]["variables"],
+                {"device_sn": "WORKER{}DEVICESN".format(index), "uid": 2000 + index}
+            )
+            testset["name"] = testset["config"]["name"]
+            testsets.append(testset)
+
+        return testsets
+
+    def test_run_testsets_with_thread_workers(self):
+        stream = StringIO()
+        runner = HttpRunner(workers=2, stream=stream).run(self._get_worker_testsets())
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(summary["stat"]["testsRun"], 3 * 2)
+        self.assertEqual(len(summary["details"]), 2)
+        self.assertIn("records", summary["details"][0])
+
+        # output of each testset is not interleaved
+        test_names = [
+            line for line in stream.getvalue().splitlines()
+            if "user" in line or "token" in line
+        ]
+        self.assertEqual(len(test_names), 3 * 2)
+        self.assertEqual(test_names[:3], test_names[3:])
+
+    def test_run_testsets_logs_with_thread_workers(self):
+        class RecordsHandler(logging.Handler):
+
+            def __init__(self):
+                super(RecordsHandler, self).__init__()
+                self.records = []
+
+            def emit(self, record):
+                self.records.append(record)
+
+        handler = RecordsHandler()
+        origin_level = logging.root.level
+        logging.root.addHandler(handler)
+        logging.root.setLevel(logging.DEBUG)
+        try:
+            HttpRunner(workers=2, stream=StringIO()).run(self._get_worker_testsets())
+        finally:
+            logging.root.removeHandler(handler)
+            logging.root.setLevel(origin_level)
+
+        # logs of workers are emitted by main thread after testsets finished,
+        # and logs of each testset are not interleaved
+        request_records = [
+            record for record in handler.records
+            if "processed request" in record.getMessage()
+        ]
+        self.assertEqual(
+            set(record.threadName for record in request_records),
+            {threading.current_thread().name}
+        )
+        is_first_testset_list = [
+            "WORKER0DEVICESN" in record.getMessage()
+            for record in request_records
+        ]
+        self.assertEqual(set(is_first_testset_list), {True, False})
+        self.assertEqual(is_first_testset_list, sorted(is_first_testset_list, reverse=True))
+
+    def test_run_testsets_latency_with_thread_workers(self):
+        runner = HttpRunner(workers=2).run(self._get_worker_testsets())
+        summary = runner.summary
+        suite_time_list = [
+            suite_summary["time"] for suite_summary in summary["details"]
+        ]
+        wall_clock_duration = max([
+            suite_time["start_at"] + suite_time["duration"]
+            for suite_time in suite_time_list
+        ]) - min([suite_time["start_at"] for suite_time in suite_time_list])
+
+        # throughput of concurrent suites is calculated with wall clock time
+        latency_summary = summary["latency"]["testcases"]["get token"]
+        self.assertEqual(latency_summary["count"], 2)
+        self.assertEqual(
+            latency_summary["throughput"],
+            round(2 / wall_clock_duration, 3)
+        )
+        self.assertGreaterEqual(
+            latency_summary["throughput"],
+            round(2 / summary["time"]["duration"], 3)
+        )
+
+    def test_run_testsets_with_process_workers(self):
+        runner = HttpRunner(workers=2, worker_type="process")\
+            .run(self._get_worker_testsets())
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(summary["stat"]["testsRun"], 3 * 2)
+        self.assertEqual(len(summary["details"]), 2)
+        self.assertIn("records", summary["details"][0])
+
     def test_run_testset(self):
         testsets = self.testset
         runner = HttpRunner().run(testsets)
@@ -138,6 +293,85 @@ class TestHttpRunner(ApiServerUnittest):
         self.assertEqual(summary["stat"]["testsRun"], 1)
         self.assertEqual(summary["details"][0]["records"][0]["meta_data"]["response"]["json"]["data"], "abc")
 
+    def test_run_post_data_meta_data_level(self):
+        testcase = {
+            "name": "post data",
+            "request": {
+                "url": "{}/post".format(HTTPBIN_SERVER),
+                "method": "POST",
+                "data": "abcdefg"
+            }
+        }
+        testsets = [{"name": "post data", "testcases": [testcase]}]
+
+        runner = HttpRunner(meta_data_level="headers").run(testsets)
+        meta_data = runner.summary["details"][0]["records"][0]["meta_data"]
+        self.assertNotIn("body", meta_data["request"])
+        self.assertNotIn("content", meta_data["response"])
+        self.assertNotIn("json", meta_data["response"])
+        self.assertIn("headers", meta_data["response"])
+
+        runner = HttpRunner(meta_data_level="truncated", body_size_limit=3).run(testsets)
+        meta_data = runner.summary["details"][0]["records"][0]["meta_data"]
+        self.assertEqual(meta_data["request"]["body"], "abc")
+        self.assertEqual(len(meta_data["response"]["content"]), 3)
+        self.assertEqual(len(meta_data["response"]["text"]), 3)
+
+        runner = HttpRunner(meta_data_level="none").run(testsets)
+        meta_data = runner.summary["details"][0]["records"][0]["meta_data"]
+        self.assertEqual(meta_data["response"]["status_code"], 200)
+        self.assertEqual(meta_data["response"]["headers"], {})
+
+        with self.assertRaises(exceptions.ParamsError):
+            HttpRunner(meta_data_level="all")
+
+    def test_run_failed_body_only(self):
+        testsets = [{
+            "name": "post data",
+            "testcases": [
+                {
+                    "name": "post data success",
+                    "request": {
+                        "url": "{}/post".format(HTTPBIN_SERVER),
+                        "method": "POST",
+                        "data": "abc"
+                    }
+                },
+                {
+                    "name": "post data failure",
+                    "request": {
+                        "url": "{}/post".format(HTTPBIN_SERVER),
+                        "method": "POST",
+                        "data": "abc"
+                    },
+                    "validate": [
+                        {"eq": ["status_code", 201]}
+                    ]
+                }
+            ]
+        }]
+        runner = HttpRunner(failed_body_only=True).run(testsets)
+        records = runner.summary["details"][0]["records"]
+        self.assertNotIn("content", records[0]["meta_data"]["response"])
+        self.assertEqual(records[1]["meta_data"]["response"]["json"]["data"], "abc")
+
+    def test_run_with_records_dir(self):
+        records_dir = os.path.join(os.getcwd(), "reports", "records")
+        runner = HttpRunner(records_dir=records_dir).run(self.testset_path)
+        suite_summary = runner.summary["details"][0]
+        self.assertEqual(suite_summary["records"], [])
+        self.assertTrue(os.path.isfile(suite_summary["records_path"]))
+
+        records = load_records(suite_summary["records_path"])
+        self.assertEqual(len(records), 10)
+
+        report = runner.gen_html_report(html_report_name="records")
+        self.assertTrue(os.path.isfile(report))
+        self.assertEqual(suite_summary["records"], [])
+        with io.open(report, encoding="utf-8") as f:
+            self.assertEqual(f.read().count('<tr id="record_'), 10)
+        shutil.rmtree(os.path.join(os.getcwd(), "reports", "records"))
+
     def test_html_report_repsonse_image(self):
         testset_path = "tests/httpbin/load_image.yml"
         runner = HttpRunner().run(testset_path)
@@ -1,4 +1,7 @@
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 
 from httprunner import exceptions, loader, utils
@@ -56,6 +59,45 @@ class TestFileLoader(unittest.TestCase):
 
         os.remove(json_tmp_file)
 
+    def test_load_file_with_cache(self):
+        cache_dir = os.path.join(os.getcwd(), "tests", "data", "tmp_cache")
+        yaml_tmp_file = "tests/data/tmp.yml"
+        with open(yaml_tmp_file, 'w') as f:
+            f.write("- test:\n    name: abc\n")
+
+        loader.set_file_cache_dir(cache_dir)
+        try:
+            content = loader.load_file(yaml_tmp_file)
+            self.assertEqual(content, [{"test": {"name": "abc"}}])
+            cache_path = loader._get_file_cache_path(yaml_tmp_file)
+            self.assertTrue(os.path.isfile(cache_path))
+
+            # loaded from cache, the same content but not the same object
+            cached_content = loader.load_file(yaml_tmp_file)
+            self.assertEqual(cached_content, content)
+            self.assertIsNot(cached_content, content)
+
+            # changed file is parsed again
+            with open(yaml_tmp_file, 'w') as f:
+                f.write("- test:\n    name: abcdef\n")
+            content = loader.load_file(yaml_tmp_file)
+            self.assertEqual(content, [{"test": {"name": "abcdef"}}])
+
+            # content that json could not keep is not cached
+            with open(yaml_tmp_file, 'w') as f:
+                f.write("- test:\n    name: !!python/tuple [a, b]\n")
+            os.remove(cache_path)
+            content = loader.load_file(yaml_tmp_file)
+            self.assertEqual(content[0]["test"]["name"], ("a", "b"))
+            self.assertFalse(os.path.isfile(cache_path))
+
+            if os.name == "posix":
+                self.assertEqual(os.stat(cache_dir).st_mode & 0o777, 0o700)
+        finally:
+            loader.set_file_cache_dir(None)
+            shutil.rmtree(cache_dir)
+            os.remove(yaml_tmp_file)
+
     def test_load_testcases_bad_filepath(self):
         testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo')
         with self.assertRaises(exceptions.FileNotFound):
@@ -109,6 +151,45 @@ class TestFileLoader(unittest.TestCase):
             ]
         )
 
+    def test_csv_parameter_source(self):
+        csv_file_path = os.path.join(
+            os.getcwd(), 'tests/data/account.csv')
+        accounts = [
+            {'username': 'test1', 'password': '111111'},
+            {'username': 'test2', 'password': '222222'},
+            {'username': 'test3', 'password': '333333'}
+        ]
+
+        source = loader.CSVParameterSource(csv_file_path)
+        self.assertEqual(list(source), accounts)
+        # re-iterable
+        self.assertEqual(list(source), accounts)
+
+        source = loader.CSVParameterSource(csv_file_path, "Random")
+        source.shuffle_buffer_size = 2
+        rows = list(source)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            sorted(rows, key=lambda row: row["username"]),
+            accounts
+        )
+        # seeded, thus the same random order for each iteration
+        self.assertEqual(list(source), rows)
+        self.assertEqual(
+            list(loader.CSVParameterSource(csv_file_path, "Random", seed=1)),
+            list(loader.CSVParameterSource(csv_file_path, "Random", seed=1))
+        )
+
+        source = loader.CSVParameterSource(csv_file_path, "Sharded", 1, 2)
+        self.assertEqual(list(source), [accounts[1]])
+        source = loader.CSVParameterSource(csv_file_path, "Sharded", 0, 2)
+        self.assertEqual(list(source), [accounts[0], accounts[2]])
+
+        with self.assertRaises(exceptions.ParamsError):
+            loader.CSVParameterSource(csv_file_path, "Sharded", 2, 2)
+        with self.assertRaises(exceptions.ParamsError):
+            loader.CSVParameterSource(csv_file_path, "Reversed")
+
     def test_load_folder_files(self):
         folder = os.path.join(os.getcwd(), 'tests')
         file1 = os.path.join(os.getcwd(), 'tests', 'test_utils.py')
@@ -149,12 +230,124 @@ class TestSuiteLoader(unittest.TestCase):
             "api": {},
             "suite": {}
         }
+        loader.overall_def_index = {
+            "api": {},
+            "suite": {}
+        }
+        loader.def_files_scan_cache_mapping.clear()
 
     def test_load_test_dependencies(self):
         loader.load_test_dependencies()
-        overall_def_dict = loader.overall_def_dict
-        self.assertIn("get_token", overall_def_dict["api"])
-        self.assertIn("create_and_check", overall_def_dict["suite"])
+        overall_def_index = loader.overall_def_index
+        self.assertIn("get_token", overall_def_index["api"])
+        self.assertIn("create_and_check", overall_def_index["suite"])
+        self.assertTrue(overall_def_index["api"]["get_token"].endswith("basic.yml"))
+
+        # definitions are not parsed until referenced
+        self.assertEqual(loader.overall_def_dict["api"], {})
+        self.assertEqual(loader.overall_def_dict["suite"], {})
+
+    def test_load_test_dependencies_lazily(self):
+        loader.load_test_dependencies()
+        api_def = loader._get_test_definition("get_token", "api")
+        self.assertEqual(api_def["request"]["url"], "/api/get-token")
+        self.assertIn("get_user", loader.overall_def_dict["api"])
+        self.assertEqual(loader.overall_def_dict["suite"], {})
+
+        # parsed definitions are reused while files are not modified
+        loader.load_test_dependencies()
+        self.assertIs(loader._get_test_definition("get_token", "api"), api_def)
+
+        api_file = loader.overall_def_index["api"]["get_token"]
+        mtime, size, names = loader.def_files_scan_cache_mapping[api_file]
+        loader.def_files_scan_cache_mapping[api_file] = (mtime - 1, size, names)
+        loader.load_test_dependencies()
+        self.assertNotIn("get_token", loader.overall_def_dict["api"])
+        self.assertIsNot(loader._get_test_definition("get_token", "api"), api_def)
+
+    def test_load_test_dependencies_duplicated(self):
+        project_dir = tempfile.mkdtemp()
+        api_dir = os.path.join(project_dir, "tests", "api")
+        os.makedirs(api_dir)
+        with open(os.path.join(api_dir, "a.yml"), "w") as f:
+            f.write(
+                "- api:\n    def: only_a()\n    request: {url: /a, method: GET}\n"
+                "- api:\n    def: dup_api()\n    request: {url: /a/dup, method: GET}\n"
+            )
+        with open(os.path.join(api_dir, "b.yml"), "w") as f:
+            f.write(
+                "- api:\n    def: only_b($token)\n    request: {url: /b, method: GET}\n"
+                "- api:\n    def: dup_api()\n    request: {url: /b/dup, method: GET}\n"
+            )
+
+        cwd = os.getcwd()
+        os.chdir(project_dir)
+        try:
+            loader.load_test_dependencies()
+        finally:
+            os.chdir(cwd)
+
+        try:
+            overall_def_index = loader.overall_def_index["api"]
+            self.assertEqual(
+                sorted(overall_def_index.keys()),
+                ["dup_api", "only_a", "only_b"]
+            )
+            owner = overall_def_index["dup_api"]
+
+            # parsing file of duplicated definition first does not change result
+            for name in ["only_a", "only_b"]:
+                loader._get_test_definition(name, "api")
+                self.assertEqual(
+                    loader._get_test_definition("dup_api", "api")["request"]["url"],
+                    "/a/dup" if owner.endswith("a.yml") else "/b/dup"
+                )
+                loader.overall_def_dict["api"].clear()
+        finally:
+            shutil.rmtree(project_dir)
+
+        # def names without args are also scanned
+        self.assertEqual(
+            loader.def_name_regexp_compile.findall(
+                '- api:\n    def: get_users\n- api:\n    "def": "get_user($uid)"\n'),
+            ["get_users", "get_user"]
+        )
+
+    def test_load_test_dependencies_def_in_other_text(self):
+        project_dir = tempfile.mkdtemp()
+        api_dir = os.path.join(project_dir, "tests", "api")
+        os.makedirs(api_dir)
+        with open(os.path.join(api_dir, "b.yml"), "w") as f:
+            f.write("- api:\n    def: foo()\n    request: {url: /b/foo, method: GET}\n")
+        with open(os.path.join(api_dir, "z.yml"), "w") as f:
+            f.write(
+                "# was: def: foo()\n"
+                "- api:\n    def: bar()\n"
+                "    request: {url: /z/bar, method: GET, data: \"{def: foo}\"}\n"
+            )
+
+        cwd = os.getcwd()
+        os.chdir(project_dir)
+        try:
+            loader.load_test_dependencies()
+            # def scanned from other text is only a hint
+            self.assertTrue(loader.overall_def_index["api"]["foo"].endswith("z.yml"))
+            api_def = loader._get_test_definition("foo", "api")
+            self.assertEqual(api_def["request"]["url"], "/b/foo")
+            self.assertTrue(loader.overall_def_index["api"]["foo"].endswith("b.yml"))
+
+            with self.assertRaises(exceptions.ApiNotFound):
+                loader._get_test_definition("not_exist", "api")
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(project_dir)
+
+        # def in comment is not scanned
+        self.assertEqual(
+            loader.def_name_regexp_compile.findall(
+                '# was: def: foo()\n- api:\n    def: bar()\n- api: {"def": "baz"}\n'),
+            ["bar", "baz"]
+        )
 
     def test_load_api_file(self):
         loader.load_api_file("tests/api/basic.yml")
@@ -295,6 +488,87 @@ class TestSuiteLoader(unittest.TestCase):
         testset_list_3 = loader.load_testcases(path)
         self.assertEqual(len(testset_list_3), 2 * len(testset_list_1))
 
+    def test_load_testcases_in_parallel(self):
+        loader.load_test_dependencies()
+        files_list = loader.load_folder_files('tests/data')
+        loader.testcases_cache_mapping.clear()
+        testset_list_1 = loader.load_testcases(files_list)
+
+        origin_threshold = loader.parallel_parse_threshold
+        loader.parallel_parse_threshold = 1
+        loader.parse_processes = 2
+        loader.testcases_cache_mapping.clear()
+        try:
+            testset_list_2 = loader.load_testcases(files_list)
+        finally:
+            loader.parallel_parse_threshold = origin_threshold
+            loader.parse_processes = None
+            loader.testcases_cache_mapping.clear()
+
+        self.assertEqual(testset_list_1, testset_list_2)
+        self.assertEqual(
+            [testset["config"]["path"] for testset in testset_list_2],
+            [
+                os.path.join(os.getcwd(), file_path)
+                for file_path in files_list
+                if os.path.join(os.getcwd(), file_path) in [
+                    testset["config"]["path"] for testset in testset_list_1
+                ]
+            ]
+        )
+
+    def test_load_testcases_from_file_parse_error(self):
+        yaml_tmp_file = os.path.join(os.getcwd(), "tests/data/tmp_parse_error.yml")
+        with open(yaml_tmp_file, 'w') as f:
+            f.write("- test: [unclosed")
+
+        origin_file_cache_dir = loader.file_cache_dir
+        origin_load_file = loader.load_file
+        try:
+            content, error = loader._load_file_in_process((yaml_tmp_file, None))
+            self.assertIsNone(content)
+            self.assertIsInstance(error, loader.yaml.YAMLError)
+
+            # error is raised directly, file is not loaded again
+            loader.load_file = None
+            with self.assertRaises(loader.yaml.YAMLError):
+                loader._load_testcases_from_file(yaml_tmp_file, (content, error))
+        finally:
+            loader.load_file = origin_load_file
+            loader.file_cache_dir = origin_file_cache_dir
+            os.remove(yaml_tmp_file)
+
+    def test_load_yaml_file_with_python_tag(self):
+        yaml_tmp_file = os.path.join(os.getcwd(), "tests/data/tmp_python_tag.yml")
+        with open(yaml_tmp_file, 'w') as f:
+            f.write("- test:\n    name: !!python/tuple [a, b]")
+
+        try:
+            content = loader.load_yaml_file(yaml_tmp_file)
+            self.assertEqual(content[0]["test"]["name"], ("a", "b"))
+        finally:
+            os.remove(yaml_tmp_file)
+
+    def test_load_file_in_process_unpicklable_error(self):
+        def load_file(file_path):
+            error = ValueError("invalid content: {}".format(file_path))
+            error.lock = threading.Lock()
+            raise error
+
+        origin_file_cache_dir = loader.file_cache_dir
+        origin_load_file = loader.load_file
+        try:
+            loader.load_file = load_file
+            content, error = loader._load_file_in_process(("tmp.yml", None))
+        finally:
+            loader.load_file = origin_load_file
+            loader.file_cache_dir = origin_file_cache_dir
+
+        self.assertIsNone(content)
+        # original type is kept, thus error could still be caught by type in parent
+        self.assertIs(type(error), ValueError)
+        self.assertEqual(str(error), "invalid content: tmp.yml")
+
     def test_load_testcases_by_path_not_exist(self):
         # absolute folder path
         path = os.path.join(os.getcwd(), 'tests/data_not_exist')
@@ -0,0 +1,70 @@
+import logging
+import threading
+import unittest
+
+from httprunner import logger
+
+
+class FormatCounter(object):
+
+    def __init__(self):
+        self.count = 0
+
+    def __format__(self, format_spec):
+        self.count += 1
+        return "counter"
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.origin_level = logging.root.level
+
+    def tearDown(self):
+        logging.root.setLevel(self.origin_level)
+
+    def test_log_enabled(self):
+        logging.root.setLevel(logging.INFO)
+        self.assertFalse(logger.log_enabled("debug"))
+        self.assertTrue(logger.log_enabled("info"))
+        self.assertTrue(logger.log_enabled("ERROR"))
+
+    def test_log_deferred_formatting(self):
+        counter = FormatCounter()
+        logging.root.setLevel(logging.INFO)
+        logger.log_debug("value: {}", counter)
+        self.assertEqual(counter.count, 0)
+
+        logger.log_info("value: {}", counter)
+        self.assertEqual(counter.count, 1)
+
+        logger.log_info("value: {value}", value=counter)
+        self.assertEqual(counter.count, 2)
+
+    def test_log_buffer(self):
+        logging.root.setLevel(logging.INFO)
+        records_list = []
+
+        def worker(index):
+            logger.start_log_buffer()
+            try:
+                logger.log_info("worker {}", index)
+                logger.log_debug("disabled level is not buffered")
+            finally:
+                records_list.append(logger.stop_log_buffer())
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(records_list), 2)
+        for records in records_list:
+            self.assertEqual(len(records), 1)
+            self.assertEqual(records[0][0], logging.INFO)
+            self.assertIn("worker", records[0][1])
+
+        # logs of other threads are not buffered
+        self.assertIsNone(getattr(logger.log_buffer, "records", None))
+        self.assertEqual(logger.stop_log_buffer(), [])
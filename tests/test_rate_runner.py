@@ -0,0 +1,79 @@
+from httprunner import exceptions
+from httprunner.rate_runner import RateRunner
+from httprunner.task import TestSuite
+from tests.base import ApiServerUnittest
+
+
+class TestRateRunner(ApiServerUnittest):
+
+    def setUp(self):
+        self.testset_path = "tests/data/demo_testset_performance.yml"
+
+    def test_run_at_rate(self):
+        runner = RateRunner(rate=20, duration=0.5, concurrency=4).run(self.testset_path)
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(summary["stat"]["scheduled"], 10)
+        self.assertEqual(summary["stat"]["completed"], 10)
+        self.assertEqual(summary["stat"]["failures"], 0)
+        self.assertGreaterEqual(summary["time"]["duration"], 0.5)
+        self.assertEqual(summary["rate"]["lag"]["count"], 10)
+
+        # each arrival replays testset, get token is run 5 times
+        latency_summary = summary["latency"]["testcases"]["get token"]
+        self.assertEqual(latency_summary["count"], 10 * 5)
+        self.assertEqual(summary["latency"]["groups"]["POST /api/get-token"]["count"], 10 * 5)
+
+        test_suite_summary = summary["details"][0]
+        self.assertEqual(test_suite_summary["scenario"]["count"], 10)
+        # scenario latency is measured from scheduled time, including all tests
+        self.assertGreaterEqual(
+            test_suite_summary["scenario"]["max"],
+            latency_summary["max"]
+        )
+        self.assertTrue(test_suite_summary["performance"]["success"])
+
+    def test_run_at_rate_with_backlog_dropped(self):
+        runner = RateRunner(rate=500, duration=0.1, concurrency=1, max_backlog=1)\
+            .run(self.testset_path)
+        summary = runner.summary
+        self.assertFalse(summary["success"])
+        self.assertEqual(summary["stat"]["scheduled"], 50)
+        self.assertGreater(summary["stat"]["dropped"], 0)
+        self.assertEqual(
+            summary["stat"]["completed"] + summary["stat"]["dropped"],
+            50
+        )
+
+    def test_run_at_rate_with_testset_hooks(self):
+        hook_actions = []
+        runner_class = TestSuite.runner_class
+
+        class RecordingRunner(runner_class):
+
+            def do_hook_actions(self, actions):
+                hook_actions.append(list(actions))
+                super(RecordingRunner, self).do_hook_actions(actions)
+
+        testset = {
+            "name": "testset with hooks",
+            "config": {
+                "name": "testset with hooks",
+                "setup_hooks": ["${sleep_N_secs(0)}"]
+            },
+            "testcases": []
+        }
+        TestSuite.runner_class = RecordingRunner
+        try:
+            summary = RateRunner(rate=40, duration=0.25, concurrency=4).run(testset).summary
+        finally:
+            TestSuite.runner_class = runner_class
+
+        # setup hooks of testset run for each arrival in all workers
+        self.assertEqual(summary["stat"]["completed"], 10)
+        self.assertEqual(hook_actions.count(["${sleep_N_secs(0)}"]), 10)
+        self.assertEqual(testset["config"]["setup_hooks"], ["${sleep_N_secs(0)}"])
+
+    def test_run_at_rate_invalid(self):
+        with self.assertRaises(exceptions.ParamsError):
+            RateRunner(rate=0, duration=10)
@@ -0,0 +1,96 @@
+import unittest
+
+import requests
+from httprunner import report
+from httprunner.client import ResponseMetaData, get_response_body
+
+
+class TestReport(unittest.TestCase):
+
+    def test_latency_histogram(self):
+        histogram = report.LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        for value in range(1, 1001):
+            histogram.record(value)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.min, 1)
+        self.assertEqual(histogram.max, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 500, delta=500 * 0.01)
+        self.assertAlmostEqual(histogram.percentile(90), 900, delta=900 * 0.01)
+        self.assertAlmostEqual(histogram.percentile(99), 990, delta=990 * 0.01)
+        self.assertEqual(histogram.percentile(100), 1000)
+        # values are kept in buckets instead of samples
+        self.assertLess(len(histogram.counts), 1000)
+
+        summary = histogram.summary(duration=10)
+        self.assertEqual(summary["count"], 1000)
+        self.assertEqual(summary["mean"], 500.5)
+        self.assertEqual(summary["max"], 1000)
+        self.assertEqual(summary["throughput"], 100)
+
+    def test_latency_histogram_merge(self):
+        histogram_1 = report.LatencyHistogram()
+        histogram_2 = report.LatencyHistogram()
+        merged = report.LatencyHistogram()
+        for value in range(1, 101):
+            histogram_1.record(value)
+            merged.record(value)
+        for value in range(101, 201):
+            histogram_2.record(value)
+            merged.record(value)
+
+        histogram_1.merge(report.LatencyHistogram.from_dict(histogram_2.to_dict()))
+        self.assertEqual(histogram_1.counts, merged.counts)
+        self.assertEqual(histogram_1.summary(), merged.summary())
+        self.assertEqual(histogram_1.min, 1)
+        self.assertEqual(histogram_1.max, 200)
+
+    def test_merge_latency(self):
+        histogram = report.LatencyHistogram()
+        histogram.record(10)
+        latency_summary = report.summarize_latency({
+            "testcases": {"get token": histogram},
+            "groups": {"POST /api/get-token": histogram}
+        })
+        merged = report.merge_latency([latency_summary, latency_summary], duration=2)
+        self.assertEqual(merged["testcases"]["get token"]["count"], 2)
+        self.assertEqual(merged["testcases"]["get token"]["throughput"], 1)
+        self.assertEqual(merged["groups"]["POST /api/get-token"]["p99"], 10)
+
+    def test_get_url_group(self):
+        self.assertEqual(
+            report.get_url_group({"request": {"method": "GET", "url": "/api/users/$uid"}}),
+            "GET /api/users/$uid"
+        )
+        self.assertEqual(
+            report.get_url_group({"request": {"method": "GET", "url": "/api/users/1", "group": "users"}}),
+            "users"
+        )
+
+    def test_stringify_record_resolve_response_body(self):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.encoding = "utf-8"
+        resp._content = b'{"success": true}'
+        body = get_response_body(resp)
+        record = {
+            "name": "get token",
+            "meta_data": {
+                "request": {"url": "/api/get-token", "method": "POST", "headers": {}},
+                "response": ResponseMetaData({
+                    "headers": {},
+                    "encoding": "utf-8",
+                    "content": resp._content,
+                    "content_type": "application/json",
+                    "body": body
+                })
+            }
+        }
+        self.assertIsNone(body._json)
+
+        report.stringify_record(record)
+        response = record["meta_data"]["response"]
+        self.assertNotIn("body", response)
+        self.assertEqual(response["text"], '{"success": true}')
+        self.assertEqual(response["json"], {"success": True})
@@ -1,5 +1,6 @@
 import requests
 from httprunner import exceptions, response, utils
+from httprunner.client import get_response_body
 from httprunner.compat import basestring, bytes
 from tests.base import HTTPBIN_SERVER, ApiServerUnittest
 
@@ -20,6 +21,7 @@ class TestResponse(ApiServerUnittest):
         self.assertIn('Content-Type', resp_obj.headers)
         self.assertIn('Content-Length', resp_obj.headers)
         self.assertIn('success', resp_obj.json)
+        self.assertIs(resp_obj.json, get_response_body(resp).json())
 
     def test_parse_response_object_content(self):
         url = "http://127.0.0.1:5000/"
@@ -250,6 +252,44 @@ class TestResponse(ApiServerUnittest):
             "Shenzhen"
         )
 
+    def test_extract_response_compiled_extractors(self):
+        resp = requests.post(
+            url="{}/anything".format(HTTPBIN_SERVER),
+            json={"person": {"name": {"first_name": "Leo"}, "cities": ["Guangzhou", "Shenzhen"]}}
+        )
+        extractors = response.compile_extractors([
+            {"first_name": "content.json.person.name.first_name"},
+            {"city": "content.json.person.cities.1"},
+            {"status_code": "status_code"}
+        ])
+        extractor = extractors[1]["city"]
+        self.assertIsInstance(extractor, response.FieldExtractor)
+        self.assertEqual(extractor.top_query, "content")
+        self.assertEqual(
+            extractor.steps,
+            (("json", None), ("person", None), ("cities", None), ("1", 1))
+        )
+
+        resp_obj = response.ResponseObject(resp)
+        extract_binds_dict = resp_obj.extract_response(extractors)
+        self.assertEqual(extract_binds_dict["first_name"], "Leo")
+        self.assertEqual(extract_binds_dict["city"], "Shenzhen")
+        self.assertEqual(extract_binds_dict["status_code"], 200)
+
+        # shared prefix is walked once
+        _, cache = resp_obj._body_query_cache
+        self.assertIn((("json", None), ("person", None)), cache)
+        self.assertIs(
+            cache[(("json", None), ("person", None))],
+            resp_obj.json["json"]["person"]
+        )
+
+        with self.assertRaises(exceptions.ExtractFailure):
+            resp_obj.extract_field(response.FieldExtractor("content.json.person.age"))
+
+        with self.assertRaises(exceptions.ParamsError):
+            response.compile_extractors([{"invalid": 123}])
+
     def test_extract_response_body_html(self):
         resp = requests.get(url=HTTPBIN_SERVER)
         resp_obj = response.ResponseObject(resp)
@@ -328,6 +368,46 @@ class TestResponse(ApiServerUnittest):
             "abc"
         )
 
+    def test_compile_extractor_cached(self):
+        extractor = response.compile_extractor(r"LB(\d+)RB")
+        self.assertTrue(extractor.is_regex)
+        self.assertIs(response.compile_extractor(r"LB(\d+)RB"), extractor)
+        self.assertIs(response.compile_extractor(extractor), extractor)
+
+        with self.assertRaises(exceptions.ParamsError):
+            response.compile_extractor("LB(.*RB)(")
+
+    def test_compile_extractor_lru(self):
+        origin_max = response.MAX_COMPILED_EXTRACTORS
+        response.MAX_COMPILED_EXTRACTORS = 2
+        response.compiled_extractors_cache_mapping.clear()
+        try:
+            extractor_a = response.compile_extractor("content.a")
+            response.compile_extractor("content.b")
+            # content.a is recently used, thus content.b is discarded
+            self.assertIs(response.compile_extractor("content.a"), extractor_a)
+            response.compile_extractor("content.c")
+            self.assertEqual(
+                list(response.compiled_extractors_cache_mapping.keys()),
+                ["content.a", "content.c"]
+            )
+        finally:
+            response.MAX_COMPILED_EXTRACTORS = origin_max
+            response.compiled_extractors_cache_mapping.clear()
+
+    def test_extract_regex_with_search_limit(self):
+        resp = requests.post(
+            url="{}/anything".format(HTTPBIN_SERVER),
+            data="LB123abcRB789"
+        )
+        resp_obj = response.ResponseObject(resp, regex_search_limit=20)
+        # the first 20 bytes of body is '{\n  "args": {}, \n  "'
+        with self.assertRaises(exceptions.ExtractFailure):
+            resp_obj.extract_field("LB123(.*)RB789")
+
+        resp_obj = response.ResponseObject(resp, regex_search_limit=1024 * 1024)
+        self.assertEqual(resp_obj.extract_field("LB123(.*)RB789"), "abc")
+
     def test_extract_text_response(self):
         resp = requests.post(
             url="{}/anything".format(HTTPBIN_SERVER),
@@ -1,7 +1,7 @@
 import os
 import time
 
-from httprunner import HttpRunner, exceptions, loader, runner
+from httprunner import HttpRunner, exceptions, loader, runner, task
 from httprunner.utils import deep_update_dict
 from tests.base import HTTPBIN_SERVER, ApiServerUnittest
 
@@ -151,6 +151,83 @@ class TestRunner(ApiServerUnittest):
         test_runner = runner.Runner(config_dict)
         test_runner.run_test(test)
 
+    def test_run_test_with_hooks_modify_shared_variable(self):
+        config_dict = {
+            "path": os.path.join(os.getcwd(), __file__),
+            "name": "basic test with httpbin",
+            "variables": [
+                {"headers": {"content-type": "application/json", "os_platform": "ios"}}
+            ],
+            "request": {
+                "base_url": HTTPBIN_SERVER
+            }
+        }
+        test = {
+            "name": "modify request headers",
+            "request": {
+                "url": "/anything",
+                "method": "POST",
+                "headers": "$headers",
+                "json": {"sign": "f1219719911caae89ccc301679857ebfda115ca2"}
+            },
+            "setup_hooks": [
+                "${modify_headers_os_platform($request, android)}"
+            ],
+            "validate": [
+                {"check": "content.headers.Os-Platform", "expect": "android"}
+            ]
+        }
+        test_runner = runner.Runner(config_dict)
+        test_runner.run_test(test)
+        test_runner.run_compiled_test(test_runner.compile_testcase(test))
+
+        # request is copied before setup hooks, testset variable is not changed
+        testset_variables = test_runner.context.testset_shared_variables_mapping
+        self.assertEqual(testset_variables["headers"]["os_platform"], "ios")
+
+    def test_run_compiled_test_with_hooks_modify_request(self):
+        config_dict = {
+            "path": os.path.join(os.getcwd(), __file__),
+            "name": "basic test with httpbin",
+            "request": {
+                "base_url": HTTPBIN_SERVER
+            }
+        }
+        test = {
+            "name": "modify request headers",
+            "variables": [
+                {"os_platform": "ios"}
+            ],
+            "request": {
+                "url": "/anything",
+                "method": "POST",
+                "headers": {
+                    "content-type": "application/json",
+                    "os_platform": "$os_platform"
+                },
+                "json": {
+                    "sign": "f1219719911caae89ccc301679857ebfda115ca2"
+                }
+            },
+            "setup_hooks": [
+                "${modify_headers_os_platform($request, android)}"
+            ],
+            "validate": [
+                {"check": "status_code", "expect": 200},
+                {"check": "content.headers.Os-Platform", "expect": "android"}
+            ]
+        }
+        test_runner = runner.Runner(config_dict)
+        compiled_testcase = test_runner.compile_testcase(test)
+        test_runner.run_compiled_test(compiled_testcase)
+        test_runner.run_compiled_test(compiled_testcase)
+        self.assertEqual(len(compiled_testcase.setup_hooks), 2)
+
+        test_runner.run_test(test)
+        test_runner.run_test(test)
+        # prepare kwargs hook is not inserted into testcase
+        self.assertEqual(len(test["setup_hooks"]), 1)
+
     def test_run_httprunner_with_hooks(self):
         testcase_file_path = os.path.join(
             os.getcwd(), 'tests/httpbin/hooks.yml')
@@ -411,6 +488,36 @@ class TestRunner(ApiServerUnittest):
         self.assertEqual(len(summary["details"][0]["output"]), 3 * 2 * 2)
         self.assertEqual(summary["stat"]["testsRun"], 3 * 2 * 2)
 
+    def test_run_testset_with_parameters_lazy(self):
+        testcase_file_path = os.path.join(
+            os.getcwd(), 'tests/data/demo_parameters.yml')
+        runner = HttpRunner(lazy=True).run(testcase_file_path)
+        summary = runner.summary
+        self.assertTrue(summary["success"])
+        self.assertEqual(len(summary["details"][0]["output"]), 3 * 2 * 2)
+        self.assertEqual(summary["stat"]["testsRun"], 3 * 2 * 2)
+
+    def test_run_testset_with_shared_connection_pool(self):
+        testcase_file_path = os.path.join(
+            os.getcwd(), 'tests/data/demo_parameters.yml')
+        testsets = loader.load_testcases(testcase_file_path)
+        testsets[0]["config"]["connection_pool"] = {
+            "pool_maxsize": 5,
+            "shared": True
+        }
+        test_suite = task.TestSuite(testsets[0])
+        sessions = set(
+            test.test_runner.http_client_session
+            for test in test_suite
+        )
+        adapters = set(
+            session.get_adapter(HTTPBIN_SERVER)
+            for session in sessions
+        )
+        self.assertEqual(len(sessions), 3 * 2)
+        self.assertEqual(len(adapters), 1)
+        self.assertEqual(adapters.pop()._pool_maxsize, 5)
+
     def test_run_validate_elapsed(self):
         test = {
             "name": "get token",
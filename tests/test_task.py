@@ -1,6 +1,9 @@
+import copy
 import os
+import unittest
 
-from httprunner import loader, task
+from httprunner import exceptions, loader, task
+from httprunner.report import HtmlTestResult
 from tests.base import ApiServerUnittest
 
 
@@ -22,6 +25,115 @@ class TestTask(ApiServerUnittest):
         for testcase in suite:
             self.assertIsInstance(testcase, task.TestCase)
 
+    def test_create_lazy_suite(self):
+        testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo_testset_variables.yml')
+        testset = loader.load_test_file(testcase_file_path)
+        suite = task.TestSuite(testset, lazy=True)
+        self.assertEqual(list(suite._tests), [])
+        self.assertEqual(suite.countTestCases(), 3)
+        for testcase in suite:
+            self.assertIsInstance(testcase, task.TestCase)
+
+    def test_lazy_suite_iterated_repeatedly(self):
+        testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo_testset_variables.yml')
+        testset = loader.load_test_file(testcase_file_path)
+        testset["config"]["output"] = ["token"]
+        suite = task.TestSuite(testset, lazy=True)
+        for _ in range(3):
+            self.assertEqual(len(list(suite)), 3)
+            # runners of former passes are not kept
+            self.assertEqual(len(suite.test_runner_list), 3)
+
+    def test_lazy_suite_iterated_repeatedly_with_hooks(self):
+        hook_actions = []
+
+        class RecordingRunner(task.TestSuite.runner_class):
+
+            def do_hook_actions(self, actions):
+                hook_actions.append(list(actions))
+                super(RecordingRunner, self).do_hook_actions(actions)
+
+        testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo_testset_variables.yml')
+        testset = loader.load_test_file(testcase_file_path)
+        setup_hooks = ["${sleep_N_secs(0)}"]
+        teardown_hooks = ["${sleep_N_secs(0.0)}"]
+        testset["config"]["setup_hooks"] = setup_hooks
+        testset["config"]["teardown_hooks"] = teardown_hooks
+        config = copy.deepcopy(testset["config"])
+        suite = task.TestSuite(testset, lazy=True)
+        suite.runner_class = RecordingRunner
+
+        for index in range(2):
+            tests = list(suite)
+            # hooks of testset run in each pass
+            self.assertEqual(hook_actions.count(setup_hooks), index + 1)
+            self.assertEqual(tests[0].test_runner.testset_teardown_hooks, teardown_hooks)
+
+        # testset config is not modified by passes
+        self.assertEqual(testset["config"], config)
+
+    def test_compiled_suite(self):
+        testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo_testset_variables.yml')
+        testset = loader.load_test_file(testcase_file_path)
+        suite = task.TestSuite(testset)
+        for test in suite:
+            test.compile()
+            self.assertIsNotNone(test.compiled_testcase)
+
+        # compiled tests could be run repeatedly, like locust task iterations
+        for _ in range(2):
+            self.reset_all()
+            for test in suite:
+                test.runTest()
+                self.assertEqual(
+                    test.meta_data["request"]["headers"]["device_sn"],
+                    "HZfFBh6tU59EdXJ"
+                )
+
+            token = test.test_runner.context.testcase_variables_mapping["token"]
+            self.assertEqual(len(token), 16)
+
+    def test_performance_budgets(self):
+        testcase_file_path = os.path.join(os.getcwd(), 'tests/data/demo_testset_performance.yml')
+        testset = loader.load_test_file(testcase_file_path)
+        self.assertIn("performance", testset)
+        suite = task.TestSuite(testset)
+        self.assertIn(("testcases", "get token", "p95", 2000), suite.performance_budgets)
+        self.assertEqual(suite.countTestCases(), 5)
+
+        test_runner = unittest.TextTestRunner(resultclass=HtmlTestResult)
+        test_suite_summary = task.run_test_suite(test_runner, suite)
+        self.assertTrue(test_suite_summary["success"])
+        performance = test_suite_summary["performance"]
+        self.assertTrue(performance["success"])
+        self.assertEqual(len(performance["budgets"]), 4)
+
+        # budgets are evaluated with latency summary of suite
+        suite.performance_budgets = [
+            ("testcases", "get token", "p95", 0.001),
+            ("testcases", "get token", "min_throughput", 1000000),
+            ("groups", "GET /api/not-requested", "max", 1000)
+        ]
+        performance = suite.check_performance(test_suite_summary["latency"])
+        self.assertFalse(performance["success"])
+        self.assertEqual(
+            [budget["success"] for budget in performance["budgets"]],
+            [False, False, False]
+        )
+        self.assertIsNone(performance["budgets"][2]["actual"])
+
+    def test_performance_budgets_invalid(self):
+        with self.assertRaises(exceptions.ParamsError):
+            task.TestSuite({"performance": {"testcases": {"get token": {"p95x": 100}}}})
+
+        with self.assertRaises(exceptions.ParamsError):
+            task.TestSuite({"performance": {"apis": {"get token": {"max": 100}}}})
+
+        for budget in ["200ms", None, [200]]:
+            with self.assertRaises(exceptions.ParamsError) as context_manager:
+                task.TestSuite({"performance": {"testcases": {"get token": {"p95": budget}}}})
+            self.assertIn("get token p95", str(context_manager.exception))
+
     def test_create_task(self):
         testsets = [
             {
@@ -1,4 +1,6 @@
 import os
+import random
+import sys
 import time
 import unittest
 
@@ -50,6 +52,78 @@ class TestcaseParserUnittest(unittest.TestCase):
         product_list = testcase.gen_cartesian_product(*parameters_content_list)
         self.assertEqual(product_list, [])
 
+    def test_cartesian_product_lazy(self):
+        parameters_content_list = [
+            [{"a": index} for index in range(1000)],
+            [{"b": index} for index in range(1000)],
+            [{"c": index} for index in range(1000)]
+        ]
+        product = testcase.gen_cartesian_product(*parameters_content_list)
+        self.assertEqual(len(product), 1000 ** 3)
+        self.assertEqual(product[0], {"a": 0, "b": 0, "c": 0})
+        self.assertEqual(product[1001], {"a": 0, "b": 1, "c": 1})
+        self.assertEqual(product[-1], {"a": 999, "b": 999, "c": 999})
+        with self.assertRaises(IndexError):
+            product[1000 ** 3]
+
+        sliced = product[2000:5000:1000]
+        self.assertEqual(len(sliced), 3)
+        self.assertEqual(
+            list(sliced),
+            [
+                {"a": 0, "b": 2, "c": 0},
+                {"a": 0, "b": 3, "c": 0},
+                {"a": 0, "b": 4, "c": 0}
+            ]
+        )
+        self.assertEqual(sliced[::-1][0], {"a": 0, "b": 4, "c": 0})
+
+        shard = product.shard(1, 4)
+        self.assertEqual(len(shard), 1000 ** 3 // 4)
+        self.assertEqual(shard[1], product[5])
+
+        sample = product.sample(10, seed=1)
+        self.assertEqual(len(sample), 10)
+        self.assertEqual(sample, product.sample(10, seed=1))
+        self.assertEqual(len(product[:3].sample(10)), 3)
+        for item in product[:3].sample(3):
+            self.assertIn(item, list(product[:3]))
+
+        sample = random.sample(product, 5)
+        self.assertEqual(len(sample), 5)
+
+    def test_cartesian_product_beyond_maxsize(self):
+        parameters_content_list = [
+            [{"a{}".format(arg_index): index} for index in range(1000)]
+            for arg_index in range(8)
+        ]
+        product = testcase.gen_cartesian_product(*parameters_content_list)
+        self.assertEqual(product.size, 1000 ** 8)
+        self.assertGreater(product.size, sys.maxsize)
+
+        sample = product.sample(3, seed=1)
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(sample, product.sample(3, seed=1))
+
+    def test_cartesian_product_eq(self):
+        parameters_content_list = [
+            [{"a": index} for index in range(1000)],
+            [{"b": index} for index in range(1000)],
+            [{"c": index} for index in range(1000)]
+        ]
+        product = testcase.gen_cartesian_product(*parameters_content_list)
+        # compared without computing items
+        self.assertEqual(product, testcase.gen_cartesian_product(*parameters_content_list))
+        self.assertEqual(product.shard(1, 4), product[1::4])
+        self.assertNotEqual(product.shard(1, 4), product.shard(2, 4))
+        self.assertNotEqual(product, product[:-1])
+        self.assertEqual(product[5:5], product[7:3])
+        self.assertEqual(product[5:6], product[5:15:10])
+
+        self.assertEqual(product[1:3], [{"a": 0, "b": 0, "c": 1}, {"a": 0, "b": 0, "c": 2}])
+        self.assertNotEqual(product, [])
+        self.assertNotEqual(product, "abc")
+
     def test_parse_parameters_raw_list(self):
         parameters = [
             {"user_agent": ["iOS/10.1", "iOS/10.2", "iOS/10.3"]},
@@ -65,6 +139,18 @@ class TestcaseParserUnittest(unittest.TestCase):
             {'user_agent': 'iOS/10.1', 'username': 'user1', 'password': '111111'}
         )
 
+    def test_parse_parameters_lazy(self):
+        parameters = [
+            {"user_agent": ["iOS/10.1", "iOS/10.2", "iOS/10.3"]},
+            {"username-password": [("user1", "111111"), ["test2", "222222"]]}
+        ]
+        cartesian_product_parameters = testcase.parse_parameters(parameters, lazy=True)
+        self.assertEqual(
+            next(cartesian_product_parameters),
+            {'user_agent': 'iOS/10.1', 'username': 'user1', 'password': '111111'}
+        )
+        self.assertEqual(len(list(cartesian_product_parameters)), 3 * 2 - 1)
+
     def test_parse_parameters_parameterize(self):
         parameters = [
             {"app_version": "${parameterize(app_version.csv)}"},
@@ -83,6 +169,88 @@ class TestcaseParserUnittest(unittest.TestCase):
             2 * 3
         )
 
+    def test_parse_parameters_parameterize_lazy(self):
+        parameters = [
+            {"username-password": "${parameterize(account.csv, Sharded, 0, 2)}"},
+            {"app_version": "${parameterize(app_version.csv)}"}
+        ]
+        testset_path = os.path.join(
+            os.getcwd(),
+            "tests/data/demo_parameters.yml"
+        )
+        cartesian_product_parameters = testcase.parse_parameters(
+            parameters,
+            testset_path,
+            lazy=True
+        )
+        self.assertEqual(
+            next(cartesian_product_parameters),
+            {'username': 'test1', 'password': '111111', 'app_version': '2.8.5'}
+        )
+        self.assertEqual(len(list(cartesian_product_parameters)), 2 * 2 - 1)
+
+    def test_parse_parameters_parameterize_random_lazy(self):
+        parameters = [
+            {"user_agent": ["iOS/10.1", "iOS/10.2", "iOS/10.3"]},
+            {"username-password": "${parameterize(account.csv, Random)}"}
+        ]
+        testset_path = os.path.join(
+            os.getcwd(),
+            "tests/data/demo_parameters.yml"
+        )
+        cartesian_product_parameters = list(testcase.parse_parameters(
+            parameters,
+            testset_path,
+            lazy=True
+        ))
+        self.assertEqual(len(cartesian_product_parameters), 3 * 3)
+
+        # csv rows are in the same random order for each user agent
+        usernames = [item["username"] for item in cartesian_product_parameters]
+        self.assertEqual(sorted(usernames[:3]), ["test1", "test2", "test3"])
+        self.assertEqual(usernames[:3] * 3, usernames)
+
+    def test_iter_cartesian_product_streams_lazy_parameters(self):
+        class CountingSource(object):
+            def __init__(self):
+                self.passes = 0
+                self.rows_read = 0
+
+            def __iter__(self):
+                self.passes += 1
+                for index in range(1000):
+                    self.rows_read += 1
+                    yield {"username": "user{}".format(index), "password": index}
+
+        source = CountingSource()
+        product = testcase.iter_cartesian_product(
+            [{"user_agent": "iOS/10.1"}, {"user_agent": "iOS/10.2"}],
+            testcase.LazyParameters(source, ["username"])
+        )
+        # lazy parameters in second position are streamed, not loaded into list
+        self.assertEqual(
+            next(product),
+            {"user_agent": "iOS/10.1", "username": "user0"}
+        )
+        self.assertEqual(source.rows_read, 1)
+
+        product_list = list(product)
+        self.assertEqual(len(product_list), 2 * 1000 - 1)
+        self.assertEqual(product_list[999], {"user_agent": "iOS/10.2", "username": "user0"})
+        self.assertEqual(source.passes, 2)
+
+    def test_parameterize(self):
+        testcase_parser = testcase.TestcaseParser(
+            file_path=os.path.join(os.getcwd(), "tests/data/demo_parameters.yml")
+        )
+        accounts = testcase_parser.parameterize("account.csv")
+        self.assertIsInstance(accounts, list)
+        self.assertEqual(
+            accounts[0],
+            {"username": "test1", "password": "111111"}
+        )
+        self.assertEqual(len(testcase_parser.parameterize("account.csv", "Random")), 3)
+
     def test_parse_parameters_custom_function(self):
         parameters = [
             {"app_version": "${gen_app_version()}"},
@@ -121,7 +289,7 @@ class TestcaseParserUnittest(unittest.TestCase):
         )
 
 
-    def test_eval_content_variables(self):
+    def test_render_template_variables(self):
         variables = {
             "var_1": "abc",
             "var_2": "def",
@@ -130,64 +298,67 @@ class TestcaseParserUnittest(unittest.TestCase):
             "var_5": True,
             "var_6": None
         }
-        testcase_parser = testcase.TestcaseParser(variables=variables)
+        functions = {
+            "func": lambda *args: "-".join(args)
+        }
+        testcase_parser = testcase.TestcaseParser(variables=variables, functions=functions)
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_1"),
+            testcase.compile_content("$var_1").render(testcase_parser),
             "abc"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("var_1"),
+            testcase.compile_content("var_1").render(testcase_parser),
             "var_1"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_1#XYZ"),
+            testcase.compile_content("$var_1#XYZ").render(testcase_parser),
             "abc#XYZ"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("/$var_1/$var_2/var3"),
+            testcase.compile_content("/$var_1/$var_2/var3").render(testcase_parser),
             "/abc/def/var3"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("/$var_1/$var_2/$var_1"),
+            testcase.compile_content("/$var_1/$var_2/$var_1").render(testcase_parser),
             "/abc/def/abc"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("${func($var_1, $var_2, xyz)}"),
-            "${func(abc, def, xyz)}"
+            testcase.compile_content("${func($var_1, $var_2, xyz)}").render(testcase_parser),
+            "abc-def-xyz"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_3"),
+            testcase.compile_content("$var_3").render(testcase_parser),
             123
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_4"),
+            testcase.compile_content("$var_4").render(testcase_parser),
             {"a": 1}
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_5"),
+            testcase.compile_content("$var_5").render(testcase_parser),
             True
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("abc$var_5"),
+            testcase.compile_content("abc$var_5").render(testcase_parser),
             "abcTrue"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("abc$var_4"),
+            testcase.compile_content("abc$var_4").render(testcase_parser),
             "abc{'a': 1}"
         )
         self.assertEqual(
-            testcase_parser._eval_content_variables("$var_6"),
+            testcase.compile_content("$var_6").render(testcase_parser),
             None
         )
 
-    def test_eval_content_variables_search_upward(self):
+    def test_render_template_variables_search_upward(self):
         testcase_parser = testcase.TestcaseParser()
 
         with self.assertRaises(exceptions.ParamsError):
-            testcase_parser._eval_content_variables("/api/$SECRET_KEY")
+            testcase.compile_content("/api/$SECRET_KEY").render(testcase_parser)
 
         testcase_parser.file_path = "tests/data/demo_testset_hardcode.yml"
-        content = testcase_parser._eval_content_variables("/api/$SECRET_KEY")
+        content = testcase.compile_content("/api/$SECRET_KEY").render(testcase_parser)
         self.assertEqual(content, "/api/DebugTalk")
 
 
@@ -299,28 +470,28 @@ class TestcaseParserUnittest(unittest.TestCase):
             ["func(1, 2, a=3, b=4)"]
         )
 
-    def test_eval_content_functions(self):
+    def test_render_template_functions(self):
         functions = {
             "add_two_nums": lambda a, b=1: a + b
         }
         testcase_parser = testcase.TestcaseParser(functions=functions)
         self.assertEqual(
-            testcase_parser._eval_content_functions("${add_two_nums(1, 2)}"),
+            testcase.compile_content("${add_two_nums(1, 2)}").render(testcase_parser),
             3
         )
         self.assertEqual(
-            testcase_parser._eval_content_functions("/api/${add_two_nums(1, 2)}"),
+            testcase.compile_content("/api/${add_two_nums(1, 2)}").render(testcase_parser),
             "/api/3"
         )
 
-    def test_eval_content_functions_search_upward(self):
+    def test_render_template_functions_search_upward(self):
         testcase_parser = testcase.TestcaseParser()
 
         with self.assertRaises(exceptions.ParamsError):
-            testcase_parser._eval_content_functions("/api/${gen_md5(abc)}")
+            testcase.compile_content("/api/${gen_md5(abc)}").render(testcase_parser)
 
         testcase_parser.file_path = "tests/data/demo_testset_hardcode.yml"
-        content = testcase_parser._eval_content_functions("/api/${gen_md5(abc)}")
+        content = testcase.compile_content("/api/${gen_md5(abc)}").render(testcase_parser)
         self.assertEqual(content, "/api/900150983cd24fb0d6963f7d28e17f72")
 
     def test_parse_content_with_bindings_testcase(self):
@@ -397,3 +568,65 @@ class TestcaseParserUnittest(unittest.TestCase):
             }
         ]
         self.assertTrue(data_structure)
+
+    def test_compile_string(self):
+        self.assertEqual(testcase.compile_string(" abc "), "abc")
+        self.assertEqual(testcase.compile_string("price: $ 5"), "price: $ 5")
+
+        compiled = testcase.compile_string("/api/$uid/${add_two_nums(1, $num)}")
+        self.assertIsInstance(compiled, testcase.StringTemplate)
+        self.assertIs(compiled, testcase.compile_string("/api/$uid/${add_two_nums(1, $num)}"))
+        self.assertEqual(compiled.parts[0], "/api/")
+        self.assertIsInstance(compiled.parts[1], testcase.VariableSlot)
+        self.assertEqual(compiled.parts[2], "/")
+        self.assertIsInstance(compiled.parts[3], testcase.FunctionSlot)
+        self.assertEqual(compiled.parts[3].func_name, "add_two_nums")
+
+    def test_compile_content_constant(self):
+        content = {
+            "url": "/api/users",
+            "headers": {"Content-Type": "application/json"},
+            "data": [1, (2, 3)]
+        }
+        compiled = testcase.compile_content(content)
+        self.assertIsInstance(compiled, testcase.ConstantTemplate)
+
+        testcase_parser = testcase.TestcaseParser()
+        rendered = testcase_parser.eval_content_with_bindings(compiled)
+        self.assertEqual(
+            rendered,
+            {
+                "url": "/api/users",
+                "headers": {"Content-Type": "application/json"},
+                "data": [1, [2, 3]]
+            }
+        )
+        # rendered content should not share mutable items with template
+        rendered["headers"]["Content-Type"] = "text/html"
+        self.assertEqual(
+            testcase_parser.eval_content_with_bindings(compiled)["headers"],
+            {"Content-Type": "application/json"}
+        )
+
+    def test_compile_content_render_repeatedly(self):
+        functions = {
+            "add_two_nums": lambda a, b=1: a + b
+        }
+        compiled = testcase.compile_content({
+            "url": "/api/users/$uid",
+            "sum": "${add_two_nums($uid, b=2)}",
+            "body": "$data"
+        })
+        self.assertIsInstance(compiled, testcase.DictTemplate)
+
+        for uid in range(3):
+            variables = {"uid": uid, "data": {"uid": uid}}
+            testcase_parser = testcase.TestcaseParser(variables, functions)
+            self.assertEqual(
+                testcase_parser.eval_content_with_bindings(compiled),
+                {
+                    "url": "/api/users/{}".format(uid),
+                    "sum": uid + 2,
+                    "body": {"uid": uid}
+                }
+            )
@@ -17,6 +17,17 @@ class TestUtils(ApiServerUnittest):
             "/post/123"
         )
 
+    def test_parse_json_query(self):
+        steps = utils.parse_json_query("person.cities.0")
+        self.assertEqual(steps, (("person", None), ("cities", None), ("0", 0)))
+        json_content = {"person": {"cities": ["Guangzhou", "Shenzhen"]}}
+        self.assertEqual(utils.walk_json(json_content, steps), "Guangzhou")
+
+        with self.assertRaises(ValueError):
+            utils.walk_json(json_content, utils.parse_json_query("person.cities.first"))
+        with self.assertRaises(TypeError):
+            utils.walk_json({"age": 29}, utils.parse_json_query("age.0"))
+
     def test_query_json(self):
         json_content = {
             "ids": [1, 2, 3, 4],
@@ -283,6 +294,29 @@ class TestUtils(ApiServerUnittest):
         with self.assertRaises(exceptions.VariableNotFound):
             utils.search_conf_item("/user/local/bin", "variable", "SECRET_KEY")
 
+    def test_search_conf_item_cached(self):
+        utils.clear_debugtalk_cache()
+        search_chain = utils.get_debugtalk_search_chain("tests/data/subfolder/test.yml")
+        self.assertEqual(
+            search_chain[0],
+            os.path.join(os.getcwd(), "tests", "debugtalk.py")
+        )
+        self.assertIs(
+            search_chain,
+            utils.get_debugtalk_search_chain("tests/data/subfolder/demo.yml")
+        )
+
+        gen_md5 = utils.search_conf_item("tests/data/demo_binds.yml", "function", "gen_md5")
+        # debugtalk.py is imported only once
+        self.assertIs(
+            gen_md5,
+            utils.search_conf_item("tests/data/subfolder/test.yml", "function", "gen_md5")
+        )
+
+        utils.clear_debugtalk_cache()
+        self.assertEqual(utils.debugtalk_items_cache_mapping, {})
+        self.assertEqual(utils.debugtalk_search_chain_mapping, {})
+
     def test_is_variable(self):
         var1 = 123
         var2 = "abc"